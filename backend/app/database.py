@@ -1,22 +1,92 @@
 """Database connection and session management."""
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import get_settings
 
 settings = get_settings()
 is_sqlite = settings.DATABASE_URL.startswith("sqlite")
+is_sqlite_memory = is_sqlite and (":memory:" in settings.DATABASE_URL or settings.DATABASE_URL.rstrip("/") == "sqlite:")
+
+# Sync driver -> asyncio driver used by the async request path
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+
+def _async_database_url(url: str) -> str:
+    """Derive the asyncio database URL from the configured (sync) DATABASE_URL."""
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    scheme, sep, rest = url.partition("://")
+    return f"{_ASYNC_DRIVERS.get(scheme, scheme)}{sep}{rest}"
+
+
+def _pool_options() -> dict:
+    """Connection pool sizing (in-memory SQLite uses a single shared connection instead)."""
+    if is_sqlite_memory:
+        return {}
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+
+def sqlite_pragmas() -> list[str]:
+    """PRAGMAs of the SQLite production profile (empty when SQLITE_TUNING_ENABLED=false)."""
+    if not settings.SQLITE_TUNING_ENABLED:
+        return []
+    return [
+        f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}",  # WAL: readers never block the writer
+        f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}",  # NORMAL is durable in WAL mode, fewer fsyncs
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",  # wait for the write lock instead of failing
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_MB * 1024}",  # negative = KiB
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
 
 engine = create_engine(
     settings.DATABASE_URL,
     pool_pre_ping=not is_sqlite,
     connect_args={"check_same_thread": False} if is_sqlite else {},
     echo=settings.DEBUG,
+    **_pool_options(),
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
+# Async engine for the API handlers (scripts keep using the sync engine above)
+async_engine = create_async_engine(
+    _async_database_url(settings.DATABASE_URL),
+    pool_pre_ping=not is_sqlite,
+    echo=settings.DEBUG,
+    **_pool_options(),
+)
+
+if is_sqlite:
+    # Applied on every new DBAPI connection of both engines
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 
 def get_db():
     """Dependency for FastAPI to get database session."""
@@ -27,7 +97,15 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """Dependency for FastAPI to get an async database session."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Create all database tables."""
     from . import models  # noqa: F401 - register models
+    from .migrations import upgrade_schema
     Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
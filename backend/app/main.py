@@ -1,16 +1,41 @@
 """
 AI Wiki Quiz Generator - FastAPI Application
 """
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import init_db
+from .database import async_engine, engine, init_db
 from .routers import quiz
+from .services import metrics
+from .services.container import ServiceContainer
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Startup: initialize the database and build the shared services (HTTP pools, LLM
+    clients, compiled chains, job workers). Shutdown: stop the workers, then close
+    every client and the async DB connections.
+    """
+    init_db()
+    metrics.instrument_engine(engine)
+    metrics.instrument_engine(async_engine.sync_engine)
+    app.state.services = ServiceContainer()
+    app.state.services.start()
+    try:
+        yield
+    finally:
+        await app.state.services.close()
+        await async_engine.dispose()
+
 
 app = FastAPI(
     title="AI Wiki Quiz Generator",
     description="Generate quizzes from Wikipedia articles using LLM",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -19,15 +44,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-app.include_router(quiz.router)
+if metrics.enabled():
+    app.add_middleware(metrics.MetricsMiddleware)
 
-
-@app.on_event("startup")
-def startup():
-    """Initialize database on startup."""
-    init_db()
+app.include_router(quiz.router)
 
 
 @app.get("/")
@@ -38,3 +61,11 @@ def root():
 @app.get("/health")
 def health():
     return {"status": "ok"}
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape endpoint (404 unless METRICS_ENABLED)."""
+    if not metrics.enabled():
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
@@ -0,0 +1,148 @@
+"""
+Lightweight schema migrations for existing databases.
+create_all() only creates missing tables. upgrade_schema() then:
+1. adds columns declared on the models that an existing table lacks,
+2. runs named data migrations that have not been recorded in schema_migrations yet,
+3. creates indexes declared on the models that do not exist yet.
+Works on SQLite and MySQL without a manual rebuild; every step is idempotent.
+"""
+import logging
+from typing import Callable
+
+from sqlalchemy import Column, DateTime, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.sql import func
+
+from .database import Base
+
+logger = logging.getLogger(__name__)
+
+schema_migrations = Table(
+    "schema_migrations",
+    Base.metadata,
+    Column("name", String(128), primary_key=True),
+    Column("applied_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+
+def _backfill_article_keys(conn: Connection) -> None:
+    from .services.canonical import canonical_key_from_url
+
+    rows = conn.execute(text("SELECT id, url FROM wiki_quizzes WHERE article_key IS NULL ORDER BY id")).all()
+    seen = set(conn.execute(text("SELECT article_key FROM wiki_quizzes WHERE article_key IS NOT NULL")).scalars())
+    for quiz_id, url in rows:
+        key = canonical_key_from_url(url)
+        # Legacy duplicates (same article under two URLs) keep the oldest row as the cache entry
+        if key and key not in seen:
+            seen.add(key)
+            conn.execute(text("UPDATE wiki_quizzes SET article_key = :k WHERE id = :id"), {"k": key, "id": quiz_id})
+
+
+def _move_raw_html_to_blobs(conn: Connection) -> None:
+    """Move the legacy inline wiki_quizzes.raw_html text into compressed html_blobs rows."""
+    from .services.blob_store import blob_values
+
+    if "raw_html" not in {c["name"] for c in inspect(conn).get_columns("wiki_quizzes")}:
+        return
+    rows = conn.execute(text("SELECT id, raw_html FROM wiki_quizzes WHERE raw_html IS NOT NULL")).all()
+    stored = set(conn.execute(text("SELECT sha256 FROM html_blobs")).scalars())
+    for quiz_id, raw_html in rows:
+        values = blob_values(raw_html)
+        if values["sha256"] not in stored:
+            stored.add(values["sha256"])
+            conn.execute(
+                text("INSERT INTO html_blobs (sha256, codec, size, data) VALUES (:sha256, :codec, :size, :data)"),
+                values,
+            )
+        conn.execute(
+            text("UPDATE wiki_quizzes SET raw_html_hash = :h, raw_html = NULL WHERE id = :id"),
+            {"h": values["sha256"], "id": quiz_id},
+        )
+    try:
+        conn.execute(text("ALTER TABLE wiki_quizzes DROP COLUMN raw_html"))
+    except Exception:  # SQLite < 3.35: the column stays, but is empty and unmapped
+        logger.warning("Could not drop legacy column wiki_quizzes.raw_html; left in place (NULL)")
+
+
+def _backfill_question_counts(conn: Connection) -> None:
+    conn.execute(text(
+        "UPDATE wiki_quizzes SET question_count = "
+        "(SELECT COUNT(*) FROM quiz_questions WHERE quiz_questions.wiki_quiz_id = wiki_quizzes.id)"
+    ))
+
+
+def _build_search_index(conn: Connection) -> None:
+    from .services.search import backfill_search_index
+
+    backfill_search_index(conn)
+
+
+def _search_index_delete_trigger(conn: Connection) -> None:
+    """Drop index rows whose quiz is gone, and from now on remove them with the quiz."""
+    from .services.search import create_delete_trigger
+
+    if not inspect(conn).has_table("quiz_search"):
+        return
+    id_column = "rowid" if conn.dialect.name == "sqlite" else "quiz_id"
+    conn.execute(text(f"DELETE FROM quiz_search WHERE {id_column} NOT IN (SELECT id FROM wiki_quizzes)"))
+    create_delete_trigger(conn)
+
+
+# Data migrations, applied once each in this order (names are recorded, never reuse one)
+MIGRATIONS: list[tuple[str, Callable[[Connection], None]]] = [
+    ("0001_article_keys", _backfill_article_keys),
+    ("0002_raw_html_blobs", _move_raw_html_to_blobs),
+    ("0003_question_counts", _backfill_question_counts),
+    ("0004_search_index", _build_search_index),
+    ("0005_search_index_delete_trigger", _search_index_delete_trigger),
+]
+
+
+def _add_missing_columns(conn: Connection) -> None:
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {c["name"] for c in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            # Constraints (unique, FK) come from the indexes below, not the ALTER
+            col_type = column.type.compile(dialect=conn.dialect)
+            default = column.server_default
+            if default is not None and isinstance(default.arg, str):
+                col_type += f" DEFAULT '{default.arg}'"
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+            logger.info("Added column %s.%s", table.name, column.name)
+
+
+def _create_missing_indexes(conn: Connection) -> None:
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(conn)
+                logger.info("Created index %s", index.name)
+
+
+def upgrade_schema(engine: Engine) -> None:
+    """Bring an existing database up to the current models."""
+    with engine.begin() as conn:
+        _add_missing_columns(conn)
+    
+    with engine.begin() as conn:
+        applied = set(conn.execute(select(schema_migrations.c.name)).scalars())
+    for name, migrate in MIGRATIONS:
+        if name in applied:
+            continue
+        # One transaction per migration: a crash part-way leaves it pending, not half-recorded
+        with engine.begin() as conn:
+            migrate(conn)
+            conn.execute(schema_migrations.insert().values(name=name))
+        logger.info("Applied migration %s", name)
+    
+    with engine.begin() as conn:
+        _create_missing_indexes(conn)
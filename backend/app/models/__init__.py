@@ -1,2 +1,6 @@
 from .wiki_quiz import WikiQuiz, QuizQuestion
+from .generation_lease import GenerationLease
+from .generation_job import GenerationJob
+from .article_alias import ArticleAlias
+from .html_blob import HtmlBlob
 from . import wiki_quiz
@@ -0,0 +1,14 @@
+"""Resolved article aliases (redirects and URL variants) -> canonical article key."""
+from sqlalchemy import Column, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class ArticleAlias(Base):
+    """Maps an alias key (e.g. "en:AI") to the article it redirects to ("en:Artificial_intelligence")."""
+    
+    __tablename__ = "article_aliases"
+    
+    alias_key = Column(String(512), primary_key=True)
+    article_key = Column(String(512), nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,31 @@
+"""Queued background quiz generations (POST /api/jobs)."""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class GenerationJob(Base):
+    """
+    One asynchronous generation request. Workers claim rows by setting status="running"
+    with a lease (locked_until); a row whose lease expired is claimable again, so jobs
+    survive a crash or restart of the process that was running them.
+    """
+    
+    __tablename__ = "generation_jobs"
+    __table_args__ = (
+        Index("ix_generation_jobs_status_run_after", "status", "run_after"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    url = Column(String(512), nullable=False)
+    article_key = Column(String(512), nullable=False, index=True)
+    status = Column(String(16), nullable=False, default="queued")  # queued, running, succeeded, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    run_after = Column(DateTime, nullable=False)  # naive UTC; not claimable before this
+    locked_by = Column(String(128), nullable=True)
+    locked_until = Column(DateTime, nullable=True)
+    quiz_id = Column(Integer, nullable=True)
+    error_status_code = Column(Integer, nullable=True)
+    error_detail = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
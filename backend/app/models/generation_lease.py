@@ -0,0 +1,13 @@
+"""Cross-worker lease rows used to single-flight quiz generation."""
+from sqlalchemy import Column, String, DateTime
+from ..database import Base
+
+
+class GenerationLease(Base):
+    """One row per article currently being generated by some worker process."""
+    
+    __tablename__ = "generation_leases"
+    
+    key = Column(String(512), primary_key=True)
+    owner = Column(String(128), nullable=False)
+    expires_at = Column(DateTime, nullable=False)
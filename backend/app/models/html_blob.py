@@ -0,0 +1,14 @@
+"""Content-addressed, compressed storage for scraped article HTML."""
+from sqlalchemy import Column, Integer, String, LargeBinary
+from ..database import Base
+
+
+class HtmlBlob(Base):
+    """Raw HTML body stored once per distinct content (sha256 of the uncompressed text)."""
+    
+    __tablename__ = "html_blobs"
+    
+    sha256 = Column(String(64), primary_key=True)
+    codec = Column(String(16), nullable=False)  # zstd | zlib
+    size = Column(Integer, nullable=False)  # uncompressed bytes
+    data = Column(LargeBinary, nullable=False)
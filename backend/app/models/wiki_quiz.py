@@ -1,5 +1,5 @@
 """Database models for Wiki Quiz storage."""
-from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -12,16 +12,27 @@ class WikiQuiz(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     url = Column(String(512), unique=True, nullable=False, index=True)
+    article_key = Column(String(512), unique=True, nullable=True, index=True)  # "en:Alan_Turing"
     title = Column(String(256), nullable=False)
     summary = Column(Text, nullable=True)
-    raw_html = Column(Text, nullable=True)  # Bonus: store raw HTML for reference
+    # Bonus: raw HTML for reference, stored compressed in html_blobs and loaded only on request
+    raw_html_hash = Column(String(64), ForeignKey("html_blobs.sha256"), nullable=True)
     key_entities = Column(JSON, nullable=True)  # {"people": [], "organizations": [], "locations": []}
     sections = Column(JSON, nullable=True)  # ["Early life", "World War II", ...]
     related_topics = Column(JSON, nullable=True)  # ["Cryptography", "Enigma machine", ...]
+    question_count = Column(Integer, nullable=False, default=0, server_default="0")  # maintained on write
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Keyset pagination of the history list: ORDER BY created_at DESC, id DESC
+    __table_args__ = (Index("ix_wiki_quizzes_created_at_id", "created_at", "id"),)
+    
     # Relationship to quiz questions
-    questions = relationship("QuizQuestion", back_populates="wiki_quiz", cascade="all, delete-orphan")
+    questions = relationship(
+        "QuizQuestion",
+        back_populates="wiki_quiz",
+        cascade="all, delete-orphan",
+        order_by="QuizQuestion.sort_order",
+    )
 
 
 class QuizQuestion(Base):
@@ -39,4 +50,7 @@ class QuizQuestion(Base):
     section = Column(String(256), nullable=True)  # For section-wise grouping (bonus)
     sort_order = Column(Integer, default=0)
     
+    # Detail loads fetch one quiz's questions in order: WHERE wiki_quiz_id = ? ORDER BY sort_order
+    __table_args__ = (Index("ix_quiz_questions_quiz_sort", "wiki_quiz_id", "sort_order"),)
+    
     wiki_quiz = relationship("WikiQuiz", back_populates="questions")
@@ -6,6 +6,10 @@ These prompts are designed to:
 3. Vary difficulty levels appropriately
 """
 
+# Bump when prompt semantics change without a text change (e.g. output parsing);
+# editing QUIZ_GENERATION_PROMPT itself already invalidates cached LLM results
+PROMPT_VERSION = "1"
+
 # Main quiz generation prompt - designed to minimize hallucination by grounding in text
 QUIZ_GENERATION_PROMPT = """You are an expert educational quiz creator. Your task is to generate a high-quality quiz based EXCLUSIVELY on the following Wikipedia article content.
 
@@ -50,6 +54,49 @@ Generate the quiz as a valid JSON object with this exact structure (no markdown,
 Output ONLY the JSON object, nothing else."""
 
 
+
+# Map step of map-reduce generation: one call per section-aligned chunk of a long article
+SECTION_QUIZ_PROMPT = """You are an expert educational quiz creator. Below is ONE PART of a longer Wikipedia article. Write quiz questions based EXCLUSIVELY on this part.
+
+CRITICAL RULES:
+- Base ALL questions, options, answers, and explanations ONLY on information explicitly stated in the text below.
+- Do NOT add any information not present in the text. If unsure, omit the question.
+- Each question must have exactly 4 options (A, B, C, D).
+- Only ONE option should be correct. The correct answer must be explicitly supported by the text.
+- Write {num_questions} questions of varied difficulty (easy, medium, hard).
+- "section" must be the name of the section (from the list below) the question is about.
+
+ARTICLE TITLE: {title}
+
+SECTIONS IN THIS PART: {sections}
+
+TEXT:
+{content}
+
+Generate a valid JSON object with this exact structure (no markdown, no extra text):
+{{
+  "key_entities": {{
+    "people": ["Person 1"],
+    "organizations": ["Org 1"],
+    "locations": ["Place 1"]
+  }},
+  "quiz": [
+    {{
+      "question": "Question text here?",
+      "options": ["Option A", "Option B", "Option C", "Option D"],
+      "answer": "Exact text of correct option",
+      "difficulty": "easy|medium|hard",
+      "explanation": "Brief explanation citing the text.",
+      "section": "Section name"
+    }}
+  ],
+  "related_topics": ["Topic 1", "Topic 2"]
+}}
+
+- "key_entities": people, organizations, and locations explicitly mentioned in this text ([] when none).
+- "related_topics": 1-3 Wikipedia article titles for further reading.
+Output ONLY the JSON object, nothing else."""
+
 # Related topics extraction prompt (optional - can be combined with main)
 RELATED_TOPICS_PROMPT = """Based on the following Wikipedia article summary and sections, suggest 3-6 related Wikipedia topics that a reader might want to explore for further reading.
 
@@ -1,63 +1,84 @@
 """
 API endpoints for quiz generation and history.
 """
+import base64
+import binascii
+import json
 import logging
-import requests
+from collections import Counter
+from datetime import datetime
+from typing import Optional
 
 logger = logging.getLogger(__name__)
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import String, and_, literal, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 
-from ..database import get_db
-from ..models import WikiQuiz, QuizQuestion
-from ..schemas import WikiQuizResponse, WikiQuizListResponse, GenerateQuizRequest
-from ..services import WikipediaScraper, QuizGenerator
+from ..config import get_settings
+from ..database import AsyncSessionLocal, get_async_db
+from ..models import WikiQuiz
+from ..schemas import WikiQuizResponse, WikiQuizListResponse, GenerateQuizRequest, BatchGenerateRequest, JobResponse
+from ..services import WikipediaScraper, QuizGenerator, metrics
+from ..services.blob_store import load_html
+from ..services.canonical import article_url
+from ..services.container import get_scraper, get_services
+from ..services.generation import (
+    FETCH_ERRORS,
+    GenerationError,
+    generate_batch,
+    get_or_generate_quiz,
+    stream_quiz_generation,
+)
+from ..services.jobs import FINISHED_STATUSES, get_job, submit_job, wait_for_change
+from ..services.response_cache import CachedResponse, get_response_cache
+from ..services.search import SearchCursor, decode_cursor, encode_cursor, search_quizzes
 
 router = APIRouter(prefix="/api", tags=["quiz"])
 
 
 @router.get("/preview")
-def preview_url(url: str):
+async def preview_url(url: str, scraper: WikipediaScraper = Depends(get_scraper)):
     """
     Validate Wikipedia URL and return article title (bonus: URL validation and preview).
     Query param: url
     """
-    scraper = WikipediaScraper()
-    if not scraper.is_valid_wikipedia_url(url):
+    key = scraper.canonical_key(url) if scraper.is_valid_wikipedia_url(url) else None
+    if not key:
         raise HTTPException(
             status_code=400,
             detail="Invalid Wikipedia URL. Use format: https://en.wikipedia.org/wiki/Article_Name",
         )
     try:
-        title = scraper.fetch_title_only(url)
+        # Fetch the canonical URL so the page cache entry is shared with /generate
+        title = await scraper.afetch_title_only(article_url(key))
         return {"valid": True, "title": title, "url": url}
-    except requests.exceptions.RequestException as e:
+    except FETCH_ERRORS as e:
         raise HTTPException(status_code=502, detail=f"Failed to fetch URL: {str(e)}")
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
-def get_quiz_generator():
-    """Dependency for QuizGenerator (lazy init to avoid import-time API key check)."""
+def get_quiz_generator(request: Request) -> QuizGenerator:
+    """Dependency for the app's shared QuizGenerator (500 if it could not be configured)."""
     try:
-        return QuizGenerator()
+        return get_services(request).get_generator()
     except ValueError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/generate", response_model=WikiQuizResponse)
-def generate_quiz(
+async def generate_quiz(
     request: GenerateQuizRequest,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     generator: QuizGenerator = Depends(get_quiz_generator),
+    scraper: WikipediaScraper = Depends(get_scraper),
 ):
     """
     Generate a quiz from a Wikipedia article URL.
     Scrapes the page, sends to LLM, stores in DB, returns JSON.
     """
-    scraper = WikipediaScraper()
-    
     # URL validation
     if not scraper.is_valid_wikipedia_url(request.url):
         raise HTTPException(
@@ -65,84 +86,242 @@ def generate_quiz(
             detail="Invalid Wikipedia URL. Use format: https://en.wikipedia.org/wiki/Article_Name"
         )
     
-    # Check cache: avoid duplicate scraping (bonus)
-    existing = db.query(WikiQuiz).filter(WikiQuiz.url == request.url).first()
-    if existing:
-        return _wiki_quiz_to_response(existing)
-    
-    # Scrape
+    # Cache hit or shared (single-flight) generation
     try:
-        scraped = scraper.fetch_and_parse(request.url)
-    except requests.exceptions.RequestException as e:
-        raise HTTPException(status_code=502, detail=f"Failed to fetch URL: {str(e)}")
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        quiz_id = await get_or_generate_quiz(request.url, scraper, generator)
+    except GenerationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    # Generate quiz with LLM
-    try:
-        generated = generator.generate_quiz(
-            title=scraped["title"],
-            sections=scraped.get("sections", []),
-            content=scraped["content"],
+    return await _quiz_detail_response(db, quiz_id)
+
+
+@router.get("/generate/stream")
+async def stream_generate_quiz(
+    url: str,
+    generator: QuizGenerator = Depends(get_quiz_generator),
+    scraper: WikipediaScraper = Depends(get_scraper),
+):
+    """
+    Generate a quiz and stream it as server-sent events while the LLM writes it:
+    "article" once the page is scraped, one "question" per quiz item, then "key_entities"
+    and "related_topics" as they complete, and finally "quiz" with the stored quiz
+    (same body as GET /api/quizzes/{id}). Failures end the stream with an "error" event.
+    An already-stored quiz is replayed from the database.
+    """
+    if not scraper.is_valid_wikipedia_url(url):
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid Wikipedia URL. Use format: https://en.wikipedia.org/wiki/Article_Name"
         )
+    return StreamingResponse(
+        _generation_events(url, scraper, generator),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _generation_events(url: str, scraper: WikipediaScraper, generator: QuizGenerator):
+    streamed_questions = False
+    try:
+        async for kind, value in stream_quiz_generation(url, scraper, generator):
+            if kind != "stored":
+                streamed_questions = streamed_questions or kind == "question"
+                yield _sse_event(kind, json.dumps(value))
+                continue
+            async with AsyncSessionLocal() as db:
+                body = (await _encoded_quiz(db, value)).body
+            if not streamed_questions:
+                # Generated elsewhere (or earlier): replay the stored quiz piece by piece
+                quiz = json.loads(body)
+                for q in quiz["quiz"]:
+                    yield _sse_event("question", json.dumps(q))
+                yield _sse_event("key_entities", json.dumps(quiz["key_entities"]))
+                yield _sse_event("related_topics", json.dumps(quiz["related_topics"]))
+            yield _sse_event("quiz", body.decode("utf-8"))
+    except GenerationError as e:
+        yield _sse_event("error", json.dumps({"status_code": e.status_code, "detail": e.detail}))
+    except HTTPException as e:  # e.g. the stored quiz vanished before it could be loaded
+        yield _sse_event("error", json.dumps({"status_code": e.status_code, "detail": e.detail}))
     except Exception as e:
-        logger.exception("Quiz generation failed")
-        err_msg = str(e)
-        if "RESOURCE_EXHAUSTED" in err_msg or "429" in err_msg:
-            raise HTTPException(
-                status_code=429,
-                detail="Gemini API quota exceeded. Wait for reset (midnight Pacific) or use a new API key.",
-            )
-        raise HTTPException(status_code=500, detail=f"Quiz generation failed: {err_msg}")
-    
-    # Store in database (key_entities from LLM; fallback to scraped if available)
-    wiki_quiz = WikiQuiz(
-        url=request.url,
-        title=scraped["title"],
-        summary=scraped.get("summary"),
-        raw_html=scraped.get("raw_html"),
-        key_entities=generated.get("key_entities") or scraped.get("key_entities"),
-        sections=scraped.get("sections"),
-        related_topics=generated.get("related_topics", []),
+        # The 200 response has started: the client can only learn of a failure in-band
+        logger.exception("Quiz stream failed")
+        yield _sse_event("error", json.dumps({"status_code": 500, "detail": f"Quiz generation failed: {e}"}))
+
+
+def _sse_event(event: str, data: str) -> str:
+    return f"event: {event}\ndata: {data}\n\n"
+
+
+@router.post("/generate/batch")
+async def generate_quiz_batch(
+    request: BatchGenerateRequest,
+    generator: QuizGenerator = Depends(get_quiz_generator),
+    scraper: WikipediaScraper = Depends(get_scraper),
+):
+    """
+    Generate quizzes for a list of Wikipedia URLs with bounded concurrency.
+    Streams newline-delimited JSON: one line per submitted URL as soon as its quiz is
+    ready ({"index", "url", "status": "cached"|"generated", "quiz"} or
+    {"index", "url", "status": "error", "status_code", "detail"}), then a final
+    {"summary": {...}} line.
+    """
+    concurrency = request.concurrency or get_settings().BATCH_CONCURRENCY
+    return StreamingResponse(
+        _batch_lines(request.urls, scraper, generator, concurrency),
+        media_type="application/x-ndjson",
     )
-    db.add(wiki_quiz)
-    db.flush()  # Get wiki_quiz.id
-    
-    for q in generated.get("quiz", []):
-        question = QuizQuestion(
-            wiki_quiz_id=wiki_quiz.id,
-            question=q["question"],
-            options=q["options"],
-            answer=q["answer"],
-            difficulty=q.get("difficulty", "medium"),
-            explanation=q.get("explanation"),
-            section=q.get("section"),
-            sort_order=q.get("sort_order", 0),
+
+
+async def _batch_lines(urls: list[str], scraper: WikipediaScraper, generator: QuizGenerator, concurrency: int):
+    counts = Counter({"cached": 0, "generated": 0, "error": 0})
+    async for result in generate_batch(urls, scraper, generator, concurrency):
+        if result.error is None:
+            status = "cached" if result.cached else "generated"
+            async with AsyncSessionLocal() as db:
+                body = (await _encoded_quiz(db, result.quiz_id)).body
+        for i in result.indexes:
+            if result.error is not None:
+                counts["error"] += 1
+                yield json.dumps({
+                    "index": i,
+                    "url": urls[i],
+                    "status": "error",
+                    "status_code": result.error.status_code,
+                    "detail": result.error.detail,
+                }).encode() + b"\n"
+            else:
+                counts[status] += 1
+                # Splice the cached encoded quiz in without re-serializing it
+                head = json.dumps({"index": i, "url": urls[i], "status": status})[:-1].encode()
+                yield head + b', "quiz": ' + body + b"}\n"
+    yield json.dumps({"summary": {"total": len(urls), **counts}}).encode() + b"\n"
+
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def submit_generation_job(
+    request: GenerateQuizRequest,
+    db: AsyncSession = Depends(get_async_db),
+    scraper: WikipediaScraper = Depends(get_scraper),
+):
+    """
+    Queue quiz generation and return the job right away.
+    Poll GET /api/jobs/{id} or subscribe to GET /api/jobs/{id}/events; once the job has
+    succeeded, its quiz_id is readable from GET /api/quizzes/{quiz_id}.
+    """
+    try:
+        job = await submit_job(db, request.url, scraper)
+    except GenerationError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    return JobResponse.model_validate(job)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_generation_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Current status of a generation job."""
+    job = await get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse.model_validate(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_generation_job(job_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Server-sent events: a "status" event on every job change, ending once it succeeds or
+    fails (or with an "error" event if the job disappears).
+    """
+    job = await get_job(db, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(_job_events(job_id), media_type="text/event-stream")
+
+
+async def _job_events(job_id: int):
+    poll = get_settings().JOB_POLL_SECONDS
+    last = None
+    while True:
+        async with AsyncSessionLocal() as db:
+            row = await get_job(db, job_id)
+            if row is None:  # deleted while streaming
+                yield _sse_event("error", json.dumps({"status_code": 404, "detail": "Job not found"}))
+                return
+            job = JobResponse.model_validate(row)
+        data = job.model_dump_json()
+        if data != last:
+            yield _sse_event("status", data)
+            last = data
+        if job.status in FINISHED_STATUSES:
+            return
+        await wait_for_change(poll)
+
+
+@router.get("/quizzes", response_model=list[WikiQuizListResponse])
+async def list_quizzes(
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    List past quizzes (history), newest first, one page at a time.
+    Pass the X-Next-Cursor response header back as ?cursor= to get the next page.
+    """
+    stmt = (
+        select(WikiQuiz.id, WikiQuiz.url, WikiQuiz.title, WikiQuiz.created_at, WikiQuiz.question_count)
+        .order_by(WikiQuiz.created_at.desc(), WikiQuiz.id.desc())
+        .limit(limit + 1)
+    )
+    if cursor:
+        try:
+            created_at, last_id = _decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # Compare against the stored text form so SQLite's CURRENT_TIMESTAMP values match exactly
+        created = literal(created_at, String)
+        stmt = stmt.where(
+            or_(WikiQuiz.created_at < created, and_(WikiQuiz.created_at == created, WikiQuiz.id < last_id))
         )
-        db.add(question)
+    results = (await db.execute(stmt)).all()
     
-    db.commit()
-    db.refresh(wiki_quiz)
+    if len(results) > limit:
+        results = results[:limit]
+        response.headers["X-Next-Cursor"] = _encode_cursor(results[-1].created_at, results[-1].id)
     
-    return _wiki_quiz_to_response(wiki_quiz)
+    return [
+        WikiQuizListResponse(
+            id=r.id,
+            url=r.url,
+            title=r.title,
+            created_at=r.created_at,
+            question_count=r.question_count or 0,
+        )
+        for r in results
+    ]
 
 
-@router.get("/quizzes", response_model=list[WikiQuizListResponse])
-def list_quizzes(db: Session = Depends(get_db)):
-    """List all past quizzes (history)."""
-    results = (
-        db.query(WikiQuiz.id, WikiQuiz.url, WikiQuiz.title, WikiQuiz.created_at)
-        .order_by(WikiQuiz.created_at.desc())
-        .all()
-    )
+@router.get("/quizzes/search", response_model=list[WikiQuizListResponse])
+async def search_quiz_history(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Full-text search over quiz titles, summaries, related topics and questions, best match
+    first (the last word matches as a prefix; on SQLite the newest SEARCH_RANK_WINDOW matches
+    come first, then older ones). Pages like /quizzes: X-Next-Cursor -> ?cursor=.
+    """
+    try:
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    results = await search_quizzes(db, q, limit + 1, after)
     
-    # Get question counts
-    counts = (
-        db.query(QuizQuestion.wiki_quiz_id, func.count(QuizQuestion.id))
-        .group_by(QuizQuestion.wiki_quiz_id)
-        .all()
-    )
-    count_map = {wid: c for wid, c in counts}
+    if len(results) > limit:
+        results = results[:limit]
+        last = results[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(SearchCursor(last.tier, last.score, last.id, last.floor))
     
     return [
         WikiQuizListResponse(
@@ -150,24 +329,81 @@ def list_quizzes(db: Session = Depends(get_db)):
             url=r.url,
             title=r.title,
             created_at=r.created_at,
-            question_count=count_map.get(r.id, 0),
+            question_count=r.question_count or 0,
         )
         for r in results
     ]
 
 
+def _encode_cursor(created_at: datetime, quiz_id: int) -> str:
+    stamp = created_at.strftime("%Y-%m-%d %H:%M:%S")
+    if created_at.microsecond:
+        stamp += f".{created_at.microsecond:06d}"
+    return base64.urlsafe_b64encode(f"{stamp}|{quiz_id}".encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        stamp, quiz_id = raw.rsplit("|", 1)
+        datetime.fromisoformat(stamp)  # validate
+        return stamp, int(quiz_id)
+    except (UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+
+
 @router.get("/quizzes/{quiz_id}", response_model=WikiQuizResponse)
-def get_quiz_details(quiz_id: int, db: Session = Depends(get_db)):
-    """Get full quiz details by ID (for Details modal)."""
-    wiki_quiz = db.query(WikiQuiz).filter(WikiQuiz.id == quiz_id).first()
-    if not wiki_quiz:
+async def get_quiz_details(
+    quiz_id: int,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Get full quiz details by ID (for Details modal). Supports ETag / If-None-Match."""
+    return await _quiz_detail_response(db, quiz_id, if_none_match)
+
+
+async def _quiz_detail_response(db: AsyncSession, quiz_id: int, if_none_match: Optional[str] = None) -> Response:
+    return (await _encoded_quiz(db, quiz_id)).to_response(if_none_match)
+
+
+async def _encoded_quiz(db: AsyncSession, quiz_id: int) -> CachedResponse:
+    """Encoded quiz from the response cache, loading and encoding it once on a miss."""
+    cache = get_response_cache()
+    cached = cache.get(quiz_id)
+    metrics.cache_result("response", "hit" if cached is not None else "miss")
+    if cached is None:
+        wiki_quiz = await _load_wiki_quiz(db, WikiQuiz.id == quiz_id)
+        if not wiki_quiz:
+            raise HTTPException(status_code=404, detail="Quiz not found")
+        with metrics.stage("serialize"):
+            body = _wiki_quiz_to_response(wiki_quiz).model_dump_json().encode("utf-8")
+        cached = cache.put(quiz_id, body)
+    return cached
+
+
+@router.get("/quizzes/{quiz_id}/raw_html")
+async def get_quiz_raw_html(quiz_id: int, db: AsyncSession = Depends(get_async_db)):
+    """Stored raw HTML of the source article (loaded and decompressed only on request)."""
+    blob_hash = (await db.execute(select(WikiQuiz.raw_html_hash).where(WikiQuiz.id == quiz_id))).first()
+    if blob_hash is None:
         raise HTTPException(status_code=404, detail="Quiz not found")
-    return _wiki_quiz_to_response(wiki_quiz)
+    html = await load_html(db, blob_hash[0])
+    if html is None:
+        raise HTTPException(status_code=404, detail="No raw HTML stored for this quiz")
+    return Response(content=html, media_type="text/html; charset=utf-8")
+
+
+async def _load_wiki_quiz(db: AsyncSession, criterion) -> WikiQuiz | None:
+    """
+    Load a WikiQuiz and its questions in one joined query.
+    Questions come back ordered by sort_order via ix_quiz_questions_quiz_sort.
+    """
+    stmt = select(WikiQuiz).options(joinedload(WikiQuiz.questions)).where(criterion)
+    return (await db.execute(stmt)).unique().scalars().first()
 
 
 def _wiki_quiz_to_response(wiki_quiz: WikiQuiz) -> WikiQuizResponse:
-    """Convert WikiQuiz model to response schema."""
-    questions = sorted(wiki_quiz.questions, key=lambda q: q.sort_order)
+    """Convert WikiQuiz model to response schema (questions are already in sort_order)."""
     return WikiQuizResponse(
         id=wiki_quiz.id,
         url=wiki_quiz.url,
@@ -187,7 +423,7 @@ def _wiki_quiz_to_response(wiki_quiz: WikiQuiz) -> WikiQuizResponse:
                 "section": q.section,
                 "sort_order": q.sort_order,
             }
-            for q in questions
+            for q in wiki_quiz.questions
         ],
         created_at=wiki_quiz.created_at,
     )
@@ -5,4 +5,6 @@ from .wiki_quiz import (
     WikiQuizResponse,
     WikiQuizListResponse,
     GenerateQuizRequest,
+    BatchGenerateRequest,
+    JobResponse,
 )
@@ -1,7 +1,7 @@
 """Pydantic schemas for API request/response validation."""
 from datetime import datetime
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class QuizQuestionBase(BaseModel):
@@ -67,3 +67,23 @@ class WikiQuizListResponse(BaseModel):
 
 class GenerateQuizRequest(BaseModel):
     url: str  # Wikipedia URL
+
+
+class BatchGenerateRequest(BaseModel):
+    urls: list[str] = Field(..., min_length=1, max_length=500)  # Wikipedia URLs
+    concurrency: Optional[int] = Field(None, ge=1, le=32)  # default: BATCH_CONCURRENCY
+
+
+class JobResponse(BaseModel):
+    id: int
+    url: str
+    status: str  # queued, running, succeeded, failed
+    attempts: int
+    quiz_id: Optional[int] = None
+    error_status_code: Optional[int] = None
+    error_detail: Optional[str] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,83 @@
+"""
+Compressed, content-addressed blob storage for raw article HTML.
+Blobs are keyed by the sha256 of the uncompressed text, so identical pages are stored
+once. zstd is used when the zstandard package is installed, zlib otherwise; the codec
+is recorded per blob so both can be read back.
+"""
+import hashlib
+import zlib
+from typing import Optional
+
+from sqlalchemy import select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models import HtmlBlob
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+
+def _codec() -> str:
+    codec = get_settings().BLOB_CODEC
+    if codec == "auto":
+        return "zstd" if zstandard is not None else "zlib"
+    return codec
+
+
+def compress(text: str) -> tuple[str, bytes]:
+    """Return (codec, compressed bytes) for text."""
+    raw = text.encode("utf-8")
+    codec = _codec()
+    if codec == "zstd":
+        return codec, zstandard.ZstdCompressor(level=10).compress(raw)
+    return "zlib", zlib.compress(raw, 9)
+
+
+def decompress(codec: str, data: bytes) -> str:
+    if codec == "zstd":
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data).decode("utf-8")
+    return zlib.decompress(data).decode("utf-8")
+
+
+def blob_values(text: str) -> dict:
+    """Column values for an HtmlBlob row holding text."""
+    codec, data = compress(text)
+    return {
+        "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "codec": codec,
+        "size": len(text.encode("utf-8")),
+        "data": data,
+    }
+
+
+async def store_html(db: AsyncSession, html: Optional[str]) -> Optional[str]:
+    """Store html (deduplicated) in the current transaction and return its hash."""
+    if not html:
+        return None
+    values = blob_values(html)
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite":
+        stmt = sqlite.insert(HtmlBlob).values(**values).on_conflict_do_nothing()
+    elif dialect == "mysql":
+        stmt = mysql.insert(HtmlBlob).values(**values).prefix_with("IGNORE")
+    else:
+        exists = await db.execute(select(HtmlBlob.sha256).where(HtmlBlob.sha256 == values["sha256"]))
+        if exists.scalar():
+            return values["sha256"]
+        stmt = HtmlBlob.__table__.insert().values(**values)
+    await db.execute(stmt)
+    return values["sha256"]
+
+
+async def load_html(db: AsyncSession, sha256: Optional[str]) -> Optional[str]:
+    """Fetch and decompress a stored blob."""
+    if not sha256:
+        return None
+    row = (await db.execute(select(HtmlBlob.codec, HtmlBlob.data).where(HtmlBlob.sha256 == sha256))).first()
+    return decompress(row.codec, row.data) if row else None
@@ -0,0 +1,50 @@
+"""
+Canonical article keys for Wikipedia URLs.
+Different spellings of the same article (http/https, www/en/mobile hosts, fragments,
+?oldid=, percent-encoding, underscores vs spaces) all map to one key like "en:Alan_Turing".
+Redirects (/wiki/AI -> /wiki/Artificial_intelligence) are resolved after the first fetch
+and recorded in the article_aliases table.
+"""
+import re
+from typing import Optional
+from urllib.parse import quote, unquote, urlparse
+
+_WS = re.compile(r"[\s_]+")
+# Hosts that serve (or redirect to) English Wikipedia
+_DEFAULT_LANG_HOSTS = {"wikipedia.org", "www.wikipedia.org"}
+# Characters Wikipedia leaves unescaped in article paths
+_TITLE_SAFE_CHARS = ":/()_,-.'!*;@"
+
+
+def _wiki_lang(netloc: str) -> Optional[str]:
+    host = netloc.lower().split("@")[-1].split(":")[0].rstrip(".")
+    if not host.endswith("wikipedia.org"):
+        return None
+    if host in _DEFAULT_LANG_HOSTS:
+        return "en"
+    # en.wikipedia.org, en.m.wikipedia.org
+    return host.split(".")[0]
+
+
+def normalize_title(raw_title: str) -> str:
+    """MediaWiki title normalization: decode, underscores -> spaces, collapse, capitalize first letter."""
+    title = _WS.sub(" ", unquote(raw_title)).strip()
+    return title[:1].upper() + title[1:]
+
+
+def canonical_key_from_url(url: str) -> Optional[str]:
+    """Return "lang:Title_With_Underscores" for a Wikipedia article URL, or None if not one."""
+    parsed = urlparse((url or "").strip())
+    if parsed.scheme.lower() not in ("http", "https") or not parsed.path.startswith("/wiki/"):
+        return None
+    lang = _wiki_lang(parsed.netloc)
+    title = normalize_title(parsed.path[len("/wiki/"):])
+    if not lang or not title:
+        return None
+    return f"{lang}:{title.replace(' ', '_')}"
+
+
+def article_url(key: str) -> str:
+    """Canonical https URL for an article key."""
+    lang, _, title = key.partition(":")
+    return f"https://{lang}.wikipedia.org/wiki/{quote(title, safe=_TITLE_SAFE_CHARS)}"
@@ -0,0 +1,81 @@
+"""
+Application-scoped services, created once by main.lifespan and shared by every request:
+the pooled HTTP clients (requests.Session for the sync scraper paths, the shared
+httpx.AsyncClient for the async ones), one WikipediaScraper, one QuizGenerator (its LLM
+clients and compiled prompt chains), the background job workers and the related-topic
+prefetcher.
+Routers reach them through the get_* dependencies below.
+"""
+import logging
+from typing import Optional
+
+import requests
+from fastapi import Request
+from requests.adapters import HTTPAdapter
+
+from ..config import get_settings
+from .jobs import JobWorkerPool
+from .prefetch import Prefetcher
+from .quiz_generator import QuizGenerator
+from .scraper import DEFAULT_USER_AGENT, WikipediaScraper, close_async_client, get_async_client
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceContainer:
+    """Long-lived clients for the app's lifetime; close() releases them all."""
+
+    def __init__(self):
+        settings = get_settings()
+        self.http_session = requests.Session()
+        self.http_session.headers.update({"User-Agent": DEFAULT_USER_AGENT})
+        adapter = HTTPAdapter(
+            pool_connections=4, pool_maxsize=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS
+        )
+        self.http_session.mount("https://", adapter)
+        self.http_session.mount("http://", adapter)
+        self.http_client = get_async_client()
+        self.scraper = WikipediaScraper(async_client=self.http_client, session=self.http_session)
+
+        # A configuration error (e.g. REQUIRE_GROQ_API_KEY without a key) is reported per
+        # request, as before, instead of preventing startup
+        self.generator: Optional[QuizGenerator] = None
+        self.generator_error: Optional[str] = None
+        try:
+            self.generator = QuizGenerator()
+        except ValueError as e:
+            logger.error("Quiz generator unavailable: %s", e)
+            self.generator_error = str(e)
+
+        self.job_pool = JobWorkerPool(settings.JOB_WORKERS, self.scraper, self.get_generator)
+        self.prefetcher = (
+            Prefetcher(self.scraper, self.get_generator) if settings.PREFETCH_ENABLED else None
+        )
+
+    def get_generator(self) -> QuizGenerator:
+        if self.generator is None:
+            raise ValueError(self.generator_error or "Quiz generator unavailable")
+        return self.generator
+
+    def start(self) -> None:
+        self.job_pool.start()
+        if self.prefetcher is not None:
+            self.prefetcher.start()
+
+    async def close(self) -> None:
+        """Stop background workers first (they use the clients), then close every connection pool."""
+        if self.prefetcher is not None:
+            await self.prefetcher.stop()
+        await self.job_pool.stop()
+        if self.generator is not None:
+            await self.generator.aclose()
+        self.http_session.close()
+        await close_async_client()
+
+
+def get_services(request: Request) -> ServiceContainer:
+    return request.app.state.services
+
+
+def get_scraper(request: Request) -> WikipediaScraper:
+    return get_services(request).scraper
@@ -0,0 +1,134 @@
+"""
+Token-budget content selection between the scraper and QuizGenerator.
+Instead of cutting the article text at a fixed character count, paragraphs are scored
+by information density (TF-IDF relevance to the title and section headings, plus how
+rare their vocabulary is within the article) and the best ones are packed, whole,
+into a token budget. The selection is emitted in article order under its section
+headings, so the prompt keeps the same "## Section" shape as before.
+Token counts are a characters/4 estimate unless a tiktoken encoding is configured
+(TOKENIZER_ENCODING) and available.
+"""
+import logging
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Callable
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+_STOPWORDS = frozenset(
+    "the a an and or but of in on at to for from by with as is was are were be been has have had "
+    "it its this that these those which who whom whose their his her they he she we not also than "
+    "then there into after before during over under about between such other more most some can "
+    "could would may might will one two all any each".split()
+)
+
+
+@dataclass
+class PackedContent:
+    text: str
+    tokens: int  # tokens of the packed text
+    source_tokens: int  # tokens of the whole article text
+    paragraphs: int  # paragraphs selected
+    source_paragraphs: int
+
+
+@lru_cache
+def get_token_counter(encoding: str = "") -> Callable[[str], int]:
+    """
+    tiktoken-backed counter for a named encoding, or the chars/4 estimate when none is
+    configured or tiktoken/the encoding is unavailable (no network access is attempted
+    unless an encoding is named).
+    """
+    if encoding and tiktoken is not None:
+        try:
+            enc = tiktoken.get_encoding(encoding)
+            return lambda text: len(enc.encode(text, disallowed_special=()))
+        except Exception as e:  # encoding files are downloaded on first use
+            logger.warning("tiktoken encoding %s unavailable (%s); estimating tokens", encoding, e)
+    return estimate_tokens
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+def _terms(text: str) -> list[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if len(w) > 2 and w not in _STOPWORDS]
+
+
+def pack_content(
+    title: str,
+    section_content: dict[str, str],
+    budget_tokens: int,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> PackedContent:
+    """Select the most informative whole paragraphs of the article that fit budget_tokens."""
+    paragraphs = [
+        (section, paragraph)
+        for section, text in section_content.items()
+        for paragraph in text.split("\n")
+        if paragraph.strip()
+    ]
+    if not paragraphs:
+        return PackedContent("", 0, 0, 0, 0)
+
+    terms = [_terms(p) for _, p in paragraphs]
+    df = Counter(t for ts in terms for t in set(ts))
+    n = len(paragraphs)
+    idf = {t: math.log((n + 1) / (d + 1)) + 1 for t, d in df.items()}
+
+    # Query: title words count double, section headings once
+    query = Counter()
+    for t in _terms(title):
+        query[t] += 2
+    for section in section_content:
+        for t in _terms(section):
+            query[t] += 1
+
+    relevance, density = [], []
+    for ts in terms:
+        if not ts:
+            relevance.append(0.0)
+            density.append(0.0)
+            continue
+        tf = Counter(ts)
+        relevance.append(sum(w * tf[t] * idf.get(t, 0) for t, w in query.items()) / len(ts))
+        density.append(sum(idf[t] for t in tf) / len(ts))
+    max_rel = max(relevance) or 1.0
+    max_den = max(density) or 1.0
+    scores = [0.6 * r / max_rel + 0.4 * d / max_den for r, d in zip(relevance, density)]
+    scores[0] += 1.0  # the lead paragraph defines the topic: always first choice
+
+    costs = [count_tokens(p) + 1 for _, p in paragraphs]
+    header_costs = {s: count_tokens(f"## {s}\n") for s in section_content}
+    selected, used, sections_used = set(), 0, set()
+    for i in sorted(range(n), key=lambda i: scores[i], reverse=True):
+        section = paragraphs[i][0]
+        cost = costs[i] + (0 if section in sections_used else header_costs[section])
+        if used + cost > budget_tokens:
+            continue
+        selected.add(i)
+        sections_used.add(section)
+        used += cost
+
+    blocks: dict[str, list[str]] = {}
+    for i in sorted(selected):
+        section, paragraph = paragraphs[i]
+        blocks.setdefault(section, []).append(paragraph)
+    text = "\n\n".join(f"## {section}\n" + "\n".join(ps) for section, ps in blocks.items())
+    return PackedContent(
+        text=text,
+        tokens=count_tokens(text),
+        source_tokens=sum(costs),
+        paragraphs=len(selected),
+        source_paragraphs=n,
+    )
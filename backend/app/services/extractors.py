@@ -0,0 +1,299 @@
+"""
+HTML extraction engines for WikipediaScraper.parse_html.
+Every engine returns the same dict (title, summary, sections, content, section_content,
+raw_html, key_entities, canonical_url):
+- "bs4": BeautifulSoup + html.parser, the original multi-pass implementation.
+- "lxml": one iterwalk pass over a libxml2-parsed tree (C parser, no decompose passes).
+Select with HTML_EXTRACTOR=auto|lxml|bs4 ("auto" uses lxml when it is installed).
+"""
+from typing import Optional
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree
+    import lxml.html
+except ImportError:  # optional dependency
+    etree = None
+
+# Removed before extraction: boilerplate tags and CSS classes
+SKIP_TAGS = ("script", "style", "nav", "footer")
+SKIP_CLASSES = frozenset(("navbox", "infobox", "metadata", "noprint"))
+CONTENT_TAGS = ("h2", "h3", "p", "ul", "li")
+MAX_CONTENT_ELEMENTS = 120  # legacy single-prompt `content` only; section_content is uncapped
+MAX_CONTENT_CHARS = 5000
+IGNORED_SECTIONS = ("Contents", "See also", "References", "External links")
+
+
+def build_result(title: str, elements: list[tuple[str, str]], html: str, canonical_url: Optional[str]) -> dict:
+    """
+    Shared tail of every engine: turn the ordered (tag, text) content elements into
+    sections / content / summary. For h2/h3 the text is the headline.
+    `content` keeps the original single-prompt shape (first MAX_CONTENT_ELEMENTS elements,
+    MAX_CONTENT_CHARS); `section_content` maps every section of the whole article, in
+    order, to its paragraphs joined by newlines (used by map-reduce generation).
+    """
+    sections = []
+    section_content = {}
+    current_section = "Introduction"
+    current_text = []
+    
+    for tag, text in elements[:MAX_CONTENT_ELEMENTS]:
+        if tag in ("h2", "h3"):
+            if current_text:
+                section_content[current_section] = " ".join(current_text)
+            current_section = text
+            if current_section and current_section not in IGNORED_SECTIONS:
+                sections.append(current_section)
+            current_text = []
+        elif tag in ("p", "li"):
+            if text and len(text) > 20:
+                current_text.append(text)
+    
+    if current_text:
+        section_content[current_section] = " ".join(current_text)
+    
+    # Build full content (truncate for LLM context)
+    full_content = "\n\n".join(
+        f"## {sec}\n{section_content.get(sec, '')}"
+        for sec in ["Introduction"] + [s for s in sections if s != "Introduction"]
+        if section_content.get(sec)
+    )
+    
+    # Summary: first few paragraphs
+    intro = section_content.get("Introduction", "")
+    summary = intro[:800] + "..." if len(intro) > 800 else intro
+    
+    return {
+        "title": title,
+        "summary": summary,
+        "sections": sections[:10],
+        "content": full_content[:MAX_CONTENT_CHARS],
+        "section_content": _all_section_content(elements),
+        "raw_html": html[:30000] if html else None,
+        "key_entities": None,
+        "canonical_url": canonical_url,
+    }
+
+
+def _all_section_content(elements: list[tuple[str, str]]) -> dict[str, str]:
+    """Every paragraph/list item of the article grouped by section, in document order."""
+    grouped: dict[str, list[str]] = {}
+    current_section = "Introduction"
+    for tag, text in elements:
+        if tag in ("h2", "h3"):
+            current_section = text
+        elif tag in ("p", "li") and text and len(text) > 20 and current_section not in IGNORED_SECTIONS:
+            grouped.setdefault(current_section, []).append(text)
+    return {section: "\n".join(texts) for section, texts in grouped.items()}
+
+
+class BeautifulSoupExtractor:
+    """Reference engine: html.parser tree, decompose passes, then find_all."""
+    
+    name = "bs4"
+    
+    def extract(self, html: str) -> dict:
+        soup = BeautifulSoup(html, "html.parser")
+        
+        # Remove unwanted elements
+        for tag in soup.find_all(list(SKIP_TAGS)):
+            tag.decompose()
+        for tag in soup.select(", ".join(f".{c}" for c in sorted(SKIP_CLASSES))):
+            tag.decompose()
+        
+        # Get title
+        title_elem = soup.find("h1", {"id": "firstHeading"}) or soup.find("h1")
+        title = title_elem.get_text(strip=True) if title_elem else "Unknown"
+        
+        # Canonical link (resolves redirects such as /wiki/AI -> /wiki/Artificial_intelligence)
+        canonical_elem = soup.find("link", rel="canonical")
+        canonical_url = canonical_elem.get("href") if canonical_elem else None
+        
+        # Get main content div
+        content_div = soup.find("div", {"id": "mw-content-text"}) or soup.find("div", {"class": "mw-parser-output"})
+        if not content_div:
+            raise ValueError("Could not find article content")
+        
+        elements = []
+        for elem in content_div.find_all(list(CONTENT_TAGS)):
+            if elem.name in ("h2", "h3"):
+                span = elem.find("span", {"class": "mw-headline"})
+                elements.append((elem.name, span.get_text(strip=True) if span else elem.get_text(strip=True)))
+            else:
+                elements.append((elem.name, elem.get_text(strip=True) if elem.name != "ul" else ""))
+        return build_result(title, elements, html, canonical_url)
+
+
+class _Text:
+    """Accumulates get_text(strip=True)-equivalent text for one open element."""
+    
+    __slots__ = ("parts",)
+    
+    def __init__(self):
+        self.parts: list[str] = []
+    
+    def add(self, s: Optional[str]) -> None:
+        if s:
+            s = s.strip()
+            if s:
+                self.parts.append(s)
+    
+    def value(self) -> str:
+        return "".join(self.parts)
+
+
+class LxmlExtractor:
+    """
+    Single-pass engine. One iterwalk over the lxml tree skips boilerplate subtrees,
+    finds the title/canonical link/content div and accumulates the text of every open
+    content element as it goes, so no element is visited twice.
+    """
+    
+    name = "lxml"
+    
+    def __init__(self):
+        if etree is None:
+            raise RuntimeError("lxml is not installed (pip install lxml)")
+    
+    @staticmethod
+    def _is_skipped(el) -> bool:
+        if el.tag in SKIP_TAGS:
+            return True
+        cls = el.get("class")
+        return bool(cls) and not SKIP_CLASSES.isdisjoint(cls.split())
+    
+    def extract(self, html: str) -> dict:
+        try:
+            root = lxml.html.document_fromstring(html)
+        except (etree.ParserError, ValueError):
+            raise ValueError("Could not find article content")
+        
+        heading_text = first_h1_text = canonical_url = None
+        seen_h1 = False
+        content_text_div = parser_output_div = None
+        # [tag, text] items in document order, for each content-div candidate
+        under_content_text: list[list] = []
+        under_parser_output: list[list] = []
+        
+        open_texts: list[_Text] = []  # text accumulators of currently open elements
+        closers = {}  # element -> callback(text) run at its end event
+        active_heading = None  # (h2/h3 element, item) awaiting a mw-headline span
+        in_content_text = in_parser_output = 0
+        
+        walker = etree.iterwalk(root, events=("start", "end", "comment", "pi"))
+        for event, el in walker:
+            if event in ("comment", "pi"):  # no text of their own, but the tail is content
+                for t in open_texts:
+                    t.add(el.tail)
+                continue
+            tag = el.tag
+            
+            if event == "start":
+                if self._is_skipped(el):
+                    walker.skip_subtree()
+                    closers[el] = None
+                    continue
+                
+                if tag == "div":
+                    if content_text_div is None and el.get("id") == "mw-content-text":
+                        content_text_div = el
+                        in_content_text += 1
+                    elif parser_output_div is None and "mw-parser-output" in (el.get("class") or "").split():
+                        parser_output_div = el
+                        in_parser_output += 1
+                elif tag == "h1" and (heading_text is None or not seen_h1):
+                    is_heading = heading_text is None and el.get("id") == "firstHeading"
+                    is_first = not seen_h1
+                    seen_h1 = True
+                    
+                    def _set_h1(text, is_heading=is_heading, is_first=is_first):
+                        nonlocal heading_text, first_h1_text
+                        if is_heading:
+                            heading_text = text
+                        if is_first:
+                            first_h1_text = text
+                    
+                    closers[el] = _set_h1
+                    open_texts.append(_Text())
+                elif tag == "link" and canonical_url is None and "canonical" in (el.get("rel") or "").split():
+                    canonical_url = el.get("href")
+                elif tag in CONTENT_TAGS and (in_content_text or in_parser_output):
+                    item = [tag, ""]
+                    if in_content_text:
+                        under_content_text.append(item)
+                    if in_parser_output:
+                        under_parser_output.append(item)
+                    if tag != "ul":
+                        if tag in ("h2", "h3") and active_heading is None:
+                            active_heading = (el, item)
+                        
+                        def _set_item(text, item=item, el=el):
+                            nonlocal active_heading
+                            if active_heading is not None and active_heading[0] is el:
+                                item[1] = text  # no mw-headline span: whole heading text
+                                active_heading = None
+                            elif item[0] in ("p", "li"):
+                                item[1] = text
+                        
+                        closers[el] = _set_item
+                        open_texts.append(_Text())
+                elif (
+                    tag == "span"
+                    and active_heading is not None
+                    and "mw-headline" in (el.get("class") or "").split()
+                ):
+                    heading_item = active_heading[1]
+                    active_heading = None
+                    
+                    def _set_headline(text, item=heading_item):
+                        item[1] = text
+                    
+                    closers[el] = _set_headline
+                    open_texts.append(_Text())
+                
+                for t in open_texts:
+                    t.add(el.text)
+            else:
+                if el in closers:
+                    callback = closers.pop(el)
+                    if callback is not None:
+                        callback(open_texts.pop().value())
+                if el is content_text_div:
+                    in_content_text -= 1
+                elif el is parser_output_div:
+                    in_parser_output -= 1
+                for t in open_texts:
+                    t.add(el.tail)
+        
+        if content_text_div is not None:
+            items = under_content_text
+        elif parser_output_div is not None:
+            items = under_parser_output
+        else:
+            raise ValueError("Could not find article content")
+        
+        if heading_text is not None:
+            title = heading_text
+        elif first_h1_text is not None:
+            title = first_h1_text
+        else:
+            title = "Unknown"
+        elements = [(tag, text) for tag, text in items]
+        return build_result(title, elements, html, canonical_url)
+
+
+EXTRACTORS = {
+    "bs4": BeautifulSoupExtractor,
+    "lxml": LxmlExtractor,
+}
+
+
+def get_extractor(name: str = "auto"):
+    """Instantiate an extraction engine by name ("auto" prefers lxml when installed)."""
+    if name == "auto":
+        name = "lxml" if etree is not None else "bs4"
+    try:
+        return EXTRACTORS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown HTML extractor: {name!r} (choose from {', '.join(EXTRACTORS)})")
@@ -0,0 +1,391 @@
+"""
+Quiz generation pipeline: cache lookup -> scrape -> LLM -> store.
+Concurrent requests for the same article share one generation (see single_flight.py).
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Optional
+
+import httpx
+import requests
+from groq import RateLimitError
+from sqlalchemy import or_, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..database import AsyncSessionLocal
+from ..models import ArticleAlias, WikiQuiz, QuizQuestion
+from . import metrics
+from .blob_store import store_html
+from .canonical import article_url, canonical_key_from_url
+from .content_packer import get_token_counter, pack_content
+from .llm_guard import CircuitOpenError, RateLimitedError
+from .quiz_generator import QuizGenerator
+from .scraper import WikipediaScraper
+from .search import index_quiz, search_document
+from .single_flight import SingleFlight, heartbeat, new_lease_owner, release_lease, renew_lease, try_acquire_lease
+
+logger = logging.getLogger(__name__)
+
+FETCH_ERRORS = (requests.exceptions.RequestException, httpx.HTTPError)
+
+_flights = SingleFlight()
+
+# Called with (article_key, related_topics) after a new quiz is stored (the prefetcher)
+_store_listeners: list[Callable[[str, list[str]], None]] = []
+
+
+class GenerationError(Exception):
+    """Pipeline failure carrying the HTTP status the API should answer with."""
+    
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+async def find_quiz_id(db: AsyncSession, article_key: str) -> Optional[int]:
+    """Return the id of the stored quiz for an article key, if any."""
+    return (await db.execute(select(WikiQuiz.id).where(WikiQuiz.article_key == article_key))).scalar()
+
+
+async def resolve_alias(db: AsyncSession, article_key: str) -> str:
+    """Follow a recorded redirect (e.g. en:AI -> en:Artificial_intelligence) without network access."""
+    target = (
+        await db.execute(select(ArticleAlias.article_key).where(ArticleAlias.alias_key == article_key))
+    ).scalar()
+    return target or article_key
+
+
+async def record_alias(db: AsyncSession, alias_key: str, article_key: str) -> None:
+    await db.merge(ArticleAlias(alias_key=alias_key, article_key=article_key))
+    await db.commit()
+
+
+def add_store_listener(callback: Callable[[str, list[str]], None]) -> None:
+    _store_listeners.append(callback)
+
+
+def remove_store_listener(callback: Callable[[str, list[str]], None]) -> None:
+    if callback in _store_listeners:
+        _store_listeners.remove(callback)
+
+
+def _notify_stored(article_key: str, related_topics: list[str]) -> None:
+    for callback in list(_store_listeners):
+        try:
+            callback(article_key, related_topics)
+        except Exception:
+            logger.exception("Store listener failed for %s", article_key)
+
+
+async def get_or_generate_quiz(url: str, scraper: WikipediaScraper, generator: QuizGenerator) -> int:
+    """
+    Return the id of the stored quiz for url, generating it if needed.
+    URLs are reduced to a canonical article key first, so URL variants and known
+    redirects hit the cache. Callers racing on the same article (in this process
+    or in other workers) share one generation.
+    """
+    key = scraper.canonical_key(url)
+    if not key:
+        raise GenerationError(
+            400, "Invalid Wikipedia URL. Use format: https://en.wikipedia.org/wiki/Article_Name"
+        )
+    async with AsyncSessionLocal() as db:
+        key = await resolve_alias(db, key)
+        quiz_id = await find_quiz_id(db, key)
+    metrics.cache_result("quiz", "hit" if quiz_id else "miss")
+    if quiz_id:
+        return quiz_id
+    return await _flights.do(key, lambda: _generate_with_lease(key, scraper, generator))
+
+
+@dataclass
+class BatchResult:
+    """Outcome for one distinct article of a batch; indexes are its positions in the submitted list."""
+    
+    indexes: list[int]
+    article_key: Optional[str] = None
+    quiz_id: Optional[int] = None
+    cached: bool = False
+    error: Optional[GenerationError] = None
+
+
+async def generate_batch(
+    urls: list[str],
+    scraper: WikipediaScraper,
+    generator: QuizGenerator,
+    concurrency: int,
+) -> AsyncIterator[BatchResult]:
+    """
+    Get or generate quizzes for many URLs, yielding each result as soon as it is known.
+    Invalid URLs and already-stored articles come first (two bulk queries, no network);
+    the rest are scraped and generated with at most `concurrency` in flight, in completion
+    order. URLs that resolve to the same article share one generation.
+    """
+    by_key: dict[str, list[int]] = {}
+    for i, url in enumerate(urls):
+        key = scraper.canonical_key(url)
+        if key is None:
+            yield BatchResult([i], error=GenerationError(
+                400, "Invalid Wikipedia URL. Use format: https://en.wikipedia.org/wiki/Article_Name"
+            ))
+            continue
+        by_key.setdefault(key, []).append(i)
+    if not by_key:
+        return
+    
+    async with AsyncSessionLocal() as db:
+        aliases = dict((await db.execute(
+            select(ArticleAlias.alias_key, ArticleAlias.article_key).where(ArticleAlias.alias_key.in_(by_key))
+        )).all())
+        resolved: dict[str, list[int]] = {}
+        for key, indexes in by_key.items():
+            resolved.setdefault(aliases.get(key, key), []).extend(indexes)
+        existing = dict((await db.execute(
+            select(WikiQuiz.article_key, WikiQuiz.id).where(WikiQuiz.article_key.in_(resolved))
+        )).all())
+    
+    for key, indexes in resolved.items():
+        metrics.cache_result("quiz", "hit" if key in existing else "miss")
+        if key in existing:
+            yield BatchResult(sorted(indexes), key, existing[key], cached=True)
+    
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def run(key: str, indexes: list[int]) -> BatchResult:
+        async with semaphore:
+            try:
+                quiz_id = await _flights.do(key, lambda: _generate_with_lease(key, scraper, generator))
+            except GenerationError as e:
+                return BatchResult(indexes, key, error=e)
+            except Exception as e:
+                logger.exception("Batch generation failed for %s", key)
+                return BatchResult(indexes, key, error=GenerationError(500, f"Quiz generation failed: {e}"))
+            return BatchResult(indexes, key, quiz_id)
+    
+    tasks = [
+        asyncio.ensure_future(run(key, sorted(indexes)))
+        for key, indexes in resolved.items()
+        if key not in existing
+    ]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away: stop waiting (shared generations keep running for other callers)
+        for task in tasks:
+            task.cancel()
+
+
+async def stream_quiz_generation(
+    url: str, scraper: WikipediaScraper, generator: QuizGenerator
+) -> AsyncIterator[tuple[str, Any]]:
+    """
+    Like get_or_generate_quiz, but yields progress while this caller runs the generation:
+    ("article", {"title", "url"}) after the scrape, then the LLM's ("question", q),
+    ("key_entities", ...) and ("related_topics", ...) as they stream in, and finally
+    ("stored", quiz_id). A quiz that is already stored (or being generated by another
+    caller) yields only ("stored", quiz_id).
+    """
+    key = scraper.canonical_key(url)
+    if not key:
+        raise GenerationError(
+            400, "Invalid Wikipedia URL. Use format: https://en.wikipedia.org/wiki/Article_Name"
+        )
+    async with AsyncSessionLocal() as db:
+        key = await resolve_alias(db, key)
+        quiz_id = await find_quiz_id(db, key)
+    metrics.cache_result("quiz", "hit" if quiz_id else "miss")
+    if quiz_id:
+        yield "stored", quiz_id
+        return
+    
+    events: asyncio.Queue = asyncio.Queue()
+    flight = asyncio.ensure_future(
+        _flights.do(key, lambda: _generate_with_lease(key, scraper, generator, on_event=events.put_nowait))
+    )
+    try:
+        while not flight.done() or not events.empty():
+            next_event = asyncio.ensure_future(events.get())
+            await asyncio.wait({flight, next_event}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event.done():
+                yield next_event.result()
+            else:
+                next_event.cancel()
+        yield "stored", flight.result()
+    finally:
+        flight.cancel()  # only this caller's wait; the shared generation carries on
+
+
+async def _generate_with_lease(
+    key: str,
+    scraper: WikipediaScraper,
+    generator: QuizGenerator,
+    on_event: Optional[Callable[[tuple[str, Any]], None]] = None,
+) -> int:
+    settings = get_settings()
+    owner = new_lease_owner()
+    async with AsyncSessionLocal() as db:
+        # Wait until we hold the lease or another worker has stored the quiz
+        while True:
+            quiz_id = await find_quiz_id(db, key)
+            if quiz_id:
+                return quiz_id
+            if await try_acquire_lease(db, key, owner, settings.GENERATION_LEASE_SECONDS):
+                break
+            await asyncio.sleep(settings.GENERATION_LEASE_POLL_SECONDS)
+        
+        ttl = settings.GENERATION_LEASE_SECONDS
+        try:
+            # Renewed while we work: a slow generation (queued for LLM quota) keeps its lease
+            async with heartbeat(lambda: renew_lease(key, owner, ttl), ttl / 3, key):
+                # The previous lease holder may have finished between our check and acquire
+                quiz_id = await find_quiz_id(db, key)
+                if quiz_id:
+                    return quiz_id
+                # End the read transaction: don't pin a database snapshot during the scrape
+                await db.commit()
+                scraped = await _scrape(article_url(key), scraper)
+                tokens = await _pack_content(scraped)
+                if on_event:
+                    on_event(("article", {"title": scraped["title"], "url": scraped.get("canonical_url"), "tokens": tokens}))
+                
+                # Redirects: remember alias -> target so the next lookup skips the network
+                resolved_key = canonical_key_from_url(scraped.get("canonical_url") or "") or key
+                if resolved_key != key:
+                    await record_alias(db, key, resolved_key)
+                    quiz_id = await find_quiz_id(db, resolved_key)
+                    if quiz_id:
+                        return quiz_id
+                    await db.commit()  # end the read transaction before the LLM call
+                
+                generated = await _generate(scraped, generator, on_event)
+                with metrics.stage("db_write"):
+                    return await _store_quiz(db, resolved_key, scraped, generated)
+        finally:
+            await release_lease(db, key, owner)
+
+
+async def _scrape(url: str, scraper: WikipediaScraper) -> dict:
+    try:
+        return await scraper.afetch_and_parse(url)
+    except FETCH_ERRORS as e:
+        raise GenerationError(502, f"Failed to fetch URL: {str(e)}")
+    except ValueError as e:
+        raise GenerationError(400, str(e))
+
+
+async def _pack_content(scraped: dict) -> Optional[dict]:
+    """
+    Replace the scraped content with the best paragraphs of the whole article that fit
+    CONTENT_TOKEN_BUDGET. Returns the token counts. Map-reduce generations read
+    section_content instead, but whether one happens is only decided at generation time.
+    """
+    settings = get_settings()
+    section_content = scraped.get("section_content")
+    if settings.CONTENT_TOKEN_BUDGET <= 0 or not section_content:
+        return None
+    with metrics.stage("pack"):
+        packed = await asyncio.to_thread(
+            pack_content,
+            scraped["title"],
+            section_content,
+            settings.CONTENT_TOKEN_BUDGET,
+            get_token_counter(settings.TOKENIZER_ENCODING),
+        )
+    if not packed.text:
+        return None
+    scraped["content"] = packed.text
+    tokens = {
+        "content_tokens": packed.tokens,
+        "article_tokens": packed.source_tokens,
+        "paragraphs": packed.paragraphs,
+        "article_paragraphs": packed.source_paragraphs,
+        "budget": settings.CONTENT_TOKEN_BUDGET,
+    }
+    logger.info("Packed %r into the prompt: %s", scraped["title"], tokens)
+    return tokens
+
+
+async def _generate(
+    scraped: dict,
+    generator: QuizGenerator,
+    on_event: Optional[Callable[[tuple[str, Any]], None]] = None,
+) -> dict:
+    kwargs = dict(
+        title=scraped["title"],
+        sections=scraped.get("sections", []),
+        content=scraped["content"],
+        section_content=scraped.get("section_content"),
+    )
+    try:
+        if on_event is None:
+            return await generator.agenerate_quiz(**kwargs)
+        # Stream tokens so callers see each question as soon as the model finishes it
+        async for kind, value in generator.astream_quiz(**kwargs):
+            if kind == "result":
+                return value
+            on_event((kind, value))
+        raise ValueError("LLM stream ended without a result")
+    except CircuitOpenError:
+        raise GenerationError(503, "LLM temporarily unavailable after repeated failures. Try again shortly.")
+    except (RateLimitedError, RateLimitError) as e:
+        logger.warning("LLM rate limited: %s", e)
+        raise GenerationError(429, "Groq API rate limit reached. Try again in a minute.")
+    except Exception as e:
+        logger.exception("Quiz generation failed")
+        raise GenerationError(500, f"Quiz generation failed: {e}")
+
+
+async def _store_quiz(db: AsyncSession, article_key: str, scraped: dict, generated: dict) -> int:
+    """Persist the quiz; if another writer won the unique-article race, return theirs."""
+    url = article_url(article_key)
+    # Store in database (key_entities from LLM; fallback to scraped if available)
+    wiki_quiz = WikiQuiz(
+        url=url,
+        article_key=article_key,
+        title=scraped["title"],
+        summary=scraped.get("summary"),
+        raw_html_hash=await store_html(db, scraped.get("raw_html")),
+        key_entities=generated.get("key_entities") or scraped.get("key_entities"),
+        sections=scraped.get("sections"),
+        related_topics=generated.get("related_topics", []),
+        question_count=len(generated.get("quiz", [])),
+    )
+    db.add(wiki_quiz)
+    try:
+        await db.flush()  # Get wiki_quiz.id
+        for q in generated.get("quiz", []):
+            db.add(QuizQuestion(
+                wiki_quiz_id=wiki_quiz.id,
+                question=q["question"],
+                options=q["options"],
+                answer=q["answer"],
+                difficulty=q.get("difficulty", "medium"),
+                explanation=q.get("explanation"),
+                section=q.get("section"),
+                sort_order=q.get("sort_order", 0),
+            ))
+        await index_quiz(db, search_document(
+            wiki_quiz.id,
+            wiki_quiz.title,
+            wiki_quiz.summary,
+            wiki_quiz.related_topics,
+            (q["question"] for q in generated.get("quiz", [])),
+        ))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
+        quiz_id = (
+            await db.execute(
+                select(WikiQuiz.id).where(or_(WikiQuiz.article_key == article_key, WikiQuiz.url == url))
+            )
+        ).scalar()
+        if quiz_id is None:
+            raise
+        return quiz_id
+    _notify_stored(article_key, wiki_quiz.related_topics or [])
+    return wiki_quiz.id
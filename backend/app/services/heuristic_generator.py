@@ -0,0 +1,359 @@
+"""
+Offline heuristic quiz engine: QuizGenerator's mock mode (no API key) and its
+LLM_MOCK_FALLBACK tier, and bulk pre-generation during LLM outages.
+One linear pass over the whole article with precompiled patterns collects
+- question candidates: "X is/was Y" definitions, and cloze sentences whose blank is a
+  date, number, person, organization or place;
+- a typed distractor index of every such span, so a question's wrong options are the
+  same kind of thing as its answer (years near the answer year, numbers of the same
+  unit and magnitude, other people for a person, ...).
+generate_many() handles a batch of articles: the per-article passes can run in worker
+processes, and the batch's combined index backs up articles with too few distractors.
+"""
+import heapq
+import math
+import random
+import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable, Optional
+
+MONTHS = (
+    "January|February|March|April|May|June|July|August|September|October|November|December"
+)
+_MONTH_WORDS = frozenset(MONTHS.split("|"))
+_CAPITAL = r"[A-Z][a-z]+(?:-[A-Z][a-z]+)?"
+
+_HEADER_RE = re.compile(r"^## (.+)$", re.MULTILINE)
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_SPACE_RE = re.compile(r"\s+")
+_CITATION_RE = re.compile(r"\[\d+\]|\[citation needed\]")
+_FACT_RE = re.compile(r"^([A-Z][A-Za-z0-9 .'()-]{2,60}?)\s+(is|was|are|were)\s+(\S+ \S+ \S.{4,140}?)\.$")
+_DATE_RE = re.compile(rf"\b(?:\d{{1,2}} )?(?:{MONTHS})(?: \d{{1,2}},?)? \d{{4}}\b|\b(?:1[0-9]|20)\d{{2}}\b")
+_YEAR_RE = re.compile(r"\d{4}")
+_NUMBER_RE = re.compile(
+    r"(?<![\w.,])\d{1,3}(?:,\d{3})+(?:\.\d+)?(?:\s?(?:%|per cent|percent|million|billion|thousand))?"
+    r"|(?<![\w.,])\d+(?:\.\d+)?\s?(?:%|per cent|percent|million|billion|thousand|km|kilometres|"
+    r"kilometers|miles|metres|meters|kg|tonnes|people|species|years)\b"
+)
+_PLACE_RE = re.compile(
+    rf"\b(?:in|at|near|from|across|throughout|outside)\s+(?:the\s+)?({_CAPITAL}(?:\s+(?:of\s+)?{_CAPITAL}){{0,2}})(?!['\w])"
+)
+_NAME_RE = re.compile(rf"\b({_CAPITAL}(?:\s+[A-Z]\.)?(?:\s+{_CAPITAL}){{1,2}})\b")
+_ORG_WORDS = frozenset(
+    "University College Company Corporation Inc Party Society Institute Association Agency "
+    "Council Museum Bank Army Navy Church Academy Foundation Group League Ministry Committee "
+    "Commission Union Records Laboratory Laboratories School Service Office Department Railway "
+    "Railways Airlines".split()
+)
+_EVENT_WORDS = frozenset("War Wars Revolution Age Era Games Olympics Prize Award Act Treaty".split())
+_STOP_NAMES = frozenset("The A An In On At By For From This That It He She They His Her Its".split())
+
+ENTITY_TYPES = ("date", "number", "person", "organization", "place")
+INDEX_TYPES = ENTITY_TYPES + ("definition",)
+# Preferred blank per cloze sentence, and the difficulty of each kind of question
+_TYPE_PRIORITY = ("date", "number", "place", "organization", "person")
+_DIFFICULTY = {
+    "definition": "easy",
+    "place": "easy",
+    "person": "medium",
+    "organization": "medium",
+    "date": "hard",
+    "number": "hard",
+}
+
+
+@dataclass
+class Candidate:
+    kind: str  # "definition" or one of ENTITY_TYPES
+    question: str
+    answer: str
+    sentence: str
+    section: Optional[str]
+
+
+@dataclass
+class ArticleIndex:
+    """Everything one pass over an article produces (picklable, for worker processes)."""
+
+    title: str
+    sections: list[str]
+    candidates: list[Candidate] = field(default_factory=list)
+    # Distractor index: type -> span -> occurrences ("definition" holds the "is/was Y" objects)
+    entities: dict[str, Counter] = field(default_factory=lambda: {t: Counter() for t in INDEX_TYPES})
+
+
+def _clean(text: str) -> str:
+    return _SPACE_RE.sub(" ", _CITATION_RE.sub("", text)).strip()
+
+
+def _split_sections(sections: list, content: str) -> dict[Optional[str], str]:
+    """The single-prompt content ("## Section" blocks) back into per-section text."""
+    headers = list(_HEADER_RE.finditer(content or ""))
+    if not headers:
+        return {(sections[0] if sections else None): content or ""}
+    out = {}
+    for i, m in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        out[m.group(1).strip()] = content[m.end():end]
+    return out
+
+
+def _sentence_entities(sentence: str) -> list[tuple[str, str, int]]:
+    """(type, text, start) spans of one sentence; dates win over numbers, places over names."""
+    spans: list[tuple[str, str, int]] = []
+    taken: list[range] = []
+
+    def add(kind: str, text: str, start: int) -> None:
+        r = range(start, start + len(text))
+        if any(r.start < t.stop and t.start < r.stop for t in taken):
+            return
+        taken.append(r)
+        spans.append((kind, text, start))
+
+    for m in _DATE_RE.finditer(sentence):
+        add("date", m.group(), m.start())
+    for m in _NUMBER_RE.finditer(sentence):
+        add("number", m.group(), m.start())
+    for m in _PLACE_RE.finditer(sentence):
+        words = m.group(1).split()
+        if not _MONTH_WORDS.intersection(words) and words[-1] not in _EVENT_WORDS:
+            add("organization" if words[-1] in _ORG_WORDS else "place", m.group(1), m.start(1))
+    for m in _NAME_RE.finditer(sentence):
+        words = m.group(1).split()
+        if words[0] in _STOP_NAMES or _MONTH_WORDS.intersection(words) or words[-1] in _EVENT_WORDS:
+            continue
+        add("organization" if words[-1] in _ORG_WORDS else "person", m.group(1), m.start(1))
+    return spans
+
+
+def analyze_article(
+    title: str, sections: list, content: str, section_content: Optional[dict] = None
+) -> ArticleIndex:
+    """The single linear pass: question candidates and the typed entity index."""
+    index = ArticleIndex(title=title, sections=[s for s in (sections or []) if isinstance(s, str)])
+    by_section = section_content or _split_sections(index.sections, content)
+    title_words = set(title.lower().split())
+    seen: set[str] = set()
+    for section, text in by_section.items():
+        for sentence in _SENTENCE_RE.split(_clean(text)):
+            if not 40 <= len(sentence) <= 240 or sentence in seen:
+                continue
+            seen.add(sentence)
+            spans = _sentence_entities(sentence)
+            for kind, span, _ in spans:
+                index.entities[kind][span] += 1
+
+            fact = _FACT_RE.match(sentence)
+            if fact:
+                subject = re.sub(r"^(?:The|A|An) ", "", fact.group(1)).strip()
+                if len(subject) >= 3 and subject.lower() not in {"it", "this", "he", "she", "they"}:
+                    obj = fact.group(3).strip()
+                    index.entities["definition"][obj] += 1
+                    index.candidates.append(
+                        Candidate(
+                            "definition",
+                            f"According to the article, what {fact.group(2)} {subject}?",
+                            obj,
+                            sentence,
+                            section,
+                        )
+                    )
+                    continue
+
+            blanks = [s for s in spans if s[1].lower() not in title_words]
+            if not blanks:
+                continue
+            kind, span, start = min(blanks, key=lambda s: _TYPE_PRIORITY.index(s[0]))
+            cloze = f"{sentence[:start]}_____{sentence[start + len(span):]}"
+            index.candidates.append(
+                Candidate(kind, f"Fill in the blank: {cloze}", span, sentence, section)
+            )
+    return index
+
+
+def _analyze(args: tuple) -> ArticleIndex:
+    return analyze_article(*args)
+
+
+class HeuristicQuizEngine:
+    """Turns ArticleIndex passes into quizzes in the QuizGenerator result shape."""
+
+    def __init__(self, max_questions: int = 10):
+        self.max_questions = max_questions
+
+    def generate(
+        self, title: str, sections: list, content: str, section_content: Optional[dict] = None
+    ) -> dict:
+        return self.build_quiz(analyze_article(title, sections, content, section_content))
+
+    def generate_many(self, articles: Iterable[dict], workers: int = 0) -> list[dict]:
+        """
+        Quizzes for a batch of articles (dicts with title, sections, content and optionally
+        section_content). workers > 1 runs the article passes in that many processes.
+        """
+        jobs = [(a["title"], a.get("sections") or [], a.get("content", ""), a.get("section_content")) for a in articles]
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                indexes = list(pool.map(_analyze, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+        else:
+            indexes = [_analyze(job) for job in jobs]
+        shared = {t: Counter() for t in INDEX_TYPES}
+        for index in indexes:
+            for kind, counts in index.entities.items():
+                shared[kind].update(counts)
+        return [self.build_quiz(index, shared) for index in indexes]
+
+    def build_quiz(self, index: ArticleIndex, shared: Optional[dict[str, Counter]] = None) -> dict:
+        rng = random.Random(index.title)
+        quiz = []
+        per_kind = Counter()
+        max_per_kind = math.ceil(self.max_questions * 0.4)  # keep a mix of question kinds
+        for candidate in self._select(index.candidates):
+            if per_kind[candidate.kind] >= max_per_kind:
+                continue
+            distractors = self._distractors(candidate, index, shared, rng)
+            if len(distractors) < 3:
+                continue
+            per_kind[candidate.kind] += 1
+            options = [candidate.answer] + distractors
+            rng.shuffle(options)
+            quiz.append(
+                {
+                    "question": candidate.question,
+                    "options": options,
+                    "answer": candidate.answer,
+                    "difficulty": _DIFFICULTY[candidate.kind],
+                    "explanation": f'The article states: "{candidate.sentence}"',
+                    "section": candidate.section,
+                    "sort_order": len(quiz),
+                }
+            )
+            if len(quiz) >= self.max_questions:
+                break
+
+        # Too little to ask about: fall back to questions about the article's sections
+        for sec in index.sections[: max(0, 5 - len(quiz))]:
+            quiz.append(
+                {
+                    "question": f"Which of the following is a section listed in the article '{index.title}'?",
+                    "options": [sec, "Overview", "Appendix", "Bibliography"],
+                    "answer": sec,
+                    "difficulty": "easy",
+                    "explanation": "Section names are taken from the scraped article structure.",
+                    "section": sec,
+                    "sort_order": len(quiz),
+                }
+            )
+
+        return {
+            "quiz": quiz,
+            "related_topics": self._related_topics(index),
+            "key_entities": {
+                "people": self._top(index, "person", 8),
+                "organizations": self._top(index, "organization", 8),
+                "locations": self._top(index, "place", 8),
+            },
+        }
+
+    def _select(self, candidates: list[Candidate]) -> list[Candidate]:
+        """Round-robin over sections (article order) so the quiz covers the whole article;
+        a few extra candidates are kept in case some lack distractors."""
+        by_section: dict[Optional[str], list[Candidate]] = {}
+        for c in candidates:
+            by_section.setdefault(c.section, []).append(c)
+        queues = list(by_section.values())
+        picked, limit = [], self.max_questions * 3
+        while queues and len(picked) < limit:
+            for queue in queues:
+                picked.append(queue.pop(0))
+            queues = [q for q in queues if q]
+        return picked
+
+    def _distractors(
+        self, candidate: Candidate, index: ArticleIndex, shared: Optional[dict], rng: random.Random
+    ) -> list[str]:
+        answer = candidate.answer
+        seen = {answer.lower()}
+        picked: list[str] = []
+
+        def take(values: Iterable[str]) -> None:
+            for v in values:
+                if len(picked) >= 3:
+                    return
+                key = v.lower()
+                if key not in seen and key not in answer.lower() and answer.lower() not in key:
+                    seen.add(key)
+                    picked.append(v)
+
+        sources = [index.entities[candidate.kind]]
+        if shared is not None:
+            sources.append(shared[candidate.kind])
+        for counts in sources:
+            take(self._ranked(candidate.kind, answer, counts, rng))
+        if candidate.kind in ("date", "number") and len(picked) < 3:
+            take(_synthesize(candidate.kind, answer))
+        return picked
+
+    @staticmethod
+    def _ranked(kind: str, answer: str, counts: Counter, rng: random.Random) -> list[str]:
+        """A dozen candidates of the answer's type, most plausible first (linear in the index size)."""
+        if kind == "date":
+            year, shape = _year(answer), " " in answer
+            same_shape = (v for v in counts if (" " in v) == shape)
+            return heapq.nsmallest(12, same_shape, key=lambda v: (abs(_year(v) - year), v))
+        if kind == "number":
+            unit, magnitude = _unit(answer), _magnitude(answer)
+            same_unit = (v for v in counts if _unit(v) == unit)
+            return heapq.nsmallest(12, same_unit, key=lambda v: (abs(_magnitude(v) - magnitude), v))
+        if kind == "definition":
+            values = list(counts)
+            return rng.sample(values, min(12, len(values)))
+        top = [v for v, _ in counts.most_common(12)]
+        rng.shuffle(top)
+        return top
+
+    def _related_topics(self, index: ArticleIndex) -> list[str]:
+        topics = []
+        for t in index.sections[:3] + self._top(index, "person", 4) + self._top(index, "place", 4):
+            if t and t not in topics and t.lower() != index.title.lower():
+                topics.append(t)
+        return topics[:6]
+
+    @staticmethod
+    def _top(index: ArticleIndex, kind: str, n: int) -> list[str]:
+        return [v for v, _ in index.entities[kind].most_common(n)]
+
+
+def _year(date: str) -> int:
+    m = _YEAR_RE.search(date)
+    return int(m.group()) if m else 0
+
+
+def _unit(number: str) -> str:
+    return re.sub(r"^[\d,.\s]+", "", number)
+
+
+def _magnitude(number: str) -> float:
+    digits = re.match(r"[\d,]*\.?\d+", number)
+    value = float(digits.group().replace(",", "")) if digits else 0.0
+    return math.log10(value) if value > 0 else 0.0
+
+
+def _synthesize(kind: str, answer: str) -> list[str]:
+    """Plausible nearby values when the article has too few of its own."""
+    if kind == "date":
+        year = _year(answer)
+        return [answer.replace(str(year), str(year + d)) for d in (-7, 4, -15, 11)] if year else []
+    m = re.match(r"[\d,]*\.?\d+", answer)
+    if not m:
+        return []
+    raw = m.group()
+    value = float(raw.replace(",", ""))
+    out = []
+    for factor in (0.5, 2, 1.5, 3):
+        v = value * factor
+        text = f"{v:,.0f}" if "," in raw else (f"{v:g}" if "." in raw else str(round(v)))
+        out.append(text + answer[len(raw):])
+    return out
@@ -0,0 +1,251 @@
+"""
+Background generation jobs backed by the generation_jobs table.
+- submit_job: records a job (or reuses an equivalent one) and returns immediately.
+- JobWorkerPool: worker tasks that claim due jobs, run the normal generation pipeline
+  and retry transient failures with jittered exponential backoff.
+Claims are a conditional UPDATE with a lease, renewed while the job runs, so several
+processes can share the queue and a job held by a crashed process is picked up again
+once its lease expires.
+"""
+import asyncio
+import logging
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+import httpx
+import requests
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..database import AsyncSessionLocal
+from ..models import GenerationJob
+from .generation import GenerationError, find_quiz_id, get_or_generate_quiz, resolve_alias
+from .quiz_generator import QuizGenerator
+from .scraper import WikipediaScraper
+from .single_flight import heartbeat, new_lease_owner
+
+logger = logging.getLogger(__name__)
+
+ACTIVE_STATUSES = ("queued", "running")
+FINISHED_STATUSES = ("succeeded", "failed")
+
+# Client errors are final; everything else (rate limits, fetch/LLM/DB failures) is retried
+_PERMANENT_STATUS_CODES = {400, 404, 422}
+
+_changed = asyncio.Event()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _notify() -> None:
+    """Wake everyone waiting for a job change in this process."""
+    global _changed
+    event, _changed = _changed, asyncio.Event()
+    event.set()
+
+
+async def wait_for_change(timeout: float) -> None:
+    """Sleep until a job changes in this process, or timeout (changes made by other processes)."""
+    try:
+        await asyncio.wait_for(_changed.wait(), timeout)
+    except asyncio.TimeoutError:
+        pass
+
+
+def _is_permanent(error: GenerationError) -> bool:
+    """Client errors, including Wikipedia answering 4xx (other than 429) for the article itself."""
+    if error.status_code in _PERMANENT_STATUS_CODES:
+        return True
+    cause = error.__context__
+    if isinstance(cause, (httpx.HTTPStatusError, requests.exceptions.HTTPError)) and cause.response is not None:
+        return 400 <= cause.response.status_code < 500 and cause.response.status_code != 429
+    return False
+
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with jitter (between half and all of the cap) after `attempts` tries."""
+    settings = get_settings()
+    cap = min(settings.JOB_RETRY_MAX_SECONDS, settings.JOB_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(cap / 2, cap)
+
+
+async def submit_job(db: AsyncSession, url: str, scraper: WikipediaScraper) -> GenerationJob:
+    """
+    Queue generation of url. An article that already has a quiz gets a job that is
+    succeeded on creation; an article with a queued/running job reuses that job.
+    """
+    key = scraper.canonical_key(url)
+    if not key:
+        raise GenerationError(
+            400, "Invalid Wikipedia URL. Use format: https://en.wikipedia.org/wiki/Article_Name"
+        )
+    key = await resolve_alias(db, key)
+    
+    active = (await db.execute(
+        select(GenerationJob)
+        .where(GenerationJob.article_key == key, GenerationJob.status.in_(ACTIVE_STATUSES))
+        .order_by(GenerationJob.id)
+        .limit(1)
+    )).scalar()
+    if active is not None:
+        return active
+    
+    job = GenerationJob(url=url, article_key=key, status="queued", attempts=0, run_after=_utcnow())
+    quiz_id = await find_quiz_id(db, key)
+    if quiz_id:
+        job.status = "succeeded"
+        job.quiz_id = quiz_id
+    db.add(job)
+    await db.commit()
+    _notify()
+    return job
+
+
+async def get_job(db: AsyncSession, job_id: int) -> Optional[GenerationJob]:
+    return await db.get(GenerationJob, job_id, populate_existing=True)
+
+
+def _claimable(now: datetime):
+    return or_(
+        and_(GenerationJob.status == "queued", GenerationJob.run_after <= now),
+        and_(GenerationJob.status == "running", GenerationJob.locked_until < now),
+    )
+
+
+async def claim_next_job(db: AsyncSession, owner: str) -> Optional[GenerationJob]:
+    """Lock the oldest due job for owner, or return None when nothing is due."""
+    settings = get_settings()
+    while True:
+        now = _utcnow()
+        job_id = (await db.execute(
+            select(GenerationJob.id).where(_claimable(now)).order_by(GenerationJob.run_after, GenerationJob.id).limit(1)
+        )).scalar()
+        if job_id is None:
+            await db.commit()
+            return None
+        # Conditional update: only one worker (in any process) wins the row
+        result = await db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, _claimable(now))
+            .values(
+                status="running",
+                attempts=GenerationJob.attempts + 1,
+                locked_by=owner,
+                locked_until=now + timedelta(seconds=settings.JOB_LEASE_SECONDS),
+            )
+        )
+        await db.commit()
+        if result.rowcount == 1:
+            _notify()
+            return await get_job(db, job_id)
+
+
+async def renew_job_lease(job_id: int, owner: str) -> bool:
+    """Extend owner's claim on a running job. False if the lease was lost."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.locked_by == owner)
+            .values(locked_until=_utcnow() + timedelta(seconds=get_settings().JOB_LEASE_SECONDS))
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+async def _finish(job_id: int, owner: str, **values) -> None:
+    """Write a job outcome if owner still holds it (a lost lease means another worker took over)."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(
+            update(GenerationJob)
+            .where(GenerationJob.id == job_id, GenerationJob.locked_by == owner)
+            .values(locked_by=None, locked_until=None, **values)
+        )
+        await db.commit()
+    _notify()
+
+
+class JobWorkerPool:
+    """Worker tasks draining the job table; started and stopped with the app (ServiceContainer)."""
+    
+    def __init__(self, workers: int, scraper: WikipediaScraper, get_generator: Callable[[], QuizGenerator]):
+        self.workers = workers
+        self.scraper = scraper
+        self.get_generator = get_generator
+        self._tasks: list[asyncio.Task] = []
+    
+    def start(self) -> None:
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._work(), name=f"job-worker-{i}"))
+    
+    async def stop(self) -> None:
+        """Cancel workers; their in-progress jobs go back to the queue for the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+    
+    def _get_generator(self) -> QuizGenerator:
+        try:
+            return self.get_generator()
+        except ValueError as e:
+            raise GenerationError(500, str(e))
+    
+    async def _work(self) -> None:
+        poll = get_settings().JOB_POLL_SECONDS
+        while True:
+            try:
+                owner = new_lease_owner()
+                async with AsyncSessionLocal() as db:
+                    job = await claim_next_job(db, owner)
+                if job is None:
+                    await wait_for_change(poll)
+                    continue
+                lease = get_settings().JOB_LEASE_SECONDS
+                try:
+                    async with heartbeat(lambda: renew_job_lease(job.id, owner), lease / 3, f"job {job.id}"):
+                        await self._run(job, owner)
+                except asyncio.CancelledError:
+                    # Shutting down: release now rather than waiting out the lease, and give
+                    # back the attempt the claim counted (the job did not fail)
+                    await _finish(
+                        job.id, owner,
+                        status="queued", run_after=_utcnow(), attempts=GenerationJob.attempts - 1,
+                    )
+                    raise
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job worker error")
+                await asyncio.sleep(poll)
+    
+    async def _run(self, job: GenerationJob, owner: str) -> None:
+        settings = get_settings()
+        try:
+            quiz_id = await get_or_generate_quiz(job.url, self.scraper, self._get_generator())
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e if isinstance(e, GenerationError) else GenerationError(500, f"Quiz generation failed: {e}")
+            if _is_permanent(error) or job.attempts >= settings.JOB_MAX_ATTEMPTS:
+                logger.warning("Job %s failed after %s attempt(s): %s", job.id, job.attempts, error.detail)
+                await _finish(
+                    job.id, owner,
+                    status="failed", error_status_code=error.status_code, error_detail=error.detail,
+                )
+            else:
+                delay = retry_delay(job.attempts)
+                logger.info("Job %s attempt %s failed (%s); retrying in %.1fs", job.id, job.attempts, error.detail, delay)
+                await _finish(
+                    job.id, owner,
+                    status="queued", run_after=_utcnow() + timedelta(seconds=delay),
+                    error_status_code=error.status_code, error_detail=error.detail,
+                )
+            return
+        await _finish(
+            job.id, owner,
+            status="succeeded", quiz_id=quiz_id, error_status_code=None, error_detail=None,
+        )
@@ -0,0 +1,145 @@
+"""
+Incremental JSON parsing for streamed LLM output.
+Feed text chunks as they arrive; every top-level member of the response object is
+reported as soon as its value closes, and members named in item_keys (arrays) are
+reported element by element instead, so e.g. each quiz question is usable before
+the model has finished writing the rest.
+"""
+import json
+from typing import Any, NamedTuple, Optional
+
+
+class JsonEvent(NamedTuple):
+    key: str  # top-level member name
+    index: Optional[int]  # element index for item_keys arrays, None for a whole member
+    value: Any
+
+
+class JsonStreamParser:
+    """
+    Single-pass scanner over the accumulated text (only new characters are scanned on
+    each feed). Text before the first "{" (markdown fences, chatter) and after the
+    closing "}" is ignored. Malformed members are skipped rather than raising; the
+    caller still parses the full text at the end.
+    """
+
+    def __init__(self, item_keys: tuple[str, ...] = ()):
+        self.item_keys = set(item_keys)
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self.done = False
+        # depth 1: reading the top-level object
+        self._phase = "key"  # key -> colon -> value -> (after value) key ...
+        self._key: Optional[str] = None
+        self._key_start: Optional[int] = None
+        self._value_start: Optional[int] = None
+        # depth 2: elements of an item_keys array
+        self._item_start: Optional[int] = None
+        self._item_index = 0
+
+    def feed(self, chunk: str) -> list[JsonEvent]:
+        """Add text and return the members/items completed by it."""
+        events: list[JsonEvent] = []
+        self._text += chunk
+        text = self._text
+        for i in range(self._pos, len(text)):
+            if self.done:
+                break
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._token_end(i + 1, events)
+                continue
+            if self._depth == 0:
+                if c == "{":
+                    self._depth = 1
+                continue
+            if c in " \t\r\n":
+                continue
+
+            if c in ",}]":
+                # Scalars (numbers, true/false/null) end at the next separator
+                self._scalar_end(i, events)
+                if c == ",":
+                    if self._depth == 1:
+                        self._phase = "key"
+                    continue
+                self._depth -= 1
+                if self._depth == 0:
+                    self.done = True
+                else:
+                    self._token_end(i + 1, events)
+                continue
+            if c == ":":
+                if self._depth == 1 and self._phase == "colon":
+                    self._phase = "value"
+                continue
+
+            self._token_start(i, c)
+            if c == '"':
+                self._in_string = True
+            elif c in "{[":
+                self._depth += 1
+        self._pos = len(text)
+        return events
+
+    def _in_item_array(self) -> bool:
+        return self._value_start is not None and self._key in self.item_keys
+
+    def _token_start(self, i: int, c: str) -> None:
+        if self._depth == 1:
+            if self._phase == "key" and c == '"':
+                self._key_start = i
+            elif self._phase == "value":
+                self._value_start = i
+                self._phase = "in_value"
+                self._item_index = 0
+        elif self._depth == 2 and self._in_item_array() and self._item_start is None:
+            self._item_start = i
+
+    def _token_end(self, end: int, events: list[JsonEvent]) -> None:
+        """A string or container just closed, leaving us at self._depth."""
+        if self._depth == 1:
+            if self._phase == "key" and self._key_start is not None:
+                self._key = self._loads(self._key_start, end)
+                self._key_start = None
+                self._phase = "colon"
+            elif self._phase == "in_value":
+                self._member_end(end, events)
+        elif self._depth == 2 and self._item_start is not None and self._in_item_array():
+            self._item_end(end, events)
+
+    def _scalar_end(self, end: int, events: list[JsonEvent]) -> None:
+        if self._depth == 1 and self._phase == "in_value":
+            self._member_end(end, events)
+        elif self._depth == 2 and self._item_start is not None and self._in_item_array():
+            self._item_end(end, events)
+
+    def _member_end(self, end: int, events: list[JsonEvent]) -> None:
+        if self._key is not None and self._key not in self.item_keys:
+            value = self._loads(self._value_start, end)
+            if value is not None:
+                events.append(JsonEvent(self._key, None, value))
+        self._value_start = None
+        self._phase = "after"
+
+    def _item_end(self, end: int, events: list[JsonEvent]) -> None:
+        value = self._loads(self._item_start, end)
+        if value is not None:
+            events.append(JsonEvent(self._key, self._item_index, value))
+        self._item_index += 1
+        self._item_start = None
+
+    def _loads(self, start: int, end: int) -> Any:
+        try:
+            return json.loads(self._text[start:end])
+        except ValueError:
+            return None
@@ -0,0 +1,91 @@
+"""
+Persistent memoization of parsed LLM quiz results.
+Entries are keyed by a hash of the fully rendered prompt plus the configured model list,
+temperature and prompt fingerprint, so identical article content (redirects, URL
+variants, re-scrapes after a quiz was deleted) is answered without calling the model
+again. The key names every configured backend rather than the one that answered: with
+failover, a fallback model's result is reused like the primary's, and changing the
+backend list starts a fresh cache. Stored with SQLiteLRUStore like the page cache,
+bounded by age and total size (LRU). Rows written under a different prompt
+template/version are purged when the cache opens.
+"""
+import hashlib
+import json
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from ..config import get_settings
+from ..prompts.quiz_prompts import PROMPT_VERSION, QUIZ_GENERATION_PROMPT, SECTION_QUIZ_PROMPT
+from . import metrics
+from .sqlite_store import SQLiteLRUStore
+
+
+def prompt_fingerprint(
+    template: str = QUIZ_GENERATION_PROMPT + SECTION_QUIZ_PROMPT, version: str = PROMPT_VERSION
+) -> str:
+    """Changes whenever the prompt text or its declared version changes."""
+    return hashlib.sha256(f"{version}\0{template}".encode("utf-8")).hexdigest()[:16]
+
+
+def llm_cache_key(rendered_prompt: str, models: str, temperature: float, fingerprint: str) -> str:
+    payload = json.dumps([fingerprint, models, temperature, rendered_prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    """Size- and age-bounded on-disk cache of parsed generation results."""
+    
+    def __init__(
+        self,
+        directory: str | Path,
+        ttl_seconds: float = 30 * 24 * 3600,
+        max_bytes: int = 64 * 1024 * 1024,
+        fingerprint: Optional[str] = None,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.fingerprint = fingerprint or prompt_fingerprint()
+        # Rows of another prompt fingerprint can never be hit again: the store drops them
+        self._store = SQLiteLRUStore(Path(directory) / "llm.sqlite3", "results", max_bytes, version=self.fingerprint)
+        self._store.delete_older_than(time.time() - ttl_seconds)
+    
+    def key(self, rendered_prompt: str, models: str, temperature: float) -> str:
+        return llm_cache_key(rendered_prompt, models, temperature, self.fingerprint)
+    
+    def get(self, key: str) -> Optional[dict]:
+        """Return the stored result if present and younger than the TTL."""
+        entry = self._store.get(key)
+        if entry is None:
+            metrics.cache_result("llm", "miss")
+            return None
+        if time.time() - entry.created_at >= self.ttl_seconds:
+            self._store.delete(key)
+            metrics.cache_result("llm", "expired")
+            return None
+        metrics.cache_result("llm", "hit")
+        return json.loads(entry.body)
+    
+    def put(self, key: str, result: dict) -> None:
+        """Store a parsed result (least-recently-used entries go once over the size bound)."""
+        self._store.put(key, json.dumps(result, ensure_ascii=False).encode("utf-8"))
+    
+    def total_bytes(self) -> int:
+        return self._store.total_bytes()
+    
+    def close(self) -> None:
+        self._store.close()
+
+
+@lru_cache
+def get_llm_cache() -> Optional[LLMCache]:
+    """Shared LLM result cache configured from Settings (None when disabled)."""
+    settings = get_settings()
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMCache(
+        settings.LLM_CACHE_DIR,
+        ttl_seconds=settings.LLM_CACHE_TTL_SECONDS,
+        max_bytes=settings.LLM_CACHE_MAX_MB * 1024 * 1024,
+    )
@@ -0,0 +1,372 @@
+"""
+Client-side protection for LLM calls (wraps QuizGenerator.llm).
+- CircuitBreaker: after repeated failures, calls fail fast for a cool-down period, then
+  one trial call decides whether to close it again. Each logical call counts once, and
+  only when it fails with a transient error after its retries.
+- RateLimiter: requests-per-minute and tokens-per-minute token buckets. Callers reserve
+  capacity up front and wait their turn, so bursts are spread out instead of throttled;
+  reservations of failed or cancelled attempts are handed back.
+- Retries: transient failures (429, 5xx, timeouts, connection errors) are retried with
+  jittered exponential backoff, honouring Retry-After.
+Limiter and breaker state is per process and shared by every QuizGenerator.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+import httpx
+from groq import APIConnectionError, APIStatusError
+from langchain_core.runnables import Runnable, RunnableConfig
+
+from ..config import get_settings
+from . import metrics
+from .content_packer import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """The breaker is open: the LLM has been failing and calls are not attempted."""
+
+
+class RateLimitedError(RuntimeError):
+    """Waiting for quota would take longer than LLM_MAX_QUEUE_SECONDS."""
+
+
+class TokenBucket:
+    """Refills `per_minute` units per minute up to one minute's worth; reservations may go into debt."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self._level = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` now; returns seconds to wait until the reservation is covered."""
+        with self._lock:
+            self._refill()
+            self._level -= min(amount, self.capacity)
+            return 0.0 if self._level >= 0 else -self._level / self.rate
+
+    def credit(self, amount: float) -> None:
+        """Give back (or, when negative, additionally take) capacity."""
+        with self._lock:
+            self._refill()
+            self._level = min(self.capacity, self._level + amount)
+
+    def fraction_available(self) -> float:
+        """Share of the bucket currently unspent (0 while in debt)."""
+        with self._lock:
+            self._refill()
+            return max(0.0, self._level) / self.capacity
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._level = min(self.capacity, self._level + (now - self._updated) * self.rate)
+        self._updated = now
+
+
+class RateLimiter:
+    """RPM + TPM quotas (0 disables either). Reservations queue callers in arrival order."""
+
+    def __init__(self, rpm: int, tpm: int, max_wait_seconds: float):
+        self.requests = TokenBucket(rpm) if rpm > 0 else None
+        self.tokens = TokenBucket(tpm) if tpm > 0 else None
+        self.max_wait_seconds = max_wait_seconds
+
+    def reserve(self, tokens: int) -> float:
+        delays = []
+        if self.requests:
+            delays.append(self.requests.reserve(1))
+        if self.tokens:
+            delays.append(self.tokens.reserve(tokens))
+        delay = max(delays, default=0.0)
+        if delay > self.max_wait_seconds:
+            self.release(tokens)
+            raise RateLimitedError(f"LLM quota exhausted: next slot in {delay:.0f}s")
+        return delay
+
+    def release(self, tokens: int) -> None:
+        """Undo a reservation that was never used."""
+        if self.requests:
+            self.requests.credit(1)
+        if self.tokens:
+            self.tokens.credit(tokens)
+
+    def headroom(self) -> float:
+        """Share of the tighter quota left right now (1.0 when unlimited)."""
+        buckets = [b for b in (self.requests, self.tokens) if b is not None]
+        return min((b.fraction_available() for b in buckets), default=1.0)
+
+    def settle(self, reserved: int, actual: Optional[int]) -> None:
+        """Correct the token bucket once the provider reports real usage."""
+        if self.tokens and actual is not None:
+            self.tokens.credit(reserved - actual)
+
+
+class CircuitBreaker:
+    """closed -> (failure_threshold consecutive failures) -> open -> (reset_seconds) -> half-open."""
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at < self.reset_seconds:
+            return "open"
+        return "half_open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if calls are blocked; True if this call is the half-open trial."""
+        if self.failure_threshold <= 0:
+            return False
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half_open" and self._trial_running):
+                raise CircuitOpenError("LLM circuit breaker is open after repeated failures")
+            if state == "half_open":
+                self._trial_running = True
+                return True
+            return False
+
+    def abandon_trial(self) -> None:
+        """The trial call was cancelled before it could decide: allow another one."""
+        with self._lock:
+            self._trial_running = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold > 0:
+                if self._opened_at is None:
+                    logger.warning("LLM circuit breaker opened after %d failures", self._failures)
+                self._opened_at = time.monotonic()
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Worth retrying: throttling, server errors, timeouts and dropped connections."""
+    if isinstance(exc, APIStatusError):
+        return exc.status_code in (408, 409, 429) or exc.status_code >= 500
+    return isinstance(exc, (APIConnectionError, httpx.TransportError, asyncio.TimeoutError, ConnectionError))
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+@lru_cache
+def get_rate_limiter(name: str = "groq", rpm: Optional[int] = None, tpm: Optional[int] = None) -> RateLimiter:
+    """Shared limiter per backend name; quotas default to GROQ_RPM / GROQ_TPM."""
+    settings = get_settings()
+    return RateLimiter(
+        settings.GROQ_RPM if rpm is None else rpm,
+        settings.GROQ_TPM if tpm is None else tpm,
+        settings.LLM_MAX_QUEUE_SECONDS,
+    )
+
+
+@lru_cache
+def get_circuit_breaker(name: str = "groq") -> CircuitBreaker:
+    settings = get_settings()
+    return CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS)
+
+
+class GuardedLLM(Runnable):
+    """
+    Runnable wrapper for a chat model: breaker check -> wait for quota -> call, retrying
+    transient errors. Drop-in for the model in `prompt | llm | parser` chains
+    (invoke / ainvoke / astream; batch/abatch fan out over these).
+    A stream is only retried while it has produced no output.
+    """
+
+    def __init__(
+        self,
+        llm: Runnable,
+        limiter: RateLimiter,
+        breaker: CircuitBreaker,
+        count_tokens: Callable[[str], int] = estimate_tokens,
+        name: str = "groq",
+    ):
+        settings = get_settings()
+        self.name = name
+        self.llm = llm
+        self.limiter = limiter
+        self.breaker = breaker
+        self.count_tokens = count_tokens
+        self.attempts = max(1, settings.LLM_RETRY_ATTEMPTS)
+        self.backoff_base = settings.LLM_RETRY_BASE_SECONDS
+        self.backoff_max = settings.LLM_RETRY_MAX_SECONDS
+        self.output_tokens = settings.LLM_OUTPUT_TOKENS_ESTIMATE
+
+    def _estimate(self, input: Any) -> int:
+        text = input.to_string() if hasattr(input, "to_string") else str(input)
+        return self.count_tokens(text) + self.output_tokens
+
+    def _backoff(self, attempt: int, exc: BaseException) -> float:
+        delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return max(retry_after(exc) or 0.0, random.uniform(delay / 2, delay))
+
+    def _should_retry(self, attempt: int, exc: BaseException) -> bool:
+        return is_transient(exc) and attempt + 1 < self.attempts
+
+    @staticmethod
+    def _usage(message: Any) -> Optional[int]:
+        usage = getattr(message, "usage_metadata", None)
+        return usage.get("total_tokens") if usage else None
+
+    def _failed(self, trial: bool, exc: BaseException) -> None:
+        """
+        One logical call failed (after its retries). Only transient errors say the backend
+        is unhealthy; a rejected request (400, auth, validation), a quota wait that would
+        be too long or a cancellation is no verdict on it.
+        """
+        if isinstance(exc, Exception) and is_transient(exc):
+            self.breaker.record_failure()
+        elif trial:
+            self.breaker.abandon_trial()
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        estimate = self._estimate(input)
+        trial = self.breaker.before_call()
+        try:
+            for attempt in range(self.attempts):
+                try:
+                    with _Reservation(self.limiter, estimate) as slot:
+                        time.sleep(slot.delay)
+                        slot.sent = True
+                        result = self.llm.invoke(input, config, **kwargs)
+                        slot.settle(self._usage(result))
+                except RateLimitedError:
+                    raise
+                except Exception as e:
+                    metrics.llm_error(self.name, e)
+                    if not self._should_retry(attempt, e):
+                        raise
+                    time.sleep(self._backoff(attempt, e))
+                    continue
+                metrics.llm_usage(self.name, result)
+                break
+        except BaseException as e:
+            self._failed(trial, e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        estimate = self._estimate(input)
+        trial = self.breaker.before_call()
+        try:
+            for attempt in range(self.attempts):
+                try:
+                    with _Reservation(self.limiter, estimate) as slot:
+                        await asyncio.sleep(slot.delay)
+                        slot.sent = True
+                        result = await self.llm.ainvoke(input, config, **kwargs)
+                        slot.settle(self._usage(result))
+                except RateLimitedError:
+                    raise
+                except Exception as e:
+                    metrics.llm_error(self.name, e)
+                    if not self._should_retry(attempt, e):
+                        raise
+                    logger.info("LLM call failed (%s); retry %d/%d", e, attempt + 1, self.attempts - 1)
+                    await asyncio.sleep(self._backoff(attempt, e))
+                    continue
+                metrics.llm_usage(self.name, result)
+                break
+        except BaseException as e:  # including cancellation (e.g. a losing hedge)
+            self._failed(trial, e)
+            raise
+        self.breaker.record_success()
+        return result
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield self.invoke(input, config, **kwargs)
+
+    async def astream(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        estimate = self._estimate(input)
+        trial = self.breaker.before_call()
+        try:
+            for attempt in range(self.attempts):
+                usage = None
+                try:
+                    with _Reservation(self.limiter, estimate) as slot:
+                        await asyncio.sleep(slot.delay)
+                        slot.sent = True
+                        async for chunk in self.llm.astream(input, config, **kwargs):
+                            slot.streamed = True
+                            usage = self._usage(chunk) or usage
+                            metrics.llm_usage(self.name, chunk)
+                            yield chunk
+                        slot.settle(usage)
+                except RateLimitedError:
+                    raise
+                except Exception as e:
+                    metrics.llm_error(self.name, e)
+                    if slot.streamed or not self._should_retry(attempt, e):
+                        raise
+                    logger.info("LLM stream failed (%s); retry %d/%d", e, attempt + 1, self.attempts - 1)
+                    await asyncio.sleep(self._backoff(attempt, e))
+                    continue
+                break
+        except BaseException as e:  # including the consumer closing the stream
+            self._failed(trial, e)
+            raise
+        self.breaker.record_success()
+
+
+class _Reservation:
+    """
+    One attempt's share of the quota. Settled with real usage on success; if the attempt
+    fails or is cancelled it is handed back: entirely while still queued, only the
+    tokens once the request was sent (it still counts against RPM), nothing once a
+    stream has produced output.
+    """
+
+    def __init__(self, limiter: RateLimiter, tokens: int):
+        self.limiter = limiter
+        self.tokens = tokens
+        self.delay = limiter.reserve(tokens)  # RateLimitedError: nothing was reserved
+        self.sent = False
+        self.streamed = False
+
+    def __enter__(self) -> "_Reservation":
+        return self
+
+    def __exit__(self, exc_type: Any, *exc_info: Any) -> None:
+        if exc_type is None or self.streamed:
+            return
+        if self.sent:
+            self.limiter.settle(self.tokens, 0)
+        else:
+            self.limiter.release(self.tokens)
+
+    def settle(self, actual: Optional[int]) -> None:
+        self.limiter.settle(self.tokens, actual)
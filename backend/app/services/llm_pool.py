@@ -0,0 +1,254 @@
+"""
+Pool of LLM backends behind one Runnable (QuizGenerator.llm).
+Backends come from LLM_BACKENDS (default: the single Groq model from GROQ_*). Each is
+wrapped in its own GuardedLLM, so it has its own quota and circuit breaker, and they
+are tried in the configured order:
+- failover: an error or an invalid response from one backend starts the next one;
+- hedging: a call still running after its backend's observed p95 latency is duplicated
+  on the next backend; the first valid response wins and the others are cancelled.
+Backends whose breaker is open are skipped. Streams fail over before their first chunk
+but are not hedged.
+"""
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_groq import ChatGroq
+
+try:
+    from langchain_openai import ChatOpenAI
+except ImportError:  # optional: only needed for "provider": "openai" backends
+    ChatOpenAI = None
+
+from ..config import Settings, get_settings
+from .content_packer import estimate_tokens
+from .llm_guard import CircuitOpenError, GuardedLLM, get_circuit_breaker, get_rate_limiter
+
+logger = logging.getLogger(__name__)
+
+# Observed latencies needed before a backend's p95 replaces LLM_HEDGE_INITIAL_SECONDS
+MIN_LATENCY_SAMPLES = 5
+
+
+class InvalidResponseError(ValueError):
+    """A backend answered, but not with a usable quiz."""
+
+
+class LatencyTracker:
+    """Rolling window of a backend's successful call latencies."""
+
+    def __init__(self, window: int):
+        self._samples: deque[float] = deque(maxlen=max(window, MIN_LATENCY_SAMPLES))
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < MIN_LATENCY_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class Backend:
+    name: str
+    model: str
+    llm: GuardedLLM
+    latency: LatencyTracker
+
+    @property
+    def available(self) -> bool:
+        return self.llm.breaker.state != "open"
+
+
+def backend_specs(settings: Settings) -> list[dict]:
+    """LLM_BACKENDS parsed, or the single Groq backend described by GROQ_*."""
+    if not settings.LLM_BACKENDS.strip():
+        return [{"name": "groq", "model": settings.GROQ_MODEL}]
+    specs = json.loads(settings.LLM_BACKENDS)
+    if not isinstance(specs, list) or not all(isinstance(s, dict) and s.get("model") for s in specs):
+        raise ValueError('LLM_BACKENDS must be a JSON list of {"model": ...} objects')
+    return specs
+
+
+def build_backends(
+    settings: Settings,
+    temperature: float,
+    count_tokens: Callable[[str], int] = estimate_tokens,
+) -> list[Backend]:
+    """One guarded chat model per configured backend; backends without an API key are skipped."""
+    backends = []
+    for i, spec in enumerate(backend_specs(settings)):
+        provider = spec.get("provider", "groq")
+        name = spec.get("name") or f"{provider}-{i}"
+        api_key = spec.get("api_key") or (settings.GROQ_API_KEY if provider == "groq" else "")
+        if not api_key:
+            if settings.LLM_BACKENDS.strip():
+                logger.warning("LLM backend %s has no API key; skipping it", name)
+            continue
+        if provider == "groq":
+            chat_model = ChatGroq(
+                model=spec["model"],
+                api_key=api_key,
+                base_url=spec.get("base_url", settings.GROQ_BASE_URL) or None,
+                temperature=temperature,
+                max_retries=0,  # retries, quotas and the circuit breaker live in GuardedLLM
+            )
+        elif provider == "openai":
+            if ChatOpenAI is None:
+                raise ValueError(f"LLM backend {name} needs langchain-openai installed")
+            chat_model = ChatOpenAI(
+                model=spec["model"],
+                api_key=api_key,
+                base_url=spec.get("base_url") or None,
+                temperature=temperature,
+                max_retries=0,
+            )
+        else:
+            raise ValueError(f"LLM backend {name}: unknown provider {provider!r}")
+        guarded = GuardedLLM(
+            chat_model,
+            limiter=get_rate_limiter(name, spec.get("rpm"), spec.get("tpm")),
+            breaker=get_circuit_breaker(name),
+            count_tokens=count_tokens,
+            name=name,
+        )
+        backends.append(Backend(name, spec["model"], guarded, LatencyTracker(settings.LLM_LATENCY_WINDOW)))
+    return backends
+
+
+class LLMPool(Runnable):
+    """
+    Runnable over several backends (drop-in for the model in `prompt | llm | parser`).
+    `validate` decides whether a response counts as an answer; rejected responses fail over
+    like errors. When every backend fails, the last error is raised.
+    """
+
+    def __init__(self, backends: list[Backend], validate: Optional[Callable[[Any], bool]] = None):
+        settings = get_settings()
+        if not backends:
+            raise ValueError("LLMPool needs at least one backend")
+        self.backends = backends
+        self.validate = validate
+        self.hedge = settings.LLM_HEDGE_ENABLED
+        self.initial_hedge_seconds = settings.LLM_HEDGE_INITIAL_SECONDS
+        self.min_hedge_seconds = settings.LLM_HEDGE_MIN_SECONDS
+
+    async def aclose(self) -> None:
+        """Close every backend's HTTP clients (chat models keep a sync and an async one)."""
+        for backend in self.backends:
+            for attr in ("client", "async_client"):
+                client = getattr(getattr(backend.llm.llm, attr, None), "_client", None)
+                close = getattr(client, "close", None)
+                if close is None:
+                    continue
+                result = close()
+                if asyncio.iscoroutine(result):
+                    await result
+
+    def _candidates(self) -> list[Backend]:
+        available = [b for b in self.backends if b.available]
+        if not available:
+            raise CircuitOpenError("Every LLM backend's circuit breaker is open")
+        return available
+
+    def headroom(self) -> float:
+        """Quota share left on the best backend that is not circuit-broken (0 if none)."""
+        return max((b.llm.limiter.headroom() for b in self.backends if b.available), default=0.0)
+
+    def hedge_delay(self, backend: Backend) -> float:
+        """How long a call on `backend` may run before the next backend is asked too."""
+        p95 = backend.latency.percentile(0.95)
+        return max(self.min_hedge_seconds, self.initial_hedge_seconds if p95 is None else p95)
+
+    def _check(self, backend: Backend, result: Any, started: float) -> Any:
+        if self.validate is not None and not self.validate(result):
+            raise InvalidResponseError(f"LLM backend {backend.name} returned an invalid response")
+        backend.latency.record(time.perf_counter() - started)
+        return result
+
+    def invoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        """Sequential failover (no hedging on the blocking path)."""
+        error: Optional[Exception] = None
+        for backend in self._candidates():
+            started = time.perf_counter()
+            try:
+                return self._check(backend, backend.llm.invoke(input, config, **kwargs), started)
+            except Exception as e:
+                logger.warning("LLM backend %s failed: %s", backend.name, e)
+                error = e
+        raise error
+
+    async def _acall(self, backend: Backend, input: Any, config: Optional[RunnableConfig], kwargs: dict) -> Any:
+        started = time.perf_counter()
+        return self._check(backend, await backend.llm.ainvoke(input, config, **kwargs), started)
+
+    async def ainvoke(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        pending = deque(self._candidates())
+        running: dict[asyncio.Task, Backend] = {}
+        hedge_at: Optional[float] = None
+        error: Optional[Exception] = None
+
+        def launch() -> None:
+            nonlocal hedge_at
+            backend = pending.popleft()
+            running[asyncio.create_task(self._acall(backend, input, config, kwargs))] = backend
+            hedge_at = loop.time() + self.hedge_delay(backend) if self.hedge else None
+
+        launch()
+        try:
+            while running:
+                timeout = max(0.0, hedge_at - loop.time()) if pending and hedge_at is not None else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    slow = list(running.values())[-1]
+                    logger.info("LLM backend %s slower than its p95; hedging to %s", slow.name, pending[0].name)
+                    launch()
+                    continue
+                winner = None
+                for task in done:
+                    backend = running.pop(task)
+                    if task.exception() is None:
+                        winner = winner or task
+                    else:
+                        error = task.exception()
+                        logger.warning("LLM backend %s failed: %s", backend.name, error)
+                        if pending:
+                            launch()
+                if winner is not None:
+                    return winner.result()
+            raise error
+        finally:
+            for task in running:
+                task.cancel()
+
+    def stream(self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any) -> Iterator[Any]:
+        yield self.invoke(input, config, **kwargs)
+
+    async def astream(
+        self, input: Any, config: Optional[RunnableConfig] = None, **kwargs: Any
+    ) -> AsyncIterator[Any]:
+        error: Optional[Exception] = None
+        for backend in self._candidates():
+            started = time.perf_counter()
+            emitted = False
+            try:
+                async for chunk in backend.llm.astream(input, config, **kwargs):
+                    emitted = True
+                    yield chunk
+            except Exception as e:
+                if emitted:
+                    raise
+                logger.warning("LLM backend %s failed: %s", backend.name, e)
+                error = e
+                continue
+            backend.latency.record(time.perf_counter() - started)
+            return
+        raise error
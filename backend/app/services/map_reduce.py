@@ -0,0 +1,193 @@
+"""
+Split / merge helpers for map-reduce quiz generation over long articles.
+- chunk_sections: packs the article's sections, in order, into prompt-sized chunks
+  (splitting oversized sections at paragraph boundaries).
+- merge_results: combines the per-chunk LLM results into one quiz with duplicate
+  questions removed, a balanced difficulty mix, coverage across chunks and every
+  question attributed to a section of the chunk it came from.
+"""
+import re
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Target share of each difficulty in a merged quiz (matches QUIZ_GENERATION_PROMPT's mix)
+DIFFICULTY_MIX = {"easy": 0.3, "medium": 0.4, "hard": 0.3}
+MAX_RELATED_TOPICS = 6
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+@dataclass
+class Chunk:
+    sections: list[str] = field(default_factory=list)
+    parts: list[str] = field(default_factory=list)  # "## Section\ntext" blocks
+    size: int = 0
+
+    @property
+    def text(self) -> str:
+        return "\n\n".join(self.parts)
+
+    def add(self, section: str, text: str) -> None:
+        if section not in self.sections:
+            self.sections.append(section)
+        self.parts.append(f"## {section}\n{text}")
+        self.size += len(text)
+
+
+def chunk_sections(section_content: dict[str, str], chunk_chars: int, max_chunks: int) -> list[Chunk]:
+    """
+    Greedily pack consecutive sections into chunks of about chunk_chars characters.
+    More than max_chunks chunks are thinned to an even sample (always keeping the
+    introduction) so the number of LLM calls stays bounded.
+    """
+    chunks: list[Chunk] = []
+    current = Chunk()
+    for section, text in section_content.items():
+        for piece in _split_paragraphs(text, chunk_chars):
+            if current.size and current.size + len(piece) > chunk_chars:
+                chunks.append(current)
+                current = Chunk()
+            current.add(section, piece)
+    if current.size:
+        chunks.append(current)
+
+    if len(chunks) <= max_chunks:
+        return chunks
+    if max_chunks <= 1:
+        return chunks[:1]
+    step = (len(chunks) - 1) / (max_chunks - 1)
+    return [chunks[round(i * step)] for i in range(max_chunks)]
+
+
+def _split_paragraphs(text: str, chunk_chars: int) -> list[str]:
+    """Split a section's newline-separated paragraphs into pieces of at most ~chunk_chars."""
+    if len(text) <= chunk_chars:
+        return [text]
+    pieces, current, size = [], [], 0
+    for paragraph in text.split("\n"):
+        if current and size + len(paragraph) > chunk_chars:
+            pieces.append("\n".join(current))
+            current, size = [], 0
+        current.append(paragraph)
+        size += len(paragraph) + 1
+    if current:
+        pieces.append("\n".join(current))
+    return pieces
+
+
+def questions_per_chunk(num_chunks: int, max_questions: int) -> int:
+    """Ask each chunk for a little more than its share so dedup/balancing has slack."""
+    return max(2, min(5, -(-max_questions // max(num_chunks, 1)) + 1))
+
+
+def merge_results(results: list[tuple[Chunk, dict]], max_questions: int) -> dict:
+    """Reduce step: one quiz dict (same shape as QuizGenerator results) from per-chunk results."""
+    candidates: list[list[dict]] = []
+    seen: list[set[str]] = []
+    for chunk, result in results:
+        picked = []
+        for q in result.get("quiz", []):
+            words = _question_words(q["question"])
+            if not words or any(_similar(words, other) for other in seen):
+                continue
+            seen.append(words)
+            q = dict(q)
+            if q.get("section") not in chunk.sections:
+                q["section"] = _closest_section(q, chunk)
+            if q.get("difficulty") not in DIFFICULTY_MIX:
+                q["difficulty"] = "medium"
+            picked.append(q)
+        candidates.append(picked)
+
+    quiz = _balance(candidates, max_questions)
+    for i, q in enumerate(quiz):
+        q["sort_order"] = i
+
+    return {
+        "quiz": quiz,
+        "key_entities": _merge_entities([r.get("key_entities") or {} for _, r in results]),
+        "related_topics": _merge_topics([r.get("related_topics") or [] for _, r in results]),
+    }
+
+
+def _question_words(question: str) -> set[str]:
+    return set(_WORD_RE.findall(question.lower()))
+
+
+def _similar(a: set[str], b: set[str], threshold: float = 0.8) -> bool:
+    return len(a & b) / len(a | b) >= threshold
+
+
+def _closest_section(q: dict, chunk: Chunk) -> Optional[str]:
+    """Section of the chunk whose text shares the most words with the question and answer."""
+    if len(chunk.sections) == 1:
+        return chunk.sections[0]
+    words = _question_words(f"{q['question']} {q['answer']}")
+    best, best_score = chunk.sections[0], -1
+    for section, part in zip(chunk.sections, _parts_by_section(chunk)):
+        score = len(words & _question_words(part))
+        if score > best_score:
+            best, best_score = section, score
+    return best
+
+
+def _parts_by_section(chunk: Chunk) -> list[str]:
+    texts = {section: [] for section in chunk.sections}
+    for part in chunk.parts:
+        header, _, body = part.partition("\n")
+        texts[header[3:]].append(body)
+    return [" ".join(texts[section]) for section in chunk.sections]
+
+
+def _balance(candidates: list[list[dict]], max_questions: int) -> list[dict]:
+    """
+    Round-robin over chunks (article order) so every part of the article is covered,
+    taking a question only while its difficulty is under quota; then top up from
+    whatever is left. Final order: easy -> medium -> hard, article order within each.
+    """
+    quota = {d: max(1, round(share * max_questions)) for d, share in DIFFICULTY_MIX.items()}
+    queues = [list(enumerate(c)) for c in candidates]
+    chosen: list[tuple[int, int, dict]] = []  # (chunk index, index within chunk, question)
+    for respect_quota in (True, False):
+        progress = True
+        while len(chosen) < max_questions and progress:
+            progress = False
+            for ci, queue in enumerate(queues):
+                for k, (qi, q) in enumerate(queue):
+                    if respect_quota and quota[q["difficulty"]] <= 0:
+                        continue
+                    quota[q["difficulty"]] -= 1
+                    chosen.append((ci, qi, q))
+                    del queue[k]
+                    progress = True
+                    break
+                if len(chosen) >= max_questions:
+                    break
+    order = {d: i for i, d in enumerate(DIFFICULTY_MIX)}
+    chosen.sort(key=lambda c: (order[c[2]["difficulty"]], c[0], c[1]))
+    return [q for _, _, q in chosen]
+
+
+def _merge_entities(entity_dicts: list[dict]) -> dict:
+    merged = {}
+    for kind in ("people", "organizations", "locations"):
+        merged[kind] = _dedupe(v for d in entity_dicts for v in (d.get(kind) or []))
+    return merged
+
+
+def _merge_topics(topic_lists: list[list[str]]) -> list[str]:
+    """Interleave the chunks' suggestions so each part of the article contributes."""
+    interleaved = []
+    for i in range(max((len(t) for t in topic_lists), default=0)):
+        interleaved.extend(t[i] for t in topic_lists if i < len(t))
+    return _dedupe(interleaved)[:MAX_RELATED_TOPICS]
+
+
+def _dedupe(values) -> list[str]:
+    seen, out = set(), []
+    for v in values:
+        key = str(v).strip().lower()
+        if key and key not in seen:
+            seen.add(key)
+            out.append(str(v).strip())
+    return out
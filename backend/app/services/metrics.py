@@ -0,0 +1,240 @@
+"""
+In-process metrics in the Prometheus text format (GET /metrics when METRICS_ENABLED).
+- stage(): latency histogram per pipeline stage (fetch, parse, pack, llm, llm_parse,
+  db_write, serialize), used as `with stage("fetch"): ...`.
+- cache_result(): hit/miss counters for the quiz lookup and the page, LLM and response caches.
+- llm_usage() / llm_error(): token usage and error classes per LLM backend.
+- instrument_engine() + MetricsMiddleware: SQL statements per HTTP request, and request
+  counts and latency per route.
+When disabled, no middleware or engine hook is installed and every recording call returns
+before touching any state.
+"""
+import bisect
+import contextlib
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from ..config import get_settings
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+
+_enabled = get_settings().METRICS_ENABLED
+_registry: list["_Metric"] = []
+_NOOP = contextlib.nullcontext()
+# SQL statement count of the HTTP request being served (set by MetricsMiddleware)
+_request_queries: ContextVar[Optional[list[int]]] = ContextVar("request_queries", default=None)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _labels(self, values: tuple, extra: str = "") -> str:
+        pairs = [f'{n}="{_escape(str(v))}"' for n, v in zip(self.labelnames, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labelvalues: Any, amount: float = 1.0) -> None:
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return super().render() + [f"{self.name}{self._labels(k)} {_format_value(v)}" for k, v in values]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [count per bucket..., count above the last bucket, sum]
+        self._values: dict[tuple, list[float]] = {}
+
+    def observe(self, value: float, *labelvalues: Any) -> None:
+        if not _enabled:
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labelvalues)
+            if row is None:
+                row = self._values[labelvalues] = [0.0] * (len(self.buckets) + 2)
+            row[index] += 1
+            row[-1] += value
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted((k, list(v)) for k, v in self._values.items())
+        lines = super().render()
+        for labels, row in values:
+            cumulative = 0.0
+            for bound, count in zip((*map(_format_value, self.buckets), "+Inf"), row):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, le)} {_format_value(cumulative)}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {_format_value(row[-1])}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {_format_value(cumulative)}")
+        return lines
+
+
+STAGE_SECONDS = Histogram(
+    "wikiquiz_stage_seconds", "Time spent in each quiz pipeline stage.", ("stage",)
+)
+CACHE_REQUESTS = Counter(
+    "wikiquiz_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result")
+)
+LLM_TOKENS = Counter(
+    "wikiquiz_llm_tokens_total", "LLM tokens reported by the provider.", ("backend", "kind")
+)
+LLM_ERRORS = Counter(
+    "wikiquiz_llm_errors_total", "Failed LLM calls (including retried ones) by error class.", ("backend", "error")
+)
+DB_QUERIES = Counter("wikiquiz_db_queries_total", "SQL statements executed.")
+DB_QUERIES_PER_REQUEST = Histogram(
+    "wikiquiz_db_queries_per_request", "SQL statements executed while serving one HTTP request.",
+    ("route",), COUNT_BUCKETS,
+)
+HTTP_REQUESTS = Counter(
+    "wikiquiz_http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+HTTP_SECONDS = Histogram(
+    "wikiquiz_http_request_seconds", "HTTP request latency (until the response is complete).", ("route",)
+)
+
+
+class _StageTimer:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> "_StageTimer":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, self.name)
+
+
+def stage(name: str):
+    """Context manager timing one pipeline stage (a shared no-op when metrics are disabled)."""
+    return _StageTimer(name) if _enabled else _NOOP
+
+
+def observe_stage(name: str, seconds: float) -> None:
+    """For stages that do not fit a with-block (e.g. a stream consumed across yields)."""
+    STAGE_SECONDS.observe(seconds, name)
+
+
+def cache_result(cache: str, result: str) -> None:
+    """result: "hit", "miss" (or a cache-specific outcome such as "revalidated")."""
+    CACHE_REQUESTS.inc(cache, result)
+
+
+def llm_usage(backend: str, message: Any) -> None:
+    usage = getattr(message, "usage_metadata", None) if _enabled else None
+    if usage:
+        LLM_TOKENS.inc(backend, "input", amount=usage.get("input_tokens") or 0)
+        LLM_TOKENS.inc(backend, "output", amount=usage.get("output_tokens") or 0)
+
+
+def llm_error(backend: str, error: BaseException) -> None:
+    LLM_ERRORS.inc(backend, type(error).__name__)
+
+
+def _count_query(*_args: Any) -> None:
+    DB_QUERIES.inc()
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Count the engine's SQL statements (pass async_engine.sync_engine for the async engine)."""
+    if _enabled and not event.contains(engine, "before_cursor_execute", _count_query):
+        event.listen(engine, "before_cursor_execute", _count_query)
+
+
+def render() -> str:
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: request count/latency and SQL statements per route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = [500]
+        queries = [0]
+        token = _request_queries.set(queries)
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _request_queries.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            HTTP_REQUESTS.inc(scope["method"], route, status[0])
+            HTTP_SECONDS.observe(time.perf_counter() - started, route)
+            DB_QUERIES_PER_REQUEST.observe(queries[0], route)
@@ -0,0 +1,96 @@
+"""
+Persistent HTTP page cache for WikipediaScraper.
+Bodies are stored zlib-compressed in a local SQLite file (SQLiteLRUStore), keyed by URL,
+together with their ETag / Last-Modified validators. Fresh entries (younger than the
+TTL) are served without any network access; stale entries are revalidated with a
+conditional GET so an unchanged page costs a 304. Total stored size is bounded with LRU
+eviction.
+"""
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from ..config import get_settings
+from .sqlite_store import SQLiteLRUStore
+
+
+@dataclass
+class CachedPage:
+    url: str
+    final_url: str
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fetched_at: float
+
+    def is_fresh(self, ttl_seconds: float) -> bool:
+        return time.time() - self.fetched_at < ttl_seconds
+
+    def validators(self) -> dict:
+        """Conditional request headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """Size-bounded on-disk LRU cache of fetched pages with HTTP validators."""
+    
+    def __init__(self, directory: str | Path, ttl_seconds: float = 3600, max_bytes: int = 256 * 1024 * 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self._store = SQLiteLRUStore(Path(directory) / "pages.sqlite3", "pages", max_bytes)
+    
+    def get(self, url: str) -> Optional[CachedPage]:
+        """Return the stored page (fresh or stale) and mark it recently used."""
+        entry = self._store.get(url)
+        if entry is None:
+            return None
+        return CachedPage(
+            url=url,
+            final_url=entry.meta.get("final_url") or url,
+            body=entry.body.decode("utf-8"),
+            etag=entry.meta.get("etag"),
+            last_modified=entry.meta.get("last_modified"),
+            fetched_at=entry.created_at,
+        )
+    
+    def put(
+        self,
+        url: str,
+        body: str,
+        final_url: Optional[str] = None,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """Store a freshly downloaded page, then evict least-recently-used pages over the size bound."""
+        meta = {"final_url": final_url or url, "etag": etag, "last_modified": last_modified}
+        self._store.put(url, body.encode("utf-8"), meta)
+    
+    def mark_revalidated(self, url: str) -> None:
+        """Reset the TTL after the origin answered 304 Not Modified."""
+        self._store.refresh(url)
+    
+    def total_bytes(self) -> int:
+        return self._store.total_bytes()
+    
+    def close(self) -> None:
+        self._store.close()
+
+
+@lru_cache
+def get_page_cache() -> Optional[PageCache]:
+    """Shared page cache configured from Settings (None when disabled)."""
+    settings = get_settings()
+    if not settings.PAGE_CACHE_ENABLED:
+        return None
+    return PageCache(
+        settings.PAGE_CACHE_DIR,
+        ttl_seconds=settings.PAGE_CACHE_TTL_SECONDS,
+        max_bytes=settings.PAGE_CACHE_MAX_MB * 1024 * 1024,
+    )
@@ -0,0 +1,189 @@
+"""
+Related-topic prefetch: users often click one of a quiz's related topics next, so after a
+quiz is stored its top related topics are queued and prepared in the background.
+- Queue: bounded priority queue (shallowest, best-ranked, newest first); when full the
+  least useful entry is dropped. Topics already queued or prefetched recently are skipped.
+- Work: each topic's quiz is generated through the normal pipeline (single-flight, leases,
+  storage) while the LLM quota has PREFETCH_MIN_QUOTA_HEADROOM left; otherwise the article
+  is only scraped, which warms the page cache. Articles with a stored quiz cost nothing.
+- Limits: topics of prefetched quizzes are followed up to PREFETCH_MAX_DEPTH links from a
+  user's quiz, and at most PREFETCH_MAX_PER_HOUR articles are fetched per process.
+"""
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from ..config import get_settings
+from ..database import AsyncSessionLocal
+from .canonical import article_url, normalize_title
+from .generation import (
+    FETCH_ERRORS,
+    GenerationError,
+    add_store_listener,
+    find_quiz_id,
+    get_or_generate_quiz,
+    remove_store_listener,
+    resolve_alias,
+)
+from .llm_pool import LLMPool
+from .quiz_generator import QuizGenerator
+from .scraper import WikipediaScraper
+
+logger = logging.getLogger(__name__)
+
+# Links between the quiz being generated and a user's quiz (0 = the user asked for it)
+_depth: contextvars.ContextVar[int] = contextvars.ContextVar("prefetch_depth", default=0)
+
+# Recently queued keys remembered per queue slot, so popular topics are not prefetched twice
+SEEN_PER_SLOT = 10
+
+
+@dataclass(order=True)
+class PrefetchItem:
+    depth: int
+    rank: int
+    newest: int  # negated sequence number: later quizzes' topics first
+    key: str = field(compare=False)
+
+
+class Prefetcher:
+    """Background workers over the prefetch queue; started and stopped with the app (ServiceContainer)."""
+
+    def __init__(self, scraper: WikipediaScraper, get_generator: Callable[[], QuizGenerator]):
+        settings = get_settings()
+        self.scraper = scraper
+        self.get_generator = get_generator
+        self.workers = settings.PREFETCH_WORKERS
+        self.generate = settings.PREFETCH_GENERATE
+        self.topics_per_quiz = settings.PREFETCH_TOPICS_PER_QUIZ
+        self.max_depth = settings.PREFETCH_MAX_DEPTH
+        self.queue_size = max(1, settings.PREFETCH_QUEUE_SIZE)
+        self.max_per_hour = settings.PREFETCH_MAX_PER_HOUR
+        self.min_headroom = settings.PREFETCH_MIN_QUOTA_HEADROOM
+        self._heap: list[PrefetchItem] = []
+        self._ready = asyncio.Event()
+        self._seen: OrderedDict[str, None] = OrderedDict()
+        self._sequence = itertools.count()
+        self._fetched: deque[float] = deque()
+        self._tasks: list[asyncio.Task] = []
+        self.stats = {"queued": 0, "dropped": 0, "cached": 0, "generated": 0, "scraped": 0, "failed": 0}
+
+    def start(self) -> None:
+        add_store_listener(self.on_quiz_stored)
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._work(), name=f"prefetch-worker-{i}"))
+
+    async def stop(self) -> None:
+        remove_store_listener(self.on_quiz_stored)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._heap.clear()
+
+    def on_quiz_stored(self, article_key: str, related_topics: list[str]) -> None:
+        """Store listener: queue the new quiz's top related topics, one link deeper."""
+        depth = _depth.get() + 1
+        if depth > self.max_depth:
+            return
+        lang = article_key.partition(":")[0] or "en"
+        newest = -next(self._sequence)
+        for rank, topic in enumerate(related_topics[: self.topics_per_quiz]):
+            title = normalize_title(str(topic))
+            if title:
+                self.enqueue(PrefetchItem(depth, rank, newest, f"{lang}:{title.replace(' ', '_')}"))
+
+    def enqueue(self, item: PrefetchItem) -> bool:
+        if item.key in self._seen:
+            return False
+        if len(self._heap) >= self.queue_size:
+            worst = max(self._heap)
+            if item >= worst:
+                self.stats["dropped"] += 1
+                return False
+            self._heap.remove(worst)
+            heapq.heapify(self._heap)
+            self.stats["dropped"] += 1
+        heapq.heappush(self._heap, item)
+        self._seen[item.key] = None
+        while len(self._seen) > self.queue_size * SEEN_PER_SLOT:
+            self._seen.popitem(last=False)
+        self.stats["queued"] += 1
+        self._ready.set()
+        return True
+
+    def queued(self) -> int:
+        return len(self._heap)
+
+    async def _pop(self) -> PrefetchItem:
+        while not self._heap:
+            self._ready.clear()
+            await self._ready.wait()
+        return heapq.heappop(self._heap)
+
+    def _budget_wait(self) -> float:
+        """Seconds until the hourly fetch budget allows another article (0 = unlimited)."""
+        if self.max_per_hour <= 0:
+            return 0.0
+        now = time.monotonic()
+        while self._fetched and now - self._fetched[0] >= 3600:
+            self._fetched.popleft()
+        if len(self._fetched) < self.max_per_hour:
+            return 0.0
+        return 3600 - (now - self._fetched[0])
+
+    def _quota_allows_generation(self, generator: QuizGenerator) -> bool:
+        """Generate only while user requests keep enough LLM quota (the heuristic engine is free)."""
+        if generator.mock_mode or not isinstance(generator.llm, LLMPool):
+            return True
+        return generator.llm.headroom() >= self.min_headroom
+
+    async def _work(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self._budget_wait())
+                item = await self._pop()
+                await self._prefetch(item)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Prefetch worker error")
+
+    async def _prefetch(self, item: PrefetchItem) -> None:
+        async with AsyncSessionLocal() as db:
+            key = await resolve_alias(db, item.key)
+            if await find_quiz_id(db, key):
+                self.stats["cached"] += 1
+                return
+        generator = None
+        if self.generate:
+            try:
+                generator = self.get_generator()
+            except ValueError:
+                pass
+        generate = generator is not None and self._quota_allows_generation(generator)
+        if not generate and not self.scraper.page_cache:
+            return  # nothing would outlive a bare scrape
+        url = article_url(key)
+        self._fetched.append(time.monotonic())
+        try:
+            if generate:
+                token = _depth.set(item.depth)
+                try:
+                    await get_or_generate_quiz(url, self.scraper, generator)
+                finally:
+                    _depth.reset(token)
+                self.stats["generated"] += 1
+            else:
+                await self.scraper.afetch_and_parse(url)
+                self.stats["scraped"] += 1
+        except (GenerationError, ValueError, *FETCH_ERRORS) as e:
+            # Topics are LLM guesses: a missing article is expected, not an error
+            self.stats["failed"] += 1
+            logger.info("Prefetch of %s skipped: %s", key, getattr(e, "detail", e))
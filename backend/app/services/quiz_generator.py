@@ -2,27 +2,52 @@
 Quiz generation using LangChain and Groq LLM.
 Uses Groq free tier API (no credit card required).
 """
+import asyncio
 import json
+import logging
 import re
-from collections import Counter
-from typing import Optional
-from langchain_groq import ChatGroq
+import time
+from typing import Any, AsyncIterator, Optional
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import Runnable
 
 from ..config import get_settings
-from ..prompts.quiz_prompts import QUIZ_GENERATION_PROMPT
+from ..prompts.quiz_prompts import QUIZ_GENERATION_PROMPT, SECTION_QUIZ_PROMPT
+from . import metrics
+from .heuristic_generator import HeuristicQuizEngine
+from .json_stream import JsonStreamParser
+from .content_packer import get_token_counter
+from .llm_cache import LLMCache, get_llm_cache
+from .llm_pool import LLMPool, build_backends
+from .map_reduce import Chunk, chunk_sections, merge_results, questions_per_chunk
+
+logger = logging.getLogger(__name__)
+
+# Parsed once per process; chains built on them are cached per QuizGenerator
+_PROMPTS = {
+    template: ChatPromptTemplate.from_template(template)
+    for template in (QUIZ_GENERATION_PROMPT, SECTION_QUIZ_PROMPT)
+}
 
 
 class QuizGenerator:
     """Generates quiz from Wikipedia article content using LLM."""
     
-    def __init__(self):
+    def __init__(self, llm_cache: Optional[LLMCache] = None):
         settings = get_settings()
         self.mock_mode = False
-        self.llm: Optional[ChatGroq] = None
+        self.llm = None
+        self.model = settings.GROQ_MODEL
+        self.models = self.model
+        self.temperature = 0.3  # Lower temp for factual output
+        self.llm_cache = llm_cache or get_llm_cache()
+        self.heuristic = HeuristicQuizEngine(settings.QUIZ_MAX_QUESTIONS)
 
-        if not settings.GROQ_API_KEY:
+        backends = build_backends(
+            settings, self.temperature, count_tokens=get_token_counter(settings.TOKENIZER_ENCODING)
+        )
+        if not backends:
             if settings.REQUIRE_GROQ_API_KEY:
                 raise ValueError(
                     "GROQ_API_KEY is required. Get a free API key (no card needed) from "
@@ -31,154 +56,298 @@ class QuizGenerator:
             self.mock_mode = True
             return
 
-        self.llm = ChatGroq(
-            model=settings.GROQ_MODEL,
-            api_key=settings.GROQ_API_KEY,
-            temperature=0.3,  # Lower temp for factual output
-        )
+        self.model = backends[0].model
+        # LLM cache namespace: any backend may answer, so results are keyed by all of them
+        self.models = "|".join(b.model for b in backends)
+        self.llm = LLMPool(backends, validate=self._is_valid_response)
+        for template in _PROMPTS:
+            self._build_chain(template)
+
+    @property
+    def llm(self) -> Optional[Runnable]:
+        return self._llm
+
+    @llm.setter
+    def llm(self, llm: Optional[Runnable]) -> None:
+        self._llm = llm
+        self._chains: dict[str, Runnable] = {}
+
+    async def aclose(self) -> None:
+        """Close the LLM clients' connection pools (app shutdown)."""
+        if isinstance(self.llm, LLMPool):
+            await self.llm.aclose()
     
-    def generate_quiz(self, title: str, sections: list, content: str) -> dict:
+    def generate_quiz(
+        self, title: str, sections: list, content: str, section_content: Optional[dict] = None
+    ) -> dict:
         """
         Generate quiz and related topics from article content.
         Returns dict with 'quiz' (list of question dicts) and 'related_topics'.
+        With section_content (the whole article by section), long articles are generated
+        map-reduce style instead (see GENERATION_MODE).
         """
         if self.mock_mode or not self.llm:
-            return self._generate_mock_quiz(title=title, sections=sections, content=content)
+            return self._generate_mock_quiz(title, sections, content, section_content)
+        try:
+            if self.use_map_reduce(section_content):
+                return self._generate_map_reduce(title, section_content)
+            return self._generate_single(title, sections, content)
+        except Exception as e:
+            return self._mock_fallback(e, title, sections, content, section_content)
 
-        prompt = ChatPromptTemplate.from_template(QUIZ_GENERATION_PROMPT)
-        chain = prompt | self.llm | StrOutputParser()
-        
-        sections_str = ", ".join(sections) if sections else "Introduction"
-        
-        response = chain.invoke({
-            "title": title,
-            "sections": sections_str,
-            "content": content,
-        })
-        
-        return self._parse_llm_response(response, title)
+    def _generate_single(self, title: str, sections: list, content: str) -> dict:
+        inputs = self._chain_inputs(title, sections, content)
+        cache_key = self._cache_key(inputs)
+        cached = self.llm_cache.get(cache_key) if cache_key else None
+        if cached is not None:
+            return cached
+        with metrics.stage("llm"):
+            response = self._build_chain().invoke(inputs)
+        with metrics.stage("llm_parse"):
+            result = self._parse_llm_response(response, title)
+        if cache_key and result.get("quiz"):
+            self.llm_cache.put(cache_key, result)
+        return result
 
-    def _generate_mock_quiz(self, title: str, sections: list, content: str) -> dict:
+    async def agenerate_quiz(
+        self, title: str, sections: list, content: str, section_content: Optional[dict] = None
+    ) -> dict:
+        """Async variant of generate_quiz (uses the chain's ainvoke / abatch)."""
+        if self.mock_mode or not self.llm:
+            return await asyncio.to_thread(
+                self._generate_mock_quiz, title, sections, content, section_content
+            )
+        try:
+            if self.use_map_reduce(section_content):
+                return await self._agenerate_map_reduce(title, section_content)
+            return await self._agenerate_single(title, sections, content)
+        except Exception as e:
+            return await asyncio.to_thread(self._mock_fallback, e, title, sections, content, section_content)
+
+    async def _agenerate_single(self, title: str, sections: list, content: str) -> dict:
+        inputs = self._chain_inputs(title, sections, content)
+        cache_key = self._cache_key(inputs)
+        cached = await self._acache_get(cache_key)
+        if cached is not None:
+            return cached
+        with metrics.stage("llm"):
+            response = await self._build_chain().ainvoke(inputs)
+        with metrics.stage("llm_parse"):
+            result = self._parse_llm_response(response, title)
+        await self._acache_put(cache_key, result)
+        return result
+
+    async def astream_quiz(
+        self, title: str, sections: list, content: str, section_content: Optional[dict] = None
+    ) -> AsyncIterator[tuple[str, Any]]:
         """
-        Heuristic fallback generator (no API key required).
-        This is intentionally simple: it creates a small quiz based on "X is/was Y" facts
-        found in the scraped article content.
+        Streaming variant of agenerate_quiz. Yields ("question", q) as each quiz item closes
+        in the token stream, ("key_entities", ...) and ("related_topics", ...) as those close,
+        and finally ("result", <the dict agenerate_quiz would return>). Map-reduce
+        generations are emitted once merged.
         """
-        # Sentence split (lightweight)
-        text = re.sub(r"\s+", " ", (content or "")).strip()
-        sentences = [s.strip() for s in re.split(r"(?<=[.!?])\s+", text) if 40 <= len(s.strip()) <= 220]
-
-        # Extract simple "subject is/was ..." facts
-        fact_pattern = re.compile(r"^([A-Z][A-Za-z0-9 ,.'()-]{2,60})\s+(is|was|are|were)\s+(.+?)\.$")
-        def _clean_subject(s: str) -> str:
-            s = (s or "").strip()
-            for prefix in ("The ", "A ", "An "):
-                if s.startswith(prefix):
-                    return s[len(prefix) :].strip()
-            return s
-
-        facts = []
-        for s in sentences[:80]:
-            m = fact_pattern.match(s)
-            if not m:
-                continue
-            subject = _clean_subject(m.group(1).strip())
-            verb = m.group(2).strip()
-            obj = m.group(3).strip()
-            if len(subject) < 3 or len(obj) < 10:
-                continue
-            # Avoid super generic subjects
-            if subject.lower() in {"it", "this", "he", "she", "they"}:
-                continue
-            facts.append((subject, verb, obj))
-            if len(facts) >= 10:
-                break
-
-        # Build options using other objects as distractors
-        objects = [o for _, _, o in facts]
-
-        quiz = []
-        for i, (subj, verb, obj) in enumerate(facts[:8]):
-            distractors = [o for o in objects if o != obj][:3]
-            # Pad distractors from other sentences if needed
-            if len(distractors) < 3:
-                for s in sentences[80:120]:
-                    if s.endswith(".") and s[:-1] != obj and len(s) < 120:
-                        distractors.append(s[:-1])
-                    if len(distractors) >= 3:
-                        break
-            options = [obj] + distractors[:3]
-            # Deterministic shuffle: rotate by i
-            rot = i % len(options) if options else 0
-            options = options[rot:] + options[:rot]
-            answer = obj
-            quiz.append(
-                {
-                    "question": f"According to the article, what {verb} {subj}?",
-                    "options": options[:4],
-                    "answer": answer,
-                    "difficulty": "easy" if i < 3 else ("medium" if i < 6 else "hard"),
-                    "explanation": "This answer is taken directly from a sentence in the article text.",
-                    "section": (sections[i] if sections and i < len(sections) else None),
-                    "sort_order": i,
-                }
+        if self.mock_mode or not self.llm:
+            result = await asyncio.to_thread(
+                self._generate_mock_quiz, title, sections, content, section_content
             )
+        elif self.use_map_reduce(section_content):
+            try:
+                result = await self._agenerate_map_reduce(title, section_content)
+            except Exception as e:
+                result = await asyncio.to_thread(self._mock_fallback, e, title, sections, content, section_content)
+        else:
+            inputs = self._chain_inputs(title, sections, content)
+            cache_key = self._cache_key(inputs)
+            result = await self._acache_get(cache_key)
+        if result is not None:
+            for event in self._result_events(result):
+                yield event
+            return
 
-        # If we couldn't extract enough facts, create a couple of safe questions from sections
-        if len(quiz) < 5:
-            sec_list = [s for s in (sections or []) if isinstance(s, str) and s.strip()]
-            if sec_list:
-                for j, sec in enumerate(sec_list[: (5 - len(quiz))]):
-                    quiz.append(
-                        {
-                            "question": f"Which of the following is a section listed in the article '{title}'?",
-                            "options": [sec, "Overview", "Appendix", "Bibliography"],
-                            "answer": sec,
-                            "difficulty": "easy",
-                            "explanation": "Section names are taken from the scraped article structure.",
-                            "section": sec,
-                            "sort_order": len(quiz),
-                        }
-                    )
-
-        # Related topics: section names and frequent capitalized tokens
-        caps = re.findall(r"\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2})\b", text[:4000])
-        cap_counts = Counter([c.strip() for c in caps if 3 <= len(c.strip()) <= 30])
-        stop_topics = {
-            "The",
-            "A",
-            "An",
-            "And",
-            "Or",
-            "But",
-            "However",
-            "This",
-            "That",
-            "It",
-            "In",
-            "On",
-            "By",
-            "From",
-            "As",
-            "For",
-            "With",
-            "Without",
-        }
-        related = []
-        related.extend([s for s in (sections or [])[:3] if isinstance(s, str)])
-        related.extend([w for w, _ in cap_counts.most_common(10) if w not in stop_topics])
-        related_topics = []
-        for t in related:
-            if t and t not in related_topics and t.lower() != title.lower():
-                related_topics.append(t)
-            if len(related_topics) >= 6:
-                break
+        parser = JsonStreamParser(item_keys=("quiz",))
+        chunks = []
+        started = time.perf_counter()
+        try:
+            async for chunk in self._build_chain().astream(inputs):
+                chunks.append(chunk)
+                for event in parser.feed(chunk):
+                    if event.key == "quiz":
+                        q = self._normalize_question(event.value, event.index)
+                        if q:
+                            yield "question", q
+                    elif event.key == "key_entities":
+                        yield "key_entities", self._normalize_key_entities(event.value)
+                    elif event.key == "related_topics":
+                        yield "related_topics", self._normalize_related_topics(event.value)
+            metrics.observe_stage("llm", time.perf_counter() - started)
+            with metrics.stage("llm_parse"):
+                result = self._parse_llm_response("".join(chunks), title)
+        except Exception as e:
+            if chunks:  # part of the quiz has already been streamed
+                raise
+            result = await asyncio.to_thread(self._mock_fallback, e, title, sections, content, section_content)
+            for event in self._result_events(result):
+                yield event
+            return
+        await self._acache_put(cache_key, result)
+        yield "result", result
+
+    @staticmethod
+    def _result_events(result: dict) -> list[tuple[str, Any]]:
+        """astream_quiz events for a quiz that is already complete."""
+        return [
+            *(("question", q) for q in result["quiz"]),
+            ("key_entities", result["key_entities"]),
+            ("related_topics", result["related_topics"]),
+            ("result", result),
+        ]
+
+    def _mock_fallback(
+        self, error: Exception, title: str, sections: list, content: str, section_content: Optional[dict]
+    ) -> dict:
+        """Last-resort tier (LLM_MOCK_FALLBACK): the heuristic quiz when every LLM backend failed."""
+        if not get_settings().LLM_MOCK_FALLBACK:
+            raise error
+        logger.warning("LLM generation failed (%s); falling back to the heuristic generator", error)
+        return self._generate_mock_quiz(title, sections, content, section_content)
+
+    def _is_valid_response(self, message: Any) -> bool:
+        """LLMPool validator: the response parses into a quiz with at least one question."""
+        try:
+            return bool(self._parse_llm_response(str(getattr(message, "content", message)), "")["quiz"])
+        except ValueError:
+            return False
+
+    def use_map_reduce(self, section_content: Optional[dict]) -> bool:
+        """Whether a real-LLM generation of this article would take the map-reduce path."""
+        settings = get_settings()
+        if self.mock_mode or not self.llm or not section_content or settings.GENERATION_MODE == "single":
+            return False
+        if settings.GENERATION_MODE == "map_reduce":
+            return True
+        if self._max_chunks() <= 1:
+            return False  # too little quota left to fan out: one packed prompt instead
+        return sum(len(text) for text in section_content.values()) > settings.MAP_REDUCE_MIN_CHARS
+
+    def _max_chunks(self) -> int:
+        """MAP_REDUCE_MAX_CHUNKS scaled down to the share of LLM quota left right now."""
+        max_chunks = get_settings().MAP_REDUCE_MAX_CHUNKS
+        if isinstance(self.llm, LLMPool):
+            max_chunks = int(max_chunks * self.llm.headroom())
+        return max(1, max_chunks)
 
+    def _map_inputs(self, title: str, section_content: dict) -> tuple[list[Chunk], list[dict], list[Optional[str]]]:
+        """Section-aligned chunks with their prompt inputs and cache keys."""
+        settings = get_settings()
+        chunks = chunk_sections(section_content, settings.MAP_REDUCE_CHUNK_CHARS, self._max_chunks())
+        num_questions = questions_per_chunk(len(chunks), settings.QUIZ_MAX_QUESTIONS)
+        inputs = [
+            {"title": title, "sections": ", ".join(c.sections), "content": c.text, "num_questions": num_questions}
+            for c in chunks
+        ]
+        return chunks, inputs, [self._cache_key(i, SECTION_QUIZ_PROMPT) for i in inputs]
+
+    def _generate_map_reduce(self, title: str, section_content: dict) -> dict:
+        chunks, inputs, keys = self._map_inputs(title, section_content)
+        results = [self.llm_cache.get(k) if k else None for k in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            with metrics.stage("llm"):
+                responses = self._build_chain(SECTION_QUIZ_PROMPT).batch(
+                    [inputs[i] for i in missing],
+                    config={"max_concurrency": get_settings().MAP_REDUCE_CONCURRENCY},
+                    return_exceptions=True,
+                )
+            with metrics.stage("llm_parse"):
+                parsed_responses = self._parse_map_responses(responses, title)
+            for i, parsed in zip(missing, parsed_responses):
+                results[i] = parsed
+                if keys[i] and isinstance(parsed, dict) and parsed.get("quiz"):
+                    self.llm_cache.put(keys[i], parsed)
+        return self._reduce(chunks, results)
+
+    async def _agenerate_map_reduce(self, title: str, section_content: dict) -> dict:
+        """Map: one LLM call per chunk, concurrently (bounded); reduce: merge_results."""
+        chunks, inputs, keys = self._map_inputs(title, section_content)
+        results = [await self._acache_get(k) for k in keys]
+        missing = [i for i, r in enumerate(results) if r is None]
+        if missing:
+            with metrics.stage("llm"):
+                responses = await self._build_chain(SECTION_QUIZ_PROMPT).abatch(
+                    [inputs[i] for i in missing],
+                    config={"max_concurrency": get_settings().MAP_REDUCE_CONCURRENCY},
+                    return_exceptions=True,
+                )
+            with metrics.stage("llm_parse"):
+                parsed_responses = self._parse_map_responses(responses, title)
+            for i, parsed in zip(missing, parsed_responses):
+                results[i] = parsed
+                if isinstance(parsed, dict):
+                    await self._acache_put(keys[i], parsed)
+        return self._reduce(chunks, results)
+
+    def _parse_map_responses(self, responses: list, title: str) -> list:
+        """Parsed result per chunk response; failed chunks become their exception."""
+        parsed = []
+        for response in responses:
+            if not isinstance(response, Exception):
+                try:
+                    response = self._parse_llm_response(response, title)
+                except ValueError as e:
+                    response = e
+            parsed.append(response)
+        return parsed
+
+    @staticmethod
+    def _reduce(chunks: list[Chunk], results: list) -> dict:
+        """Merge the chunks that succeeded; fail only if none did."""
+        done = [(c, r) for c, r in zip(chunks, results) if isinstance(r, dict)]
+        errors = [r for r in results if isinstance(r, Exception)]
+        if errors:
+            logger.warning("%d of %d map-reduce chunks failed: %s", len(errors), len(chunks), errors[0])
+        if not done:
+            raise errors[0] if errors else ValueError("No content to generate a quiz from")
+        return merge_results(done, get_settings().QUIZ_MAX_QUESTIONS)
+
+    def _cache_key(self, inputs: dict, template: str = QUIZ_GENERATION_PROMPT) -> Optional[str]:
+        """Memoization key over the exact prompt the model would see."""
+        if not self.llm_cache:
+            return None
+        return self.llm_cache.key(template.format(**inputs), self.models, self.temperature)
+
+    async def _acache_get(self, cache_key: Optional[str]) -> Optional[dict]:
+        if not cache_key:
+            return None
+        return await asyncio.to_thread(self.llm_cache.get, cache_key)
+
+    async def _acache_put(self, cache_key: Optional[str], result: dict) -> None:
+        # Empty quizzes are usually a bad completion: let the next attempt retry the model
+        if cache_key and result.get("quiz"):
+            await asyncio.to_thread(self.llm_cache.put, cache_key, result)
+
+    def _build_chain(self, template: str = QUIZ_GENERATION_PROMPT) -> Runnable:
+        """prompt | llm | parser, composed once per template and reused across calls."""
+        chain = self._chains.get(template)
+        if chain is None:
+            prompt = _PROMPTS.get(template) or ChatPromptTemplate.from_template(template)
+            chain = self._chains[template] = prompt | self.llm | StrOutputParser()
+        return chain
+
+    @staticmethod
+    def _chain_inputs(title: str, sections: list, content: str) -> dict:
+        sections_str = ", ".join(sections) if sections else "Introduction"
         return {
-            "quiz": quiz[:10],
-            "related_topics": related_topics,
-            "key_entities": {"people": [], "organizations": [], "locations": []},
+            "title": title,
+            "sections": sections_str,
+            "content": content,
         }
+
+    def _generate_mock_quiz(
+        self, title: str, sections: list, content: str, section_content: Optional[dict] = None
+    ) -> dict:
+        """Heuristic fallback generator (no API key required); see heuristic_generator."""
+        with metrics.stage("heuristic"):
+            return self.heuristic.generate(title, sections, content, section_content)
     
     def _parse_llm_response(self, response: str, fallback_title: str) -> dict:
         """Parse LLM JSON response, with fallback handling."""
@@ -207,35 +376,39 @@ class QuizGenerator:
                 raise ValueError("No valid JSON found in LLM response")
         
         quiz = data.get("quiz", [])
-        related_topics = data.get("related_topics", [])
-        key_entities = data.get("key_entities")
-        
-        # Normalize key_entities
+        normalized = [self._normalize_question(q, i) for i, q in enumerate(quiz)]
+        validated_quiz = [q for q in normalized if q]
+        return {
+            "quiz": validated_quiz,
+            "related_topics": self._normalize_related_topics(data.get("related_topics", [])),
+            "key_entities": self._normalize_key_entities(data.get("key_entities")),
+        }
+
+    @staticmethod
+    def _normalize_question(q: Any, index: int) -> Optional[dict]:
+        """Validate one LLM quiz item; None if it lacks question/options/answer."""
+        if not (isinstance(q, dict) and "question" in q and "options" in q and "answer" in q):
+            return None
+        return {
+            "question": str(q["question"]),
+            "options": list(q["options"])[:4] if isinstance(q["options"], list) else [],
+            "answer": str(q["answer"]),
+            "difficulty": str(q.get("difficulty", "medium")).lower(),
+            "explanation": str(q["explanation"]) if q.get("explanation") else None,
+            "section": str(q["section"]) if q.get("section") else None,
+            "sort_order": index,
+        }
+
+    @staticmethod
+    def _normalize_key_entities(key_entities: Any) -> dict:
         if isinstance(key_entities, dict):
-            key_entities = {
+            return {
                 "people": list(key_entities.get("people", []) or []),
                 "organizations": list(key_entities.get("organizations", []) or []),
                 "locations": list(key_entities.get("locations", []) or []),
             }
-        else:
-            key_entities = {"people": [], "organizations": [], "locations": []}
-        
-        # Validate and normalize quiz items
-        validated_quiz = []
-        for i, q in enumerate(quiz):
-            if isinstance(q, dict) and "question" in q and "options" in q and "answer" in q:
-                validated_quiz.append({
-                    "question": str(q["question"]),
-                    "options": list(q["options"])[:4] if isinstance(q["options"], list) else [],
-                    "answer": str(q["answer"]),
-                    "difficulty": str(q.get("difficulty", "medium")).lower(),
-                    "explanation": str(q["explanation"]) if q.get("explanation") else None,
-                    "section": str(q["section"]) if q.get("section") else None,
-                    "sort_order": i,
-                })
-        
-        return {
-            "quiz": validated_quiz,
-            "related_topics": [str(t) for t in related_topics] if isinstance(related_topics, list) else [],
-            "key_entities": key_entities,
-        }
+        return {"people": [], "organizations": [], "locations": []}
+
+    @staticmethod
+    def _normalize_related_topics(related_topics: Any) -> list[str]:
+        return [str(t) for t in related_topics] if isinstance(related_topics, list) else []
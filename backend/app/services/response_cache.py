@@ -0,0 +1,89 @@
+"""
+Byte-level cache of serialized quiz detail responses.
+Stored quizzes never change after generate_quiz commits them, so the encoded JSON
+body is cached per quiz id together with a strong ETag. Hits skip the database,
+ORM and pydantic entirely; If-None-Match revalidation answers 304 with no body.
+Memory is bounded by total body size (LRU eviction).
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Response
+
+from ..config import get_settings
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Weak comparison as required for If-None-Match (RFC 9110 13.1.2)."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+        return self.etag in tags
+
+    def to_response(self, if_none_match: Optional[str] = None) -> Response:
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}
+        if self.matches(if_none_match):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+
+class ResponseCache:
+    """Thread-safe LRU of CachedResponse keyed by quiz id, bounded by total body bytes."""
+    
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[int, CachedResponse] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: int) -> Optional[CachedResponse]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                self._data.move_to_end(key)
+            return item
+    
+    def put(self, key: int, body: bytes) -> CachedResponse:
+        item = CachedResponse(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+        if len(body) > self.max_bytes:
+            return item  # too large (or cache disabled): serve without caching
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+            self._data[key] = item
+            self._size += len(body)
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted.body)
+        return item
+    
+    def invalidate(self, key: int) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._size -= len(old.body)
+    
+    @property
+    def size_bytes(self) -> int:
+        return self._size
+    
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+@lru_cache
+def get_response_cache() -> ResponseCache:
+    """Shared quiz-detail response cache sized from Settings."""
+    return ResponseCache(max_bytes=get_settings().RESPONSE_CACHE_MAX_MB * 1024 * 1024)
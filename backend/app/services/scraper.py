@@ -1,13 +1,102 @@
 """
-Wikipedia article scraper using BeautifulSoup.
+Wikipedia article scraper (BeautifulSoup or lxml extraction, see extractors.py).
 Uses HTML scraping only - NO Wikipedia API.
 """
+import asyncio
+import html as html_lib
 import re
+import httpx
 import requests
-from bs4 import BeautifulSoup
 from typing import Optional
 from urllib.parse import urlparse
 
+from ..config import get_settings
+from . import metrics
+from .canonical import canonical_key_from_url
+from .extractors import get_extractor
+from .page_cache import PageCache, get_page_cache
+from .ttl_cache import TTLCache
+
+
+DEFAULT_USER_AGENT = "WikiQuizGenerator/1.0 (Educational)"
+
+# Process-wide async client so every request reuses the same connection pool
+_async_client: Optional[httpx.AsyncClient] = None
+_title_cache: Optional[TTLCache] = None
+
+# Streaming title preview: stop reading as soon as one of these has been seen
+_HEADING_RE = re.compile(r"<h1\b[^>]*\bid=[\"']firstHeading[\"'][^>]*>(.*?)</h1>", re.IGNORECASE | re.DOTALL)
+_TITLE_TAG_RE = re.compile(r"<title\b[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_TITLE_SUFFIX_RE = re.compile(r"\s+[-\u2013\u2014]\s+Wikipedia\s*$")
+PREVIEW_MAX_BYTES = 512 * 1024
+PREVIEW_CHUNK_SIZE = 8192
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """Return the shared pooled async HTTP client (created on first use)."""
+    global _async_client
+    if _async_client is None or _async_client.is_closed:
+        settings = get_settings()
+        _async_client = httpx.AsyncClient(
+            headers={"User-Agent": DEFAULT_USER_AGENT},
+            timeout=settings.HTTP_TIMEOUT_SECONDS,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            ),
+        )
+    return _async_client
+
+
+def get_title_cache() -> TTLCache:
+    """Shared in-memory cache of article titles for /api/preview."""
+    global _title_cache
+    if _title_cache is None:
+        settings = get_settings()
+        _title_cache = TTLCache(
+            max_entries=settings.TITLE_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.TITLE_CACHE_TTL_SECONDS,
+        )
+    return _title_cache
+
+
+def _match_title(text: str, start: int = 0) -> Optional[str]:
+    """Title from <h1 id="firstHeading"> or <title> found at or after start."""
+    match = _HEADING_RE.search(text, start)
+    if match:
+        title = match.group(1)
+    else:
+        match = _TITLE_TAG_RE.search(text, start)
+        if not match:
+            return None
+        title = _TITLE_SUFFIX_RE.sub("", match.group(1))
+    return html_lib.unescape(_TAG_RE.sub("", title)).strip() or None
+
+
+class _TitleScanner:
+    """Feed decoded chunks; reports the title as soon as the heading or <title> closes."""
+    
+    def __init__(self):
+        self.buffer = ""
+        self.title: Optional[str] = None
+    
+    def feed(self, chunk: str) -> bool:
+        # Re-scan a small overlap so a tag split across chunks is still found
+        start = max(0, len(self.buffer) - 1024)
+        self.buffer += chunk
+        self.title = _match_title(self.buffer, start)
+        return self.title is not None or len(self.buffer) >= PREVIEW_MAX_BYTES
+
+
+async def close_async_client() -> None:
+    """Close the shared async HTTP client (called on app shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
 
 class WikipediaScraper:
     """Scrapes Wikipedia article content from HTML."""
@@ -17,9 +106,24 @@ class WikipediaScraper:
         re.IGNORECASE
     )
     
-    def __init__(self, user_agent: str = "WikiQuizGenerator/1.0 (Educational)"):
-        self.session = requests.Session()
+    def __init__(
+        self,
+        user_agent: str = DEFAULT_USER_AGENT,
+        async_client: Optional[httpx.AsyncClient] = None,
+        page_cache: Optional[PageCache] = None,
+        extractor: Optional[str] = None,
+        session: Optional[requests.Session] = None,
+    ):
+        # Pass a long-lived session (see ServiceContainer) to keep connections alive across scrapers
+        self.session = session or requests.Session()
         self.session.headers.update({"User-Agent": user_agent})
+        self._async_client = async_client
+        self.page_cache = page_cache or get_page_cache()
+        self.extractor = get_extractor(extractor or get_settings().HTML_EXTRACTOR)
+    
+    @property
+    def async_client(self) -> httpx.AsyncClient:
+        return self._async_client or get_async_client()
     
     def is_valid_wikipedia_url(self, url: str) -> bool:
         """Validate that URL is a Wikipedia article URL."""
@@ -35,85 +139,145 @@ class WikipediaScraper:
         except Exception:
             return False
     
+    def canonical_key(self, url: str) -> Optional[str]:
+        """Stable article key (e.g. "en:Alan_Turing") for a valid Wikipedia URL, else None."""
+        if not self.is_valid_wikipedia_url(url):
+            return None
+        return canonical_key_from_url(url)
+    
     def fetch_title_only(self, url: str) -> str:
-        """Lightweight fetch - returns only the article title for URL preview."""
+        """
+        Lightweight fetch - returns only the article title for URL preview.
+        Served from the in-memory title cache or the page cache when possible; otherwise the
+        page is streamed and the download stops as soon as the heading or <title> is seen.
+        """
         if not self.is_valid_wikipedia_url(url):
             raise ValueError(f"Invalid Wikipedia URL: {url}")
-        response = self.session.get(url, timeout=10)
-        response.raise_for_status()
-        response.encoding = "utf-8"
-        soup = BeautifulSoup(response.text, "html.parser")
-        title_elem = soup.find("h1", {"id": "firstHeading"}) or soup.find("h1")
-        return title_elem.get_text(strip=True) if title_elem else "Unknown"
+        cache_key = self.canonical_key(url) or url
+        title = get_title_cache().get(cache_key) or self._cached_page_title(url)
+        if title is None:
+            scanner = _TitleScanner()
+            with self.session.get(url, timeout=10, stream=True) as response:
+                response.raise_for_status()
+                response.encoding = "utf-8"
+                for chunk in response.iter_content(chunk_size=PREVIEW_CHUNK_SIZE, decode_unicode=True):
+                    if scanner.feed(chunk):
+                        break
+            title = scanner.title or "Unknown"
+        get_title_cache().set(cache_key, title)
+        return title
+    
+    async def afetch_title_only(self, url: str) -> str:
+        """Async variant of fetch_title_only using the shared connection pool."""
+        if not self.is_valid_wikipedia_url(url):
+            raise ValueError(f"Invalid Wikipedia URL: {url}")
+        cache_key = self.canonical_key(url) or url
+        title = get_title_cache().get(cache_key)
+        if title is None and self.page_cache:
+            title = await asyncio.to_thread(self._cached_page_title, url)
+        if title is None:
+            scanner = _TitleScanner()
+            async with self.async_client.stream("GET", url, timeout=10) as response:
+                response.raise_for_status()
+                response.encoding = "utf-8"
+                async for chunk in response.aiter_text(PREVIEW_CHUNK_SIZE):
+                    if scanner.feed(chunk):
+                        break
+            title = scanner.title or "Unknown"
+        get_title_cache().set(cache_key, title)
+        return title
+    
+    def _cached_page_title(self, url: str) -> Optional[str]:
+        """Title from a previously downloaded copy of the page, if the page cache has one."""
+        cached = self.page_cache.get(url) if self.page_cache else None
+        return _match_title(cached.body) if cached else None
     
     def fetch_and_parse(self, url: str) -> dict:
         """
         Fetch Wikipedia page and extract structured content.
-        Returns dict with: title, summary, sections, content, raw_html, key_entities
+        Returns dict with: title, summary, sections, content, raw_html, key_entities, canonical_url
         """
         if not self.is_valid_wikipedia_url(url):
             raise ValueError(f"Invalid Wikipedia URL: {url}")
         
-        response = self.session.get(url, timeout=15)
-        response.raise_for_status()
-        response.encoding = "utf-8"
-        html = response.text
-        soup = BeautifulSoup(html, "html.parser")
-        
-        # Remove unwanted elements
-        for tag in soup.find_all(["script", "style", "nav", "footer"]):
-            tag.decompose()
-        for tag in soup.select(".navbox, .infobox, .metadata, .noprint"):
-            tag.decompose()
-        
-        # Get title
-        title_elem = soup.find("h1", {"id": "firstHeading"}) or soup.find("h1")
-        title = title_elem.get_text(strip=True) if title_elem else "Unknown"
-        
-        # Get main content div
-        content_div = soup.find("div", {"id": "mw-content-text"}) or soup.find("div", {"class": "mw-parser-output"})
-        if not content_div:
-            raise ValueError("Could not find article content")
-        
-        # Extract sections
-        sections = []
-        section_content = {}
-        current_section = "Introduction"
-        current_text = []
+        with metrics.stage("fetch"):
+            html, final_url = self._get_html(url, timeout=15)
+        with metrics.stage("parse"):
+            parsed = self.parse_html(html)
+        parsed["canonical_url"] = parsed["canonical_url"] or final_url
+        return parsed
+    
+    async def afetch_and_parse(self, url: str) -> dict:
+        """
+        Async variant of fetch_and_parse.
+        The download is non-blocking; HTML parsing runs in a worker thread.
+        """
+        if not self.is_valid_wikipedia_url(url):
+            raise ValueError(f"Invalid Wikipedia URL: {url}")
         
-        for elem in content_div.find_all(["h2", "h3", "p", "ul", "li"])[:120]:
-            if elem.name in ("h2", "h3"):
-                if current_text:
-                    section_content[current_section] = " ".join(current_text)
-                span = elem.find("span", {"class": "mw-headline"})
-                current_section = span.get_text(strip=True) if span else elem.get_text(strip=True)
-                if current_section and current_section not in ("Contents", "See also", "References", "External links"):
-                    sections.append(current_section)
-                current_text = []
-            elif elem.name in ("p", "li"):
-                text = elem.get_text(strip=True)
-                if text and len(text) > 20:
-                    current_text.append(text)
+        with metrics.stage("fetch"):
+            html, final_url = await self._aget_html(url, timeout=15)
+        with metrics.stage("parse"):
+            parsed = await asyncio.to_thread(self.parse_html, html)
+        parsed["canonical_url"] = parsed["canonical_url"] or final_url
+        return parsed
+    
+    def _get_html(self, url: str, timeout: float) -> tuple[str, str]:
+        """Download a page through the page cache. Returns (html, final_url)."""
+        cached = self.page_cache.get(url) if self.page_cache else None
+        if cached and cached.is_fresh(self.page_cache.ttl_seconds):
+            metrics.cache_result("page", "hit")
+            return cached.body, cached.final_url
         
-        if current_text:
-            section_content[current_section] = " ".join(current_text)
+        response = self.session.get(url, timeout=timeout, headers=cached.validators() if cached else None)
+        if cached and response.status_code == 304:
+            metrics.cache_result("page", "revalidated")
+            self.page_cache.mark_revalidated(url)
+            return cached.body, cached.final_url
+        if self.page_cache:
+            metrics.cache_result("page", "miss")
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        if self.page_cache:
+            self.page_cache.put(
+                url,
+                response.text,
+                final_url=response.url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return response.text, response.url
+    
+    async def _aget_html(self, url: str, timeout: float) -> tuple[str, str]:
+        """Async variant of _get_html (cache I/O runs in a worker thread)."""
+        cached = await asyncio.to_thread(self.page_cache.get, url) if self.page_cache else None
+        if cached and cached.is_fresh(self.page_cache.ttl_seconds):
+            metrics.cache_result("page", "hit")
+            return cached.body, cached.final_url
         
-        # Build full content (truncate for LLM context)
-        full_content = "\n\n".join(
-            f"## {sec}\n{section_content.get(sec, '')}"
-            for sec in ["Introduction"] + [s for s in sections if s != "Introduction"]
-            if section_content.get(sec)
+        response = await self.async_client.get(
+            url, timeout=timeout, headers=cached.validators() if cached else None
         )
-        
-        # Summary: first few paragraphs
-        intro = section_content.get("Introduction", "")
-        summary = intro[:800] + "..." if len(intro) > 800 else intro
-        
-        return {
-    "title": title,
-    "summary": summary,
-    "sections": sections[:10],
-    "content": full_content[:5000],
-    "raw_html": html[:30000] if html else None,
-    "key_entities": None,
-}
+        if cached and response.status_code == 304:
+            metrics.cache_result("page", "revalidated")
+            await asyncio.to_thread(self.page_cache.mark_revalidated, url)
+            return cached.body, cached.final_url
+        if self.page_cache:
+            metrics.cache_result("page", "miss")
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        final_url = str(response.url)
+        if self.page_cache:
+            await asyncio.to_thread(
+                self.page_cache.put,
+                url,
+                response.text,
+                final_url=final_url,
+                etag=response.headers.get("ETag"),
+                last_modified=response.headers.get("Last-Modified"),
+            )
+        return response.text, final_url
+    
+    def parse_html(self, html: str) -> dict:
+        """Extract title, summary, sections and content from article HTML."""
+        return self.extractor.extract(html)
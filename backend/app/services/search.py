@@ -0,0 +1,258 @@
+"""
+Full-text search over quiz history (GET /api/quizzes/search).
+The quiz_search index holds one row per quiz: title, summary, related topics and the
+question texts. SQLite uses an FTS5 table ranked by bm25 (title weighted highest),
+MySQL FULLTEXT indexes ranked by relevance. On SQLite the newest SEARCH_RANK_WINDOW
+matches come first, ranked; older matches follow, ranked among themselves, so scoring
+all of a common word's matches only happens for someone paging past the window.
+Pages continue from a (tier, score, quiz id) keyset cursor, not an offset.
+Rows are written in the same transaction as the quiz (index_quiz) and removed with it by
+a delete trigger; migration 0004 backfills existing quizzes. Other databases fall back to an unindexed title match.
+"""
+import base64
+import binascii
+import json
+import re
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import Float, Integer, column, literal, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_settings
+from ..models import WikiQuiz
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+# Longer queries are cut to their first terms (each term is one posting-list lookup)
+MAX_TERMS = 8
+
+# bm25 weights per column: title, summary, related_topics, questions (lower score = better)
+_FTS5_SCORE = "bm25(quiz_search, 10.0, 2.0, 4.0, 1.0)"
+_MYSQL_COLUMNS = "title, summary, related_topics, questions"
+
+# Upserts: a quiz id SQLite reuses after a delete must not collide with a stale row
+_INSERT = {
+    "sqlite": "INSERT OR REPLACE INTO quiz_search (rowid, title, summary, related_topics, questions) "
+              "VALUES (:id, :title, :summary, :related_topics, :questions)",
+    "mysql": "REPLACE INTO quiz_search (quiz_id, title, summary, related_topics, questions) "
+             "VALUES (:id, :title, :summary, :related_topics, :questions)",
+}
+
+# Rows after the cursor in (score, quiz_id DESC) order; no cursor = from the start
+_AFTER = ":last_id IS NULL OR score > :score OR (score = :score AND quiz_id < :last_id)"
+
+_RANKED = {
+    # bm25 costs ~10us per match, so a tier scores only the rowids in (:lo, :hi]
+    "sqlite": f"SELECT quiz_id, score FROM (SELECT rowid AS quiz_id, {_FTS5_SCORE} AS score "
+              f"FROM quiz_search WHERE quiz_search MATCH :q AND rowid > :lo AND rowid <= :hi) "
+              f"WHERE {_AFTER} ORDER BY score, quiz_id DESC LIMIT :limit",
+    "mysql": f"SELECT quiz_id, score FROM (SELECT quiz_id, -(MATCH(title) AGAINST(:q IN BOOLEAN MODE) * 4 "
+             f"+ MATCH({_MYSQL_COLUMNS}) AGAINST(:q IN BOOLEAN MODE)) AS score FROM quiz_search "
+             f"WHERE MATCH({_MYSQL_COLUMNS}) AGAINST(:q IN BOOLEAN MODE)) AS matches "
+             f"WHERE {_AFTER} ORDER BY score, quiz_id DESC LIMIT :limit",  # InnoDB scores every match itself
+}
+
+# Newest rowid below the newest :window matches, found walking the doclist backwards (no scoring)
+_WINDOW_FLOOR = (
+    "SELECT rowid FROM quiz_search WHERE quiz_search MATCH :q ORDER BY rowid DESC LIMIT 1 OFFSET :window"
+)
+_NO_ROWID_LIMIT = 2**62
+
+
+# Index rows go with their quiz, however it is deleted
+_DELETE_TRIGGER = {
+    "sqlite": "CREATE TRIGGER IF NOT EXISTS wiki_quizzes_search_delete AFTER DELETE ON wiki_quizzes "
+              "BEGIN DELETE FROM quiz_search WHERE rowid = old.id; END",
+    "mysql": "CREATE TRIGGER wiki_quizzes_search_delete AFTER DELETE ON wiki_quizzes "
+             "FOR EACH ROW DELETE FROM quiz_search WHERE quiz_id = OLD.id",
+}
+
+
+class SearchCursor(NamedTuple):
+    """
+    Position after a page's last row: rank tier (0 = newest matches), score and quiz id,
+    plus the first page's tier boundary (0 = one tier), kept so that quizzes added
+    meanwhile do not move rows from one tier into the other. (Adding quizzes still
+    shifts bm25 scores slightly, so a row near a page boundary may repeat.)
+    """
+    tier: int
+    score: float
+    quiz_id: int
+    floor: int
+
+
+def encode_cursor(cursor: SearchCursor) -> str:
+    raw = f"{cursor.tier}|{cursor.score!r}|{cursor.quiz_id}|{cursor.floor}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(value: str) -> SearchCursor:
+    """ValueError for anything encode_cursor did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(value + "=" * (-len(value) % 4)).decode()
+        tier, score, quiz_id, floor = raw.split("|")
+        cursor = SearchCursor(int(tier), float(score), int(quiz_id), int(floor))
+    except (UnicodeDecodeError, binascii.Error) as e:
+        raise ValueError(str(e))
+    if cursor.tier not in (0, 1) or cursor.floor < 0 or cursor.score != cursor.score:  # NaN
+        raise ValueError("cursor out of range")
+    return cursor
+
+
+def _dialect(name: str) -> Optional[str]:
+    """Search engine for a database dialect ("sqlite" = FTS5, "mysql" = FULLTEXT), or None."""
+    return name if name in _INSERT else None
+
+
+def create_search_index(conn: Connection) -> None:
+    dialect = _dialect(conn.dialect.name)
+    if dialect == "sqlite":
+        conn.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS quiz_search USING fts5("
+            "title, summary, related_topics, questions, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+    elif dialect == "mysql":
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS quiz_search ("
+            "quiz_id INT NOT NULL PRIMARY KEY, title VARCHAR(256) NOT NULL, summary TEXT, "
+            "related_topics TEXT, questions MEDIUMTEXT, "
+            f"FULLTEXT KEY ft_quiz_search ({_MYSQL_COLUMNS}), FULLTEXT KEY ft_quiz_search_title (title)"
+            ") ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"
+        ))
+    create_delete_trigger(conn)
+
+
+def create_delete_trigger(conn: Connection) -> None:
+    """Drop a quiz's index row when the quiz is deleted (idempotent)."""
+    dialect = _dialect(conn.dialect.name)
+    if dialect == "mysql":
+        conn.execute(text("DROP TRIGGER IF EXISTS wiki_quizzes_search_delete"))
+    if dialect:
+        conn.execute(text(_DELETE_TRIGGER[dialect]))
+
+
+def search_document(
+    quiz_id: int,
+    title: str,
+    summary: Optional[str],
+    related_topics: Optional[Iterable[str]],
+    questions: Iterable[str],
+) -> dict:
+    return {
+        "id": quiz_id,
+        "title": title,
+        "summary": summary or "",
+        "related_topics": "\n".join(related_topics or []),
+        "questions": "\n".join(questions),
+    }
+
+
+async def index_quiz(db: AsyncSession, document: dict) -> None:
+    """Add a new quiz to the index, replacing any row under its id (part of the caller's transaction)."""
+    dialect = _dialect(db.get_bind().dialect.name)
+    if dialect:
+        await db.execute(text(_INSERT[dialect]), document)
+
+
+def backfill_search_index(conn: Connection) -> None:
+    """Create the index and (re)build it from every stored quiz."""
+    dialect = _dialect(conn.dialect.name)
+    if not dialect:
+        return
+    create_search_index(conn)
+    conn.execute(text("DELETE FROM quiz_search"))
+    questions: dict[int, list[str]] = {}
+    for quiz_id, question in conn.execute(
+        text("SELECT wiki_quiz_id, question FROM quiz_questions ORDER BY wiki_quiz_id, sort_order")
+    ):
+        questions.setdefault(quiz_id, []).append(question)
+    rows = conn.execute(text("SELECT id, title, summary, related_topics FROM wiki_quizzes")).all()
+    documents = [
+        search_document(
+            quiz_id,
+            title,
+            summary,
+            json.loads(related_topics) if isinstance(related_topics, str) else related_topics,
+            questions.get(quiz_id, []),
+        )
+        for quiz_id, title, summary, related_topics in rows
+    ]
+    if documents:
+        conn.execute(text(_INSERT[dialect]), documents)
+
+
+def match_query(query: str, dialect: str) -> Optional[str]:
+    """
+    User input -> engine query: every term must match, the last one as a prefix
+    (search-as-you-type). Terms are quoted, so operators in the input are plain text.
+    """
+    terms = _TERM.findall(query.lower())[:MAX_TERMS]
+    if not terms:
+        return None
+    if dialect == "mysql":
+        return " ".join(f"+{t}" for t in terms) + "*"
+    return " ".join(f'"{t}"' for t in terms) + "*"
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_quizzes(
+    db: AsyncSession, query: str, limit: int, after: Optional[SearchCursor] = None
+) -> list:
+    """
+    History rows (id, url, title, created_at, question_count, tier, score, floor) matching
+    query, best first, starting after the cursor; SearchCursor(row.tier, row.score, row.id,
+    row.floor) of the last row continues there.
+    """
+    columns = (WikiQuiz.id, WikiQuiz.url, WikiQuiz.title, WikiQuiz.created_at, WikiQuiz.question_count)
+    dialect = _dialect(db.get_bind().dialect.name)
+    if dialect is None:
+        # Newest first, every row scoring 0
+        stmt = (
+            select(*columns, literal(0).label("tier"), literal(0.0).label("score"), literal(0).label("floor"))
+            .where(WikiQuiz.title.ilike(f"%{_escape_like(query.strip())}%", escape="\\"))
+            .order_by(WikiQuiz.id.desc())
+            .limit(limit)
+        )
+        if after is not None:
+            stmt = stmt.where(WikiQuiz.id < after.quiz_id)
+        return (await db.execute(stmt)).all()
+    q = match_query(query, dialect)
+    if q is None:
+        return []
+    # Rowid ranges ranked one after the other: the newest window, then everything older
+    if after is not None:
+        floor = after.floor
+    else:
+        window = get_settings().SEARCH_RANK_WINDOW
+        floor = 0
+        if dialect == "sqlite" and window > 0:
+            floor = (await db.execute(text(_WINDOW_FLOOR), {"q": q, "window": window})).scalar() or 0
+    tiers = [(floor, _NO_ROWID_LIMIT), (0, floor)] if floor else [(0, _NO_ROWID_LIMIT)]
+    rows = []
+    for tier, (lo, hi) in enumerate(tiers):
+        if after is not None and tier < after.tier:
+            continue
+        keyset = after if after is not None and tier == after.tier else None
+        params = {
+            "q": q, "lo": lo, "hi": hi, "limit": limit - len(rows),
+            "score": keyset.score if keyset else None, "last_id": keyset.quiz_id if keyset else None,
+        }
+        ranked = (
+            text(_RANKED[dialect])
+            .bindparams(**params)
+            .columns(column("quiz_id", Integer), column("score", Float))
+            .subquery("ranked")
+        )
+        stmt = (
+            select(*columns, literal(tier).label("tier"), ranked.c.score, literal(floor).label("floor"))
+            .join(ranked, WikiQuiz.id == ranked.c.quiz_id)
+            .order_by(ranked.c.score, WikiQuiz.id.desc())
+        )
+        rows += (await db.execute(stmt)).all()
+        if len(rows) >= limit:
+            break
+    return rows
@@ -0,0 +1,118 @@
+"""
+Single-flight coordination for expensive per-article work.
+- SingleFlight: coalesces concurrent callers inside one process onto one task.
+- DB leases: a row in generation_leases marks which worker process owns the work,
+  so other uvicorn workers wait for the result instead of duplicating it. The holder
+  renews it (heartbeat) for as long as the work runs, so only a dead holder's lease expires.
+"""
+import asyncio
+import contextlib
+import logging
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database import AsyncSessionLocal
+from ..models import GenerationLease
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def new_lease_owner() -> str:
+    """Unique owner id for one lease attempt (host:pid:random)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:12]}"
+
+
+class SingleFlight:
+    """Share one in-flight task between all concurrent callers with the same key."""
+    
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        # shield: one caller disconnecting must not cancel the work for the others
+        return await asyncio.shield(task)
+    
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+
+async def try_acquire_lease(db: AsyncSession, key: str, owner: str, ttl_seconds: float) -> bool:
+    """Take the lease for key if it is free or expired. Returns True when acquired."""
+    now = _utcnow()
+    expires_at = now + timedelta(seconds=ttl_seconds)
+    db.add(GenerationLease(key=key, owner=owner, expires_at=expires_at))
+    try:
+        await db.commit()
+        return True
+    except IntegrityError:
+        await db.rollback()
+    
+    # Row exists: steal it only if the previous holder let it expire
+    result = await db.execute(
+        update(GenerationLease)
+        .where(GenerationLease.key == key, GenerationLease.expires_at < now)
+        .values(owner=owner, expires_at=expires_at)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def release_lease(db: AsyncSession, key: str, owner: str) -> None:
+    """Drop the lease if we still own it."""
+    await db.execute(
+        delete(GenerationLease).where(GenerationLease.key == key, GenerationLease.owner == owner)
+    )
+    await db.commit()
+
+
+async def renew_lease(key: str, owner: str, ttl_seconds: float) -> bool:
+    """Push our lease's expiry ttl_seconds out. False if we no longer hold it."""
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            update(GenerationLease)
+            .where(GenerationLease.key == key, GenerationLease.owner == owner)
+            .values(expires_at=_utcnow() + timedelta(seconds=ttl_seconds))
+        )
+        await db.commit()
+        return result.rowcount == 1
+
+
+@contextlib.asynccontextmanager
+async def heartbeat(renew: Callable[[], Awaitable[bool]], interval: float, what: str) -> AsyncIterator[None]:
+    """Call renew() every interval seconds while the block runs (own task and DB session)."""
+
+    async def beat() -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if not await renew():
+                    logger.warning("Lost the lease on %s; another worker may take it over", what)
+                    return
+            except Exception:
+                logger.exception("Lease renewal for %s failed", what)
+
+    task = asyncio.create_task(beat())
+    try:
+        yield
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
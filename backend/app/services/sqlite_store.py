@@ -0,0 +1,167 @@
+"""
+Size-bounded on-disk LRU store behind the page cache and the LLM result cache: one
+SQLite file per cache, zlib-compressed bodies plus a little JSON metadata per key.
+- Reads do not write: access times are buffered in memory and written in batches
+  (TOUCH_FLUSH_SIZE entries or TOUCH_FLUSH_SECONDS, and before evicting).
+- The stored size is tracked in memory, so a put only counts the table when the bound
+  may have been crossed; eviction then walks the accessed_at index oldest first.
+  Writes by other processes sharing the file are picked up by recounting every
+  RESYNC_PUTS puts.
+- Rows written under another `version` (e.g. a changed prompt) are dropped on open, and
+  a table with an outdated layout is recreated: the contents are only a cache.
+"""
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+TOUCH_FLUSH_SIZE = 256
+TOUCH_FLUSH_SECONDS = 5.0
+RESYNC_PUTS = 100
+EVICT_BATCH = 64
+
+_COLUMNS = ("key", "version", "created_at", "accessed_at", "size", "meta", "body")
+
+
+@dataclass
+class StoredEntry:
+    body: bytes
+    meta: dict
+    created_at: float
+
+
+class SQLiteLRUStore:
+    """key -> (body, meta) with LRU eviction over total compressed size."""
+
+    def __init__(self, path: str | Path, table: str, max_bytes: int, version: str = ""):
+        self.table = table
+        self.max_bytes = max_bytes
+        self.version = version
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        columns = tuple(row[1] for row in self._conn.execute(f"PRAGMA table_info({table})"))
+        if columns and columns != _COLUMNS:
+            self._conn.execute(f"DROP TABLE {table}")
+        self._conn.execute(
+            f"""CREATE TABLE IF NOT EXISTS {table} (
+                key TEXT PRIMARY KEY,
+                version TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                size INTEGER NOT NULL,
+                meta TEXT NOT NULL,
+                body BLOB NOT NULL
+            )"""
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_accessed_at ON {table} (accessed_at)")
+        self._conn.execute(f"DELETE FROM {table} WHERE version != ?", (version,))
+        self._conn.commit()
+        self._touched: dict[str, float] = {}
+        self._flushed_at = time.monotonic()
+        self._puts = 0
+        self._total = self._count()
+
+    def get(self, key: str) -> Optional[StoredEntry]:
+        """Return the entry and mark it recently used."""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT created_at, meta, body FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._touch(key)
+        created_at, meta, body = row
+        return StoredEntry(body=zlib.decompress(body), meta=json.loads(meta), created_at=created_at)
+
+    def put(self, key: str, body: bytes, meta: Optional[dict] = None) -> None:
+        """Store (or replace) an entry, then evict least-recently-used ones over the size bound."""
+        data = zlib.compress(body, 6)
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(f"SELECT size FROM {self.table} WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} ({', '.join(_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, self.version, now, now, len(data), json.dumps(meta or {}), data),
+            )
+            self._touched.pop(key, None)
+            self._total += len(data) - (old[0] if old else 0)
+            self._puts += 1
+            if self._puts % RESYNC_PUTS == 0:
+                self._total = self._count()
+            if self._total > self.max_bytes:
+                self._evict()
+            self._conn.commit()
+
+    def refresh(self, key: str) -> None:
+        """Restart an entry's age (e.g. after the origin confirmed it is unchanged)."""
+        now = time.time()
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute(
+                f"UPDATE {self.table} SET created_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+            self._conn.commit()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._touched.pop(key, None)
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+            self._total = self._count()
+
+    def delete_older_than(self, created_before: float) -> None:
+        """Drop every entry created before the given time (a full scan: call rarely)."""
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE created_at < ?", (created_before,))
+            self._conn.commit()
+            self._total = self._count()
+
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._count()
+
+    def _count(self) -> int:
+        return self._conn.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.table}").fetchone()[0]
+
+    def _touch(self, key: str) -> None:
+        self._touched[key] = time.time()
+        if len(self._touched) >= TOUCH_FLUSH_SIZE or time.monotonic() - self._flushed_at >= TOUCH_FLUSH_SECONDS:
+            self._flush_touches()
+            self._conn.commit()
+
+    def _flush_touches(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?",
+                [(at, key) for key, at in self._touched.items()],
+            )
+            self._touched.clear()
+        self._flushed_at = time.monotonic()
+
+    def _evict(self) -> None:
+        self._flush_touches()
+        self._total = self._count()  # the in-memory figure misses other processes' writes
+        while self._total > self.max_bytes:
+            rows = self._conn.execute(
+                f"SELECT key, size FROM {self.table} ORDER BY accessed_at LIMIT ?", (EVICT_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._total -= size
+                if self._total <= self.max_bytes:
+                    break
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touches()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1 @@
+# Benchmarks and parity checks (run from backend/: python -m benchmarks.<name>)
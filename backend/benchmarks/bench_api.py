@@ -0,0 +1,300 @@
+"""
+Hermetic load test of the HTTP API: the real app (hermetic_app.py, own process, temporary
+database and caches) against the local fake Wikipedia and fake LLM servers, so results
+depend only on the code and the configured latencies. Scenarios, run in order, each
+--requests requests (--generate-requests for generation) from --concurrency clients:
+- generate:        POST /api/generate, every URL a new article (fetch, parse, LLM, store)
+- generate_cached: the same URLs again (stored quiz lookup)
+- preview:         GET /api/preview on new articles (streamed title fetch)
+- list:            GET /api/quizzes?limit=50
+- detail:          GET /api/quizzes/{id} over the generated quizzes
+- generate_quota:  --quota-requests new articles through a second app that keeps the
+                   default Groq quota (GROQ_RPM / GROQ_TPM); the others run with the
+                   quota off so they measure the code rather than the limiter's queue
+Reports throughput, p50/p95/p99 latency and the app's resident memory after each scenario.
+--save-baseline NAME stores the results in benchmarks/baselines/NAME.json; --compare NAME
+prints the change against it and exits 1 when p95 or throughput is worse than --tolerance.
+Baselines are only meaningful on the machine that recorded them (benchmarks/baselines/default.json
+comes from a single-CPU Linux box, where run-to-run noise is about 25%).
+
+    python -m benchmarks.bench_api [--concurrency 8] [--llm-latency 0.3] [--compare default]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+import httpx
+import uvicorn
+
+from .fake_llm import FakeLLMConfig
+from .fake_wikipedia import FakeWikipediaConfig, create_app, variant_url
+from .fixtures import tested_urls
+from .llm_resilience import start_server
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+SCENARIOS = ("generate", "generate_cached", "preview", "list", "detail", "generate_quota")
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def rss_mb(pid: int) -> tuple[Optional[float], Optional[float]]:
+    """(current, peak) resident memory of a process in MB, where the platform tells."""
+    if psutil is not None:
+        info = psutil.Process(pid).memory_info()
+        peak = getattr(info, "peak_wset", None)  # Windows only
+        return info.rss / 2**20, peak / 2**20 if peak else None
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None, None
+    fields = dict(line.split(":", 1) for line in status.splitlines() if ":" in line)
+
+    def kb(name: str) -> Optional[float]:
+        return int(fields[name].split()[0]) / 1024 if name in fields else None
+
+    return kb("VmRSS"), kb("VmHWM")
+
+
+def start_wikipedia(config: FakeWikipediaConfig, port: int) -> None:
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+
+def start_app(args, workdir: Path, port: int, quota: bool = False) -> subprocess.Popen:
+    """The app on port; without quota the Groq RPM/TPM limits are off, with it they are the app defaults."""
+    env = dict(
+        os.environ,
+        DATABASE_URL=f"sqlite:///{(workdir / 'bench.db').as_posix()}",
+        ASYNC_DATABASE_URL="",
+        PAGE_CACHE_DIR=(workdir / "pages").as_posix(),
+        LLM_CACHE_ENABLED="false",
+        GROQ_API_KEY="fake-key",
+        GROQ_BASE_URL=f"http://127.0.0.1:{args.llm_port}",
+        LLM_BACKENDS="",
+        GROQ_RPM="0",
+        GROQ_TPM="0",
+        JOB_WORKERS="0",
+        PREFETCH_ENABLED="false",
+        METRICS_ENABLED="false",
+    )
+    if quota:
+        del env["GROQ_RPM"], env["GROQ_TPM"]
+    process = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.hermetic_app", "--port", str(port),
+         "--wikipedia", f"http://127.0.0.1:{args.wikipedia_port}"],
+        cwd=BACKEND_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited with status {process.returncode}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.kill()
+    raise RuntimeError("App did not start within 60s")
+
+
+async def drive(
+    make_request: Callable[[int], Awaitable[httpx.Response]], n: int, concurrency: int
+) -> tuple[list[float], int, float]:
+    """Closed loop: concurrency clients, each sending its next request when the last one completes."""
+    latencies: list[float] = []
+    errors = 0
+    counter = itertools.count()
+
+    async def client() -> None:
+        nonlocal errors
+        while (i := next(counter)) < n:
+            started = time.perf_counter()
+            try:
+                response = await make_request(i)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            errors += not ok
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - started
+
+
+async def run(args, pid: int, port: int, scenarios: list[str]) -> dict:
+    bases = tested_urls()
+
+    def urls(n: int, offset: int) -> list[str]:
+        return [variant_url(bases[i % len(bases)], offset + i // len(bases)) for i in range(n)]
+
+    # Distinct articles per scenario: re-titled copies of the fixtures
+    generate_urls = urls(args.generate_requests, 0)
+    preview_urls = urls(args.requests, args.generate_requests)
+    quota_urls = urls(args.quota_requests, args.generate_requests + args.requests)
+    quiz_ids: list[int] = []
+    rng = random.Random(11)
+    timeout = httpx.Timeout(120.0)
+    limits = httpx.Limits(max_connections=args.concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout, limits=limits) as client:
+
+        async def generate(i: int) -> httpx.Response:
+            response = await client.post("/api/generate", json={"url": generate_urls[i]})
+            if response.status_code == 200:
+                quiz_ids.append(response.json()["id"])
+            return response
+
+        requests = {
+            "generate": (generate, args.generate_requests),
+            "generate_cached": (
+                lambda i: client.post("/api/generate", json={"url": generate_urls[i]}),
+                args.generate_requests,
+            ),
+            "preview": (lambda i: client.get("/api/preview", params={"url": preview_urls[i]}), args.requests),
+            "list": (lambda i: client.get("/api/quizzes", params={"limit": 50}), args.requests),
+            "detail": (lambda i: client.get(f"/api/quizzes/{rng.choice(quiz_ids)}"), args.requests),
+            "generate_quota": (
+                lambda i: client.post("/api/generate", json={"url": quota_urls[i]}),
+                args.quota_requests,
+            ),
+        }
+        for name in scenarios:
+            make_request, n = requests[name]
+            latencies, errors, seconds = await drive(make_request, n, args.concurrency)
+            rss, peak = rss_mb(pid)
+            results[name] = {
+                "requests": n,
+                "errors": errors,
+                "rps": round(n / seconds, 1),
+                "p50_ms": round(_percentile(latencies, 50) * 1000, 1),
+                "p95_ms": round(_percentile(latencies, 95) * 1000, 1),
+                "p99_ms": round(_percentile(latencies, 99) * 1000, 1),
+                "rss_mb": rss and round(rss, 1),
+                "peak_rss_mb": peak and round(peak, 1),
+            }
+            report(name, results[name])
+    return results
+
+
+def _mb(value: Optional[float]) -> str:
+    return f"{value:6.0f}MB" if value is not None else "     n/a"
+
+
+def report(name: str, r: dict) -> None:
+    print(
+        f"  {name:15s} {r['requests']:5d} req {r['errors']:3d} err {r['rps']:7.1f} req/s  "
+        f"p50={r['p50_ms']:7.1f}ms p95={r['p95_ms']:7.1f}ms p99={r['p99_ms']:7.1f}ms  "
+        f"rss={_mb(r['rss_mb'])} peak={_mb(r['peak_rss_mb'])}"
+    )
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> bool:
+    """Print the change against a stored baseline; False if any scenario regressed."""
+    ok = True
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        rps = r["rps"] / base["rps"] - 1
+        p95 = r["p95_ms"] / base["p95_ms"] - 1
+        regressed = rps < -tolerance or p95 > tolerance or r["errors"] > base["errors"]
+        ok = ok and not regressed
+        print(
+            f"  {name:15s} req/s {rps:+7.1%}  p95 {p95:+7.1%}  errors {r['errors'] - base['errors']:+d}"
+            f"{'  REGRESSION' if regressed else ''}"
+        )
+    return ok
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Hermetic API load and latency benchmark")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--generate-requests", type=int, default=60)
+    parser.add_argument("--quota-requests", type=int, default=12)
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--llm-latency", type=float, default=0.3)
+    parser.add_argument("--llm-jitter", type=float, default=0.3)
+    parser.add_argument("--wikipedia-latency", type=float, default=0.05)
+    parser.add_argument("--wikipedia-jitter", type=float, default=0.3)
+    parser.add_argument("--app-port", type=int, default=8800)
+    parser.add_argument("--wikipedia-port", type=int, default=8700)
+    parser.add_argument("--llm-port", type=int, default=8600)
+    parser.add_argument("--save-baseline", metavar="NAME")
+    parser.add_argument("--compare", metavar="NAME")
+    parser.add_argument("--tolerance", type=float, default=0.35, help="allowed relative p95/throughput change")
+    args = parser.parse_args()
+    if "generate" not in args.scenarios and {"generate_cached", "detail"} & set(args.scenarios):
+        parser.error("generate_cached and detail need the generate scenario's quizzes")
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads((BASELINE_DIR / f"{args.compare}.json").read_text())
+        if baseline["settings"] != _settings(args):
+            print(f"warning: baseline {args.compare!r} was recorded with {baseline['settings']}")
+
+    start_server(FakeLLMConfig(latency=args.llm_latency, jitter=args.llm_jitter), args.llm_port)
+    start_wikipedia(FakeWikipediaConfig(latency=args.wikipedia_latency, jitter=args.wikipedia_jitter), args.wikipedia_port)
+    results = {}
+    for quota in (False, True):
+        scenarios = [name for name in args.scenarios if (name == "generate_quota") == quota]
+        if not scenarios:
+            continue
+        port = args.app_port + quota
+        app = start_app(args, Path(tempfile.mkdtemp(prefix="wiki_quiz_api_")), port, quota=quota)
+        try:
+            print(
+                f"app pid {app.pid} ({'default' if quota else 'no'} LLM quota), "
+                f"rss at startup {_mb(rss_mb(app.pid)[0]).strip()}; concurrency {args.concurrency}"
+            )
+            results.update(asyncio.run(run(args, app.pid, port, scenarios)))
+        finally:
+            app.terminate()
+            app.wait(timeout=30)
+
+    if args.save_baseline:
+        BASELINE_DIR.mkdir(exist_ok=True)
+        path = BASELINE_DIR / f"{args.save_baseline}.json"
+        record = {"settings": _settings(args), "python": platform.python_version(), "results": results}
+        path.write_text(json.dumps(record, indent=2) + "\n")
+        print(f"baseline saved to {path}")
+    if baseline is not None:
+        print(f"against baseline {args.compare!r} (tolerance {args.tolerance:.0%}):")
+        return 0 if compare(results, baseline, args.tolerance) else 1
+    return 0
+
+
+def _settings(args) -> dict:
+    """The arguments that change the results; a baseline is only comparable under the same ones."""
+    keys = ("concurrency", "requests", "generate_requests", "quota_requests", "llm_latency", "llm_jitter",
+            "wikipedia_latency", "wikipedia_jitter")
+    return {key: getattr(args, key) for key in keys}
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,67 @@
+"""
+Parity check and benchmark for the HTML extraction engines (app/services/extractors.py).
+Every engine must produce exactly the same dict as the reference BeautifulSoup engine
+for each fixture page; the script exits non-zero on any difference.
+
+    python -m benchmarks.bench_extraction [--repeat 20] [--scale 8]
+"""
+import argparse
+import sys
+import time
+
+from app.services.extractors import EXTRACTORS, etree
+from .fixtures import load_pages
+
+
+def check_parity(pages: dict[str, str], engines: dict) -> bool:
+    reference = engines["bs4"]
+    ok = True
+    for url, html in pages.items():
+        expected = reference.extract(html)
+        for name, engine in engines.items():
+            got = engine.extract(html)
+            diff = [k for k in expected if expected[k] != got.get(k)]
+            if diff:
+                ok = False
+                print(f"PARITY MISMATCH {name} {url}: {', '.join(diff)}")
+                for k in diff:
+                    print(f"  bs4 : {expected[k]!r:.300}\n  {name}: {got.get(k)!r:.300}")
+    return ok
+
+
+def bench(pages: dict[str, str], engines: dict, repeat: int) -> dict[str, float]:
+    """Mean milliseconds per page for each engine."""
+    results = {}
+    for name, engine in engines.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages.values():
+                engine.extract(html)
+        results[name] = (time.perf_counter() - start) * 1000 / (repeat * len(pages))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="HTML extraction parity + benchmark")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--scale", type=int, default=8, help="size multiplier for rendered fixtures")
+    args = parser.parse_args()
+    
+    engines = {name: cls() for name, cls in EXTRACTORS.items() if name == "bs4" or etree is not None}
+    ok = True
+    for scale in sorted({1, args.scale}):
+        ok = check_parity(load_pages(scale=scale), engines) and ok
+    print("parity:", "OK" if ok else "FAILED")
+    
+    pages = load_pages(scale=args.scale)
+    kb = sum(len(p) for p in pages.values()) / len(pages) / 1024
+    print(f"\n{len(pages)} pages, avg {kb:.0f} KB, {args.repeat} rounds")
+    timings = bench(pages, engines, args.repeat)
+    base = timings["bs4"]
+    for name, ms in timings.items():
+        print(f"  {name:5s} {ms:8.2f} ms/page  x{base / ms:.1f}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Throughput and question mix of the offline heuristic engine (app/services/heuristic_generator.py)
+over the fixture articles: single-article generate() and batch generate_many(), serial
+and with worker processes.
+
+    python -m benchmarks.bench_heuristic [--copies 100] [--workers 4]
+"""
+import argparse
+import sys
+import time
+from collections import Counter
+
+from app.services.extractors import get_extractor
+from app.services.heuristic_generator import HeuristicQuizEngine
+from .fixtures import load_pages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Heuristic quiz engine benchmark")
+    parser.add_argument("--copies", type=int, default=100, help="batch size = fixture articles x copies")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--scale", type=int, default=8, help="size multiplier for rendered fixtures")
+    args = parser.parse_args()
+
+    extractor = get_extractor()
+    articles = [extractor.extract(html) for html in load_pages(scale=args.scale).values()]
+    engine = HeuristicQuizEngine()
+    chars = sum(sum(len(t) for t in a["section_content"].values()) for a in articles) / len(articles)
+    print(f"{len(articles)} articles, avg {chars / 1000:.0f}K chars of section text")
+
+    for article in articles:
+        start = time.perf_counter()
+        result = engine.generate(article["title"], article["sections"], article["content"], article["section_content"])
+        ms = (time.perf_counter() - start) * 1000
+        kinds = Counter(q["difficulty"] for q in result["quiz"])
+        print(f"  {article['title']:28s} {ms:6.1f} ms  {len(result['quiz']):2d} questions {dict(kinds)}")
+
+    batch = articles * args.copies
+    for workers in (0, args.workers):
+        start = time.perf_counter()
+        results = engine.generate_many(batch, workers=workers)
+        seconds = time.perf_counter() - start
+        questions = sum(len(r["quiz"]) for r in results)
+        print(
+            f"generate_many workers={workers}: {len(batch)} articles in {seconds:.2f}s "
+            f"({len(batch) / seconds:.0f} articles/s, {questions / len(batch):.1f} questions/article)"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
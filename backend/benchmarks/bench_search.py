@@ -0,0 +1,125 @@
+"""
+Latency of the quiz-history search (app/services/search.py) on a large synthetic history.
+Fills a temporary SQLite database with --quizzes quizzes (Zipf-distributed vocabulary,
+10 questions each), rebuilds the index the way migration 0004 does, then runs rare,
+common, multi-word and prefix queries through search_quizzes.
+
+    python -m benchmarks.bench_search [--quizzes 100000] [--runs 50]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+QUERIES = {
+    "rare word": "w19000",
+    "mid word": "w500",
+    "common word": "w3",
+    "two words": "w3 w40",
+    "prefix": "w12",
+    "title phrase": "topic 4242",
+    "no match": "zzzz",
+}
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def _fill(engine, n: int, vocabulary: int) -> None:
+    from sqlalchemy import text
+
+    rng = random.Random(7)
+    words = [f"w{i}" for i in range(vocabulary)]
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(vocabulary)))
+    # One big Zipf sample, cut into sentences (per-sentence choices() is far slower)
+    tokens = iter(rng.choices(words, cum_weights=cum_weights, k=n * 172))
+
+    def sentence(k: int) -> str:
+        return " ".join(itertools.islice(tokens, k))
+
+    batch = 5000
+    with engine.begin() as conn:
+        for start in range(1, n + 1, batch):
+            ids = range(start, min(n + 1, start + batch))
+            conn.execute(
+                text(
+                    "INSERT INTO wiki_quizzes (id, url, article_key, title, summary, related_topics, question_count) "
+                    "VALUES (:id, :url, :key, :title, :summary, :related, 10)"
+                ),
+                [
+                    {
+                        "id": i,
+                        "url": f"https://en.wikipedia.org/wiki/Topic_{i}",
+                        "key": f"en:Topic_{i}",
+                        "title": f"Topic {i} {sentence(2)}",
+                        "summary": sentence(40),
+                        "related": json.dumps([sentence(2) for _ in range(5)]),
+                    }
+                    for i in ids
+                ],
+            )
+            conn.execute(
+                text(
+                    "INSERT INTO quiz_questions (wiki_quiz_id, question, options, answer, difficulty, sort_order) "
+                    "VALUES (:quiz, :question, '[]', 'a', 'easy', :order)"
+                ),
+                [{"quiz": i, "question": sentence(12), "order": j} for i in ids for j in range(10)],
+            )
+
+
+async def _measure(runs: int) -> None:
+    from app.database import AsyncSessionLocal, async_engine
+    from app.services.search import search_quizzes
+
+    async with AsyncSessionLocal() as db:
+        for name, query in QUERIES.items():
+            rows = await search_quizzes(db, query, 21)  # warm up
+            timings = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                await search_quizzes(db, query, 21)
+                timings.append((time.perf_counter() - start) * 1000)
+            print(
+                f"  {name:13s} {query!r:14s} {len(rows):2d} rows  "
+                f"p50={_percentile(timings, 50):6.2f}ms p95={_percentile(timings, 95):6.2f}ms"
+            )
+    await async_engine.dispose()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Quiz history full-text search benchmark")
+    parser.add_argument("--quizzes", type=int, default=100_000)
+    parser.add_argument("--vocabulary", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    db_path = Path(tempfile.mkdtemp(prefix="wiki_quiz_search_")) / "search.db"
+    # Settings are read at import time, so configure the environment first
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path.as_posix()}"
+
+    from app.database import engine, init_db
+    from app.services.search import backfill_search_index
+
+    init_db()
+    start = time.perf_counter()
+    _fill(engine, args.quizzes, args.vocabulary)
+    print(f"{args.quizzes} quizzes written in {time.perf_counter() - start:.1f}s")
+    start = time.perf_counter()
+    with engine.begin() as conn:
+        backfill_search_index(conn)
+    print(f"index rebuilt in {time.perf_counter() - start:.1f}s ({db_path.stat().st_size / 2**20:.0f} MB database)")
+
+    asyncio.run(_measure(args.runs))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
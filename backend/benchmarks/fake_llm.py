@@ -0,0 +1,192 @@
+"""
+Local stand-in for Groq's OpenAI-compatible chat completions API.
+Answers POST /openai/v1/chat/completions (plain and stream=true) with a valid quiz JSON
+built from the prompt, and can misbehave on purpose: latency (with jitter and an optional
+slow tail), its own RPM quota (429 + Retry-After), a random 5xx failure rate, or being down
+entirely.
+Point the app at it with GROQ_BASE_URL=http://127.0.0.1:<port> and any GROQ_API_KEY.
+
+    python -m benchmarks.fake_llm --port 8600 --latency 1.5 --jitter 0.3 --rpm 30 --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import Counter
+from dataclasses import dataclass, field
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+@dataclass
+class FakeLLMConfig:
+    latency: float = 0.5  # seconds for a full completion
+    jitter: float = 0.0  # latency varies uniformly by +/- this share
+    tail_rate: float = 0.0  # share of requests that take tail_latency instead
+    tail_latency: float = 5.0
+    rpm: int = 0  # server-side quota, 0 = unlimited
+    fail_rate: float = 0.0  # share of requests answered with 500
+    down: bool = False  # answer every request with 503
+    chunk_chars: int = 24  # stream granularity
+    stats: Counter = field(default_factory=Counter)
+    _allowance: float = -1.0  # requests left in the RPM bucket (-1: full)
+    _updated: float = 0.0
+
+    def reset_quota(self) -> None:
+        self._allowance = -1.0
+
+
+def quiz_for_prompt(prompt: str) -> str:
+    title = (re.search(r"ARTICLE TITLE: (.*)", prompt) or re.search(r"Article: (.*)", prompt))
+    title = title.group(1).strip() if title else "Article"
+    sections = re.search(r"(?:ARTICLE SECTIONS|SECTIONS IN THIS PART): (.*)", prompt)
+    sections = [s.strip() for s in sections.group(1).split(",")] if sections else ["Introduction"]
+    quiz = [
+        {
+            "question": f"Which statement about {title} is made in the {section} section ({i + 1})?",
+            "options": [f"Fact {i} about {section}", "Unrelated claim", "Another claim", "None of these"],
+            "answer": f"Fact {i} about {section}",
+            "difficulty": ("easy", "medium", "hard")[i % 3],
+            "explanation": f"Stated in {section}.",
+            "section": section,
+        }
+        for i, section in enumerate((sections * 8)[:8])
+    ]
+    return json.dumps(
+        {
+            "key_entities": {"people": [title], "organizations": [], "locations": []},
+            "quiz": quiz,
+            "related_topics": [f"{title} (disambiguation)", f"History of {title}"],
+        }
+    )
+
+
+def create_app(config: FakeLLMConfig) -> FastAPI:
+    app = FastAPI(title="Fake LLM")
+
+    def _throttled() -> bool:
+        # Token bucket like Groq's: a full minute's quota up front, refilled continuously
+        if not config.rpm:
+            return False
+        now = time.monotonic()
+        if config._allowance < 0:
+            config._allowance = float(config.rpm)
+        else:
+            config._allowance = min(config.rpm, config._allowance + (now - config._updated) * config.rpm / 60)
+        config._updated = now
+        if config._allowance < 1:
+            return True
+        config._allowance -= 1
+        return False
+
+    @app.post("/openai/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        config.stats["requests"] += 1
+        if config.down:
+            config.stats["503"] += 1
+            return JSONResponse({"error": {"message": "service unavailable"}}, status_code=503)
+        if _throttled():
+            config.stats["429"] += 1
+            return JSONResponse(
+                {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                status_code=429,
+                headers={"retry-after": "1"},
+            )
+        if random.random() < config.fail_rate:
+            config.stats["500"] += 1
+            return JSONResponse({"error": {"message": "internal error"}}, status_code=500)
+
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        content = quiz_for_prompt(prompt)
+        prompt_tokens, completion_tokens = len(prompt) // 4, len(content) // 4
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        }
+        if random.random() < config.tail_rate:
+            latency = config.tail_latency
+        else:
+            latency = max(0.0, config.latency * (1 + random.uniform(-config.jitter, config.jitter)))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "fake")
+        config.stats["200"] += 1
+
+        if not body.get("stream"):
+            await asyncio.sleep(latency)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [
+                    {"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}
+                ],
+                "usage": usage,
+            }
+
+        async def events():
+            pieces = [content[i:i + config.chunk_chars] for i in range(0, len(content), config.chunk_chars)]
+            for i, piece in enumerate(pieces):
+                await asyncio.sleep(latency / len(pieces))
+                delta = {"content": piece} if i else {"role": "assistant", "content": piece}
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk)}\n\n"
+            final = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}],
+                "x_groq": {"usage": usage},
+            }
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    @app.get("/stats")
+    def stats():
+        return dict(config.stats)
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Groq-compatible LLM server")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-latency", type=float, default=5.0)
+    parser.add_argument("--rpm", type=int, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--down", action="store_true")
+    args = parser.parse_args()
+    config = FakeLLMConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        tail_rate=args.tail_rate,
+        tail_latency=args.tail_latency,
+        rpm=args.rpm,
+        fail_rate=args.fail_rate,
+        down=args.down,
+    )
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
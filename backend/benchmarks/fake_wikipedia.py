@@ -0,0 +1,112 @@
+"""
+Local stand-in for en.wikipedia.org article pages.
+Serves GET /wiki/<Title> from the benchmark fixtures (recorded HTML when available, see
+fixtures.py) with configurable latency and jitter. "<Fixture_title>_(variant_<n>)" is the
+fixture page re-titled, so load tests can request any number of distinct articles; other
+titles are 404.
+The app reaches it through LocalWikipediaTransport (see hermetic_app.py).
+
+    python -m benchmarks.fake_wikipedia --port 8700 --latency 0.05 --jitter 0.5
+"""
+import argparse
+import asyncio
+import html
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+from fastapi import FastAPI, Response
+
+from .fixtures import _slug, load_pages
+
+_VARIANT = re.compile(r"^(?P<base>.+)_\(variant_(?P<n>\d+)\)$")
+
+
+@dataclass
+class FakeWikipediaConfig:
+    latency: float = 0.05  # seconds before the page is sent
+    jitter: float = 0.0  # latency varies uniformly by +/- this share
+    scale: int = 8  # size multiplier for rendered (unrecorded) fixtures
+    stats: Counter = field(default_factory=Counter)
+
+
+def variant_url(base_url: str, n: int) -> str:
+    """URL of the n-th re-titled copy of a fixture article."""
+    return f"{base_url}_(variant_{n})"
+
+
+def delay(latency: float, jitter: float) -> float:
+    return max(0.0, latency * (1 + random.uniform(-jitter, jitter)))
+
+
+def create_app(config: FakeWikipediaConfig) -> FastAPI:
+    app = FastAPI(title="Fake Wikipedia")
+    pages = {_slug(url): page for url, page in load_pages(scale=config.scale).items()}
+
+    def page_for(slug: str) -> Optional[str]:
+        if slug in pages:
+            return pages[slug]
+        match = _VARIANT.match(slug)
+        if not match or match["base"] not in pages:
+            return None
+        base_title = match["base"].replace("_", " ")
+        title = f"{base_title} (variant {match['n']})"
+        return (
+            pages[match["base"]]
+            .replace(match["base"], slug)
+            .replace(html.escape(base_title), html.escape(title))
+        )
+
+    @app.get("/wiki/{slug:path}")
+    async def article(slug: str):
+        config.stats["requests"] += 1
+        await asyncio.sleep(delay(config.latency, config.jitter))
+        page = page_for(slug)
+        if page is None:
+            config.stats["404"] += 1
+            return Response("Wikipedia does not have an article with this exact name.", status_code=404)
+        config.stats["200"] += 1
+        return Response(page, media_type="text/html; charset=UTF-8")
+
+    @app.get("/stats")
+    def stats():
+        return dict(config.stats)
+
+    return app
+
+
+class LocalWikipediaTransport(httpx.AsyncBaseTransport):
+    """httpx transport that sends every request to the fake server instead of its real host."""
+
+    def __init__(self, base_url: str, **transport_options):
+        self.target = httpx.URL(base_url)
+        self._transport = httpx.AsyncHTTPTransport(**transport_options)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.url = request.url.copy_with(
+            scheme=self.target.scheme, host=self.target.host, port=self.target.port
+        )
+        request.headers["Host"] = request.url.netloc.decode("ascii")
+        return await self._transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Fake Wikipedia article server")
+    parser.add_argument("--port", type=int, default=8700)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    args = parser.parse_args()
+    config = FakeWikipediaConfig(latency=args.latency, jitter=args.jitter)
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Article HTML fixtures for benchmarks.
+Pages listed in sample_data/urls_tested.txt are loaded from benchmarks/pages/<Title>.html
+when they have been recorded (python -m benchmarks.fixtures --record, needs network).
+Otherwise a Wikipedia-shaped page is rendered from the matching sample_data/*_quiz_output.json
+(same chrome as the real skin: head scripts/styles, nav, infobox, navbox, noprint
+templates, comments, including some mid-sentence, old and new heading markup), scaled
+to a realistic article size.
+"""
+import argparse
+import html
+import json
+import re
+from pathlib import Path
+from urllib.parse import unquote
+
+ROOT_DIR = Path(__file__).resolve().parent.parent.parent
+SAMPLE_DIR = ROOT_DIR / "sample_data"
+PAGES_DIR = Path(__file__).resolve().parent / "pages"
+
+
+def tested_urls() -> list[str]:
+    lines = (SAMPLE_DIR / "urls_tested.txt").read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip().startswith("http")]
+
+
+def _slug(url: str) -> str:
+    return unquote(url.rsplit("/wiki/", 1)[-1])
+
+
+def _sample_for(url: str) -> dict:
+    for path in SAMPLE_DIR.glob("*_quiz_output.json"):
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if data.get("url") == url:
+            return data
+    raise FileNotFoundError(f"No sample_data output for {url}")
+
+
+def _sentences(text: str) -> list[str]:
+    return [s for s in re.split(r"(?<=[.!?])\s+", text or "") if len(s) > 20]
+
+
+def _paragraph(text: str, n: int) -> str:
+    words = html.escape(text).split(" ")
+    if len(words) > 6:
+        words[2] = f'<a href="/wiki/{words[2]}" title="{words[2]}">{words[2]}</a>'
+        words[-3] = f"<b>{words[-3]}</b>&nbsp;"
+        word = words[len(words) // 2]
+        if len(word) > 1 and word[0].isalnum():  # text continues in the comment's tail
+            words[len(words) // 2] = f"{word[0]}<!-- para {n} -->{word[1:]}"
+    body = " ".join(words)
+    extra = '<sup class="noprint Inline-Template"><i>[citation needed]</i></sup>' if n % 3 == 0 else ""
+    return (
+        f"<p>{body}<sup id=\"cite_ref-{n}\" class=\"reference\"><a href=\"#cite_note-{n}\">[{n}]</a></sup>"
+        f"{extra}<!-- ref {n} --></p>\n"
+    )
+
+
+def render_page(data: dict, scale: int = 8) -> str:
+    """Render a Wikipedia-like article page from a sample_data quiz output."""
+    title = data["title"]
+    esc_title = html.escape(title)
+    n = 0
+    parts = []
+    parts.append(
+        '<table class="infobox vcard"><tbody>'
+        + "".join(
+            f"<tr><th>{html.escape(k)}</th><td>{html.escape(', '.join(v))}</td></tr>"
+            for k, v in (data.get("key_entities") or {}).items()
+        )
+        + "</tbody></table>\n"
+    )
+    for sentence in _sentences(data.get("summary", "").rstrip(".")) * 2:
+        n += 1
+        parts.append(_paragraph(sentence, n))
+    parts.append('<div id="toc" class="toc"><h2 id="mw-toc-heading">Contents</h2><ul>'
+                 + "".join(f"<li>{html.escape(s)}</li>" for s in data.get("sections", []))
+                 + "</ul></div>\n")
+    by_section: dict[str, list[dict]] = {}
+    for q in data.get("quiz", []):
+        by_section.setdefault(q.get("section") or "", []).append(q)
+    fallback = [q for qs in by_section.values() for q in qs]
+    for i, section in enumerate(data.get("sections", [])):
+        esc = html.escape(section)
+        if i % 2 == 0:
+            parts.append(
+                f'<h2><span class="mw-headline" id="s{i}">{esc}</span>'
+                f'<span class="mw-editsection">[<a href="#">edit</a>]</span></h2>\n'
+            )
+        else:
+            parts.append(
+                f'<div class="mw-heading mw-heading3"><h3 id="s{i}">{esc}</h3>'
+                f'<span class="mw-editsection">[<a href="#">edit</a>]</span></div>\n'
+            )
+        questions = by_section.get(section) or fallback[i % max(len(fallback), 1):][:2]
+        for _ in range(scale):
+            for q in questions:
+                n += 1
+                parts.append(_paragraph(q.get("explanation") or q["question"], n))
+            if questions:
+                parts.append("<ul>" + "".join(
+                    f"<li>{html.escape(o)} is one of the options discussed in this part of the article.</li>"
+                    for o in questions[0]["options"]
+                ) + "</ul>\n")
+    parts.append('<h2><span class="mw-headline" id="See_also">See also</span></h2><ul>'
+                 + "".join(f'<li><a href="/wiki/{html.escape(t)}">{html.escape(t)}</a></li>'
+                           for t in data.get("related_topics", []))
+                 + "</ul>\n")
+    parts.append('<h2><span class="mw-headline" id="References">References</span></h2>'
+                 '<div class="reflist"><ol class="references">'
+                 + "".join(f'<li id="cite_note-{k}">Reference number {k} with a long enough citation text.</li>'
+                           for k in range(1, n + 1))
+                 + "</ol></div>\n")
+    parts.append('<div class="navbox"><table><tr><td>'
+                 + " · ".join(f"<a href=\"#\">Navbox link {k}</a>" for k in range(200))
+                 + "</td></tr></table></div>\n")
+    scripts = "".join(f"<script>var wgConfig{k} = {{\"a\": {k}, \"b\": \"{'x' * 400}\"}};</script>" for k in range(40))
+    styles = "".join(f"<style>.c{k} {{ color: #{k:06x}; margin: 0 auto; }}</style>" for k in range(40))
+    slug = title.replace(" ", "_")
+    return f"""<!DOCTYPE html>
+<html class="client-nojs" lang="en" dir="ltr">
+<head>
+<meta charset="UTF-8">
+<title>{esc_title} - Wikipedia</title>
+{scripts}{styles}
+<link rel="canonical" href="https://en.wikipedia.org/wiki/{slug}">
+</head>
+<body class="mediawiki">
+<nav id="mw-panel"><ul>{''.join(f'<li><a href="#">Menu item {k}</a></li>' for k in range(60))}</ul></nav>
+<main id="content" class="mw-body">
+<h1 id="firstHeading" class="firstHeading mw-first-heading"><span class="mw-page-title-main">{esc_title}</span></h1>
+<div id="bodyContent" class="vector-body">
+<div id="siteSub" class="noprint">From Wikipedia, the free encyclopedia</div>
+<div id="mw-content-text" class="mw-body-content"><div class="mw-content-ltr mw-parser-output" lang="en" dir="ltr">
+<div class="hatnote navigation-not-searchable">For other uses, see {esc_title} (disambiguation).</div>
+{''.join(parts)}
+</div></div>
+</div>
+</main>
+<footer id="footer"><ul><li>This page was last edited today.</li></ul></footer>
+</body>
+</html>
+"""
+
+
+def load_pages(scale: int = 8) -> dict[str, str]:
+    """url -> article HTML for every tested URL (recorded copy preferred)."""
+    pages = {}
+    for url in tested_urls():
+        recorded = PAGES_DIR / f"{_slug(url)}.html"
+        if recorded.exists():
+            pages[url] = recorded.read_text(encoding="utf-8")
+        else:
+            pages[url] = render_page(_sample_for(url), scale=scale)
+    return pages
+
+
+def record_pages() -> None:
+    """Download the tested URLs into benchmarks/pages/ (requires network access)."""
+    import requests
+
+    PAGES_DIR.mkdir(exist_ok=True)
+    session = requests.Session()
+    session.headers["User-Agent"] = "WikiQuizGenerator/1.0 (Educational; benchmark recording)"
+    for url in tested_urls():
+        response = session.get(url, timeout=30)
+        response.raise_for_status()
+        response.encoding = "utf-8"
+        (PAGES_DIR / f"{_slug(url)}.html").write_text(response.text, encoding="utf-8")
+        print(f"recorded {url} ({len(response.text) // 1024} KB)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--record", action="store_true", help="download real pages into benchmarks/pages/")
+    args = parser.parse_args()
+    if args.record:
+        record_pages()
+    else:
+        for url, page in load_pages().items():
+            print(f"{url}: {len(page) // 1024} KB")
@@ -0,0 +1,47 @@
+"""
+Run the real app under uvicorn with every Wikipedia request sent to a local fake server
+(fake_wikipedia.py); article URLs stay https://en.wikipedia.org/wiki/... inside the app.
+Everything else comes from the environment as usual, e.g. GROQ_BASE_URL for the fake LLM.
+bench_api.py starts it as a subprocess so its memory is measured on its own.
+
+    python -m benchmarks.hermetic_app --port 8800 --wikipedia http://127.0.0.1:8700
+"""
+import argparse
+
+import httpx
+import uvicorn
+
+from app.config import get_settings
+from app.services import scraper as scraper_mod
+from .fake_wikipedia import LocalWikipediaTransport
+
+
+def install_local_wikipedia(base_url: str) -> None:
+    """Replace the shared async client with one that routes to base_url (before app startup)."""
+    settings = get_settings()
+    limits = httpx.Limits(
+        max_connections=settings.HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    scraper_mod._async_client = httpx.AsyncClient(
+        transport=LocalWikipediaTransport(base_url, limits=limits),
+        headers={"User-Agent": scraper_mod.DEFAULT_USER_AGENT},
+        timeout=settings.HTTP_TIMEOUT_SECONDS,
+        follow_redirects=True,
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Wiki quiz API against a local fake Wikipedia")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--wikipedia", default="http://127.0.0.1:8700")
+    args = parser.parse_args()
+    install_local_wikipedia(args.wikipedia)
+
+    from app.main import app
+
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
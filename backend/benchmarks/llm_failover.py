@@ -0,0 +1,164 @@
+"""
+Exercise the LLM backend pool (app/services/llm_pool.py) against local fake LLM servers.
+Two backends: "primary" (fast, but --tail-rate of its calls take --tail-latency seconds)
+and "secondary" (a bit slower, steady). Scenarios, each --requests quiz generations at
+--concurrency:
+- slow tail:    primary alone vs the pool with hedging at the primary's observed p95.
+- primary down: the pool fails over to the secondary; once the primary's breaker opens
+                it is skipped.
+- all down:     with LLM_MOCK_FALLBACK the heuristic generator still answers.
+- default quota: the hedged pool with each backend at the default GROQ_RPM / GROQ_TPM,
+                where hedges and failovers compete for quota (the scenarios above run
+                with the quotas off).
+
+    python -m benchmarks.llm_failover [--requests 60] [--tail-rate 0.1]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "fake-key")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+os.environ["LLM_RETRY_BASE_SECONDS"] = "0.2"
+
+from app.config import Settings, get_settings
+from app.services.llm_guard import get_circuit_breaker, get_rate_limiter
+from app.services.quiz_generator import QuizGenerator
+from .fake_llm import FakeLLMConfig
+from .llm_resilience import start_server
+
+ARTICLE = (
+    "Alan Turing was an English mathematician and computer scientist. "
+    "The Turing machine is a mathematical model of computation that defines an abstract machine. "
+    "Bletchley Park was the central site for British codebreakers during the Second World War. "
+    "The Enigma machine was a cipher device used in the early to mid 20th century. "
+    "The Turing test is a test of a machine's ability to exhibit intelligent behaviour. "
+)
+
+
+UNLIMITED = {"GROQ_RPM": 0, "GROQ_TPM": 0}
+
+
+def make_generator(ports: list[int], **settings) -> QuizGenerator:
+    """A pool over ports; settings are set in the environment, None unsets one (app default)."""
+    backends = [
+        {"name": f"fake-{port}", "model": "fake", "base_url": f"http://127.0.0.1:{port}"} for port in ports
+    ]
+    os.environ["LLM_BACKENDS"] = json.dumps(backends)
+    for key, value in settings.items():
+        if value is None:
+            os.environ.pop(key, None)
+        else:
+            os.environ[key] = str(value)
+    get_settings.cache_clear()
+    get_rate_limiter.cache_clear()
+    get_circuit_breaker.cache_clear()
+    return QuizGenerator()
+
+
+async def load(generator: QuizGenerator, n: int, concurrency: int) -> tuple[list[float], list[str], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, errors, questions = [], [], 0
+
+    async def one(i: int) -> None:
+        nonlocal questions
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await generator.agenerate_quiz(
+                    title=f"Article {i}", sections=["Introduction"], content=ARTICLE + f"Article {i}."
+                )
+                questions += len(result["quiz"])
+            except Exception as e:
+                errors.append(type(e).__name__)
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(n)))
+    return latencies, errors, questions
+
+
+def report(name: str, result: tuple[list[float], list[str], int], *configs: FakeLLMConfig) -> None:
+    latencies, errors, questions = result
+    q = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else latencies * 99
+    servers = " ".join(
+        f"{label}={dict(c.stats)}" for label, c in zip(("primary", "secondary"), configs)
+    )
+    print(
+        f"  {name:24s} p50={q[49]:5.2f}s p95={q[94]:5.2f}s p99={q[98]:5.2f}s "
+        f"errors={len(errors)} questions={questions} {servers}"
+    )
+
+
+async def run(args) -> None:
+    logging.getLogger("app").setLevel(logging.ERROR)  # per-call failover warnings
+    primary = FakeLLMConfig(latency=args.latency, tail_rate=args.tail_rate, tail_latency=args.tail_latency)
+    secondary = FakeLLMConfig(latency=args.latency * 1.5)
+    start_server(primary, args.port)
+    start_server(secondary, args.port + 1)
+    ports = [args.port, args.port + 1]
+
+    def reset(**changes) -> None:
+        for config in (primary, secondary):
+            config.stats.clear()
+        for key, value in changes.items():
+            setattr(primary, key, value)
+
+    print(
+        f"slow tail: {args.tail_rate:.0%} of primary calls take {args.tail_latency}s "
+        f"({args.requests} requests, concurrency {args.concurrency})"
+    )
+    reset()
+    report("primary only", await load(make_generator(ports[:1], **UNLIMITED), args.requests, args.concurrency), primary)
+    reset()
+    hedged = dict(LLM_HEDGE_INITIAL_SECONDS=args.latency * 4, LLM_HEDGE_MIN_SECONDS=0.1)
+    generator = make_generator(ports, **UNLIMITED, **hedged)
+    report("pool, hedged at p95", await load(generator, args.requests, args.concurrency), primary, secondary)
+
+    print("\nprimary down (503)")
+    reset(down=True)
+    generator = make_generator(ports, LLM_BREAKER_FAILURES=3)
+    report("pool, failover", await load(generator, args.requests, args.concurrency), primary, secondary)
+
+    print("\nevery backend down (503)")
+    reset()
+    secondary.down = True
+    for fallback in (False, True):
+        generator = make_generator(ports, LLM_MOCK_FALLBACK=fallback, LLM_RETRY_ATTEMPTS=1)
+        name = "mock fallback" if fallback else "no fallback"
+        report(name, await load(generator, args.requests // 4, args.concurrency), primary, secondary)
+        reset()
+
+    reset(down=False)
+    secondary.down = False
+    quota = Settings.model_fields
+    print(
+        f"\ndefault quota: {quota['GROQ_RPM'].default} RPM / {quota['GROQ_TPM'].default} TPM per backend "
+        f"({args.requests // 4} requests)"
+    )
+    generator = make_generator(
+        ports, GROQ_RPM=None, GROQ_TPM=None, LLM_MOCK_FALLBACK=False, LLM_RETRY_ATTEMPTS=None, **hedged
+    )
+    report("pool, hedged at p95", await load(generator, args.requests // 4, args.concurrency), primary, secondary)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM backend pool: hedging, failover, fallback")
+    parser.add_argument("--requests", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--tail-rate", type=float, default=0.1)
+    parser.add_argument("--tail-latency", type=float, default=4.0)
+    parser.add_argument("--port", type=int, default=8611)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
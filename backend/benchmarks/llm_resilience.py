@@ -0,0 +1,114 @@
+"""
+Exercise the LLM guard (app/services/llm_guard.py) against the local fake LLM server.
+Scenarios, each a burst of concurrent QuizGenerator.agenerate_quiz calls:
+- burst:  the server allows --server-rpm requests/minute; compares no client limiter
+          (requests beyond the quota fail with 429) with the guarded client
+          (requests queue for quota and all succeed).
+- flaky:  the server fails --fail-rate of requests with 500; retries absorb them.
+- down:   the server answers 503; the circuit breaker opens and later calls fail fast.
+
+    python -m benchmarks.llm_resilience [--burst 10] [--server-rpm 8]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+os.environ.setdefault("GROQ_API_KEY", "fake-key")
+os.environ["LLM_CACHE_ENABLED"] = "false"
+
+import uvicorn
+
+from app.services.llm_guard import CircuitBreaker, GuardedLLM, RateLimiter
+from app.services.quiz_generator import QuizGenerator
+from .fake_llm import FakeLLMConfig, create_app
+
+
+def start_server(config: FakeLLMConfig, port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(create_app(config), host="127.0.0.1", port=port, log_level="error"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def make_generator(port: int, rpm: int, attempts: int, breaker_failures: int = 5) -> QuizGenerator:
+    os.environ["GROQ_BASE_URL"] = f"http://127.0.0.1:{port}"
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+    generator = QuizGenerator()
+    guarded = GuardedLLM(
+        generator.llm.backends[0].llm.llm,
+        limiter=RateLimiter(rpm, 0, max_wait_seconds=120),
+        breaker=CircuitBreaker(breaker_failures, reset_seconds=30),
+    )
+    guarded.attempts = attempts
+    guarded.backoff_base = 0.2
+    generator.llm = guarded
+    return generator
+
+
+async def burst(generator: QuizGenerator, n: int) -> tuple[int, list[str], float]:
+    async def one(i: int):
+        return await generator.agenerate_quiz(
+            title=f"Article {i}", sections=["Introduction"], content=f"Article {i} text."
+        )
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one(i) for i in range(n)), return_exceptions=True)
+    errors = [type(r).__name__ for r in results if isinstance(r, Exception)]
+    return n - len(errors), errors, time.perf_counter() - start
+
+
+def report(name: str, config: FakeLLMConfig, result: tuple[int, list[str], float]) -> None:
+    ok, errors, seconds = result
+    error_counts = {e: errors.count(e) for e in sorted(set(errors))}
+    print(f"  {name:28s} ok={ok:3d} errors={error_counts} {seconds:6.2f}s server={dict(config.stats)}")
+
+
+async def run(args) -> None:
+    config = FakeLLMConfig(latency=args.latency)
+    start_server(config, args.port)
+
+    def reset(**changes):
+        config.stats.clear()
+        config.reset_quota()
+        for key, value in changes.items():
+            setattr(config, key, value)
+
+    print(f"burst of {args.burst} against a server allowing {args.server_rpm} RPM")
+    for name, rpm, attempts in (("unguarded", 0, 1), ("guarded (client RPM limit)", args.server_rpm, 4)):
+        reset(rpm=args.server_rpm)
+        report(name, config, await burst(make_generator(args.port, rpm, attempts), args.burst))
+
+    print(f"\nflaky server ({args.fail_rate:.0%} 500s)")
+    for name, attempts in (("no retries", 1), ("retries with backoff", 4)):
+        reset(rpm=0, fail_rate=args.fail_rate)
+        report(name, config, await burst(make_generator(args.port, 0, attempts), args.burst))
+
+    print("\nserver down (503)")
+    reset(fail_rate=0.0, down=True)
+    generator = make_generator(args.port, 0, attempts=2, breaker_failures=3)
+    report("first burst (opens breaker)", config, await burst(generator, args.burst))
+    reset()
+    report("second burst (fails fast)", config, await burst(generator, args.burst))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="LLM rate limit / retry / circuit breaker scenarios")
+    parser.add_argument("--burst", type=int, default=10)
+    parser.add_argument("--server-rpm", type=int, default=8)
+    parser.add_argument("--fail-rate", type=float, default=0.3)
+    parser.add_argument("--latency", type=float, default=0.3)
+    parser.add_argument("--port", type=int, default=8601)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,136 @@
+"""
+Concurrent read/write stress test for the SQLite storage profile (app/database.py).
+Writer threads store quizzes the way generate_quiz does while reader threads page
+through history and load quiz details. Reports throughput, latency percentiles and
+"database is locked" failures; exits non-zero if any operation failed.
+
+    python -m benchmarks.sqlite_stress [--writers 4] [--readers 16] [--seconds 10] [--no-tuning]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SQLite concurrent read/write stress test")
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--no-tuning", action="store_true", help="disable the SQLite production profile")
+    args = parser.parse_args()
+    
+    db_path = Path(tempfile.mkdtemp(prefix="wiki_quiz_stress_")) / "stress.db"
+    # Settings are read at import time, so configure the environment first
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path.as_posix()}"
+    os.environ["SQLITE_TUNING_ENABLED"] = "false" if args.no_tuning else "true"
+    os.environ["DB_POOL_SIZE"] = str(args.writers + args.readers)
+    
+    from sqlalchemy import select, text
+    from sqlalchemy.orm import joinedload
+    from app.database import SessionLocal, engine, init_db
+    from app.models import QuizQuestion, WikiQuiz
+    
+    init_db()
+    with engine.connect() as conn:
+        mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+    
+    stop = threading.Event()
+    latencies: dict[str, list[float]] = {"write": [], "list": [], "detail": []}
+    errors: Counter = Counter()
+    lock = threading.Lock()
+    seq = iter(range(10**9))
+    
+    def record(kind: str, started: float) -> None:
+        with lock:
+            latencies[kind].append((time.perf_counter() - started) * 1000)
+    
+    def writer() -> None:
+        while not stop.is_set():
+            n = next(seq)
+            started = time.perf_counter()
+            db = SessionLocal()
+            try:
+                quiz = WikiQuiz(
+                    url=f"https://en.wikipedia.org/wiki/Stress_{n}",
+                    article_key=f"en:Stress_{n}",
+                    title=f"Stress {n}",
+                    summary="x" * 800,
+                    sections=["Introduction", "History"],
+                    related_topics=["A", "B"],
+                    question_count=8,
+                )
+                db.add(quiz)
+                db.flush()
+                for i in range(8):
+                    db.add(QuizQuestion(
+                        wiki_quiz_id=quiz.id, question=f"Q{i}?" * 10, options=["a", "b", "c", "d"],
+                        answer="a", difficulty="easy", explanation="e" * 200, sort_order=i,
+                    ))
+                db.commit()
+                record("write", started)
+            except Exception as e:
+                db.rollback()
+                errors[type(e).__name__ + ": " + str(e).splitlines()[0][:80]] += 1
+            finally:
+                db.close()
+    
+    def reader() -> None:
+        while not stop.is_set():
+            db = SessionLocal()
+            try:
+                started = time.perf_counter()
+                rows = db.execute(
+                    select(WikiQuiz.id, WikiQuiz.title, WikiQuiz.question_count)
+                    .order_by(WikiQuiz.created_at.desc(), WikiQuiz.id.desc())
+                    .limit(50)
+                ).all()
+                record("list", started)
+                if rows:
+                    started = time.perf_counter()
+                    db.execute(
+                        select(WikiQuiz).options(joinedload(WikiQuiz.questions)).where(WikiQuiz.id == rows[-1].id)
+                    ).unique().scalars().first()
+                    record("detail", started)
+            except Exception as e:
+                errors[type(e).__name__ + ": " + str(e).splitlines()[0][:80]] += 1
+            finally:
+                db.close()
+    
+    threads = [threading.Thread(target=writer) for _ in range(args.writers)]
+    threads += [threading.Thread(target=reader) for _ in range(args.readers)]
+    for t in threads:
+        t.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    engine.dispose()
+    
+    print(f"journal_mode={mode} tuning={'off' if args.no_tuning else 'on'} "
+          f"writers={args.writers} readers={args.readers} seconds={args.seconds}")
+    for kind, values in latencies.items():
+        mean = statistics.fmean(values) if values else 0.0
+        print(f"  {kind:6s} {len(values) / args.seconds:9.1f} ops/s  mean {mean:7.2f} ms  "
+              f"p95 {_percentile(values, 95):7.2f} ms  p99 {_percentile(values, 99):7.2f} ms")
+    failed = sum(errors.values())
+    print(f"  errors {failed}")
+    for message, count in errors.most_common():
+        print(f"    {count:5d} x {message}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,9 +1,18 @@
-import { useState, useEffect } from 'react'
+import { useState, useEffect, useRef } from 'react'
 import QuizDisplay from './QuizDisplay'
 import TakeQuizMode from './TakeQuizMode'
 import './PastQuizzes.css'
 
-import { apiGet } from '../lib/api'
+import { apiGet, apiGetPage } from '../lib/api'
+
+const PAGE_SIZE = 50
+const SEARCH_DELAY_MS = 250
+
+// History, newest first; with a query, server-side full-text search results, best first
+const listPath = (query) =>
+  query
+    ? `/quizzes/search?q=${encodeURIComponent(query)}&limit=${PAGE_SIZE}`
+    : `/quizzes?limit=${PAGE_SIZE}`
 
 export default function PastQuizzes() {
   const [quizzes, setQuizzes] = useState([])
@@ -12,23 +21,54 @@ export default function PastQuizzes() {
   const [selectedQuiz, setSelectedQuiz] = useState(null)
   const [detailLoading, setDetailLoading] = useState(false)
   const [detailViewMode, setDetailViewMode] = useState('study') // 'study' | 'take'
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loadingMore, setLoadingMore] = useState(false)
+  const [query, setQuery] = useState('')
+  const latestRequest = useRef(0)
 
-  const fetchQuizzes = async () => {
+  const fetchQuizzes = async (search) => {
+    const request = ++latestRequest.current
     setLoading(true)
     setError(null)
     try {
-      const data = await apiGet('/quizzes')
+      const { data, nextCursor } = await apiGetPage(listPath(search))
+      if (request !== latestRequest.current) return // a newer query superseded this one
       setQuizzes(data)
+      setNextCursor(nextCursor)
+    } catch (err) {
+      if (request === latestRequest.current) setError(err.message)
+    } finally {
+      if (request === latestRequest.current) setLoading(false)
+    }
+  }
+
+  const loadMore = async () => {
+    if (!nextCursor) return
+    const request = latestRequest.current
+    setLoadingMore(true)
+    try {
+      const { data, nextCursor: cursor } = await apiGetPage(
+        `${listPath(query.trim())}&cursor=${encodeURIComponent(nextCursor)}`
+      )
+      if (request !== latestRequest.current) return
+      // Search scores shift a little when quizzes are added between pages: skip repeats
+      setQuizzes((prev) => {
+        const shown = new Set(prev.map((quiz) => quiz.id))
+        return [...prev, ...data.filter((quiz) => !shown.has(quiz.id))]
+      })
+      setNextCursor(cursor)
     } catch (err) {
       setError(err.message)
     } finally {
-      setLoading(false)
+      setLoadingMore(false)
     }
   }
 
   useEffect(() => {
-    fetchQuizzes()
-  }, [])
+    const search = query.trim()
+    const timer = setTimeout(() => fetchQuizzes(search), search ? SEARCH_DELAY_MS : 0)
+    return () => clearTimeout(timer)
+  }, [query])
 
   const openDetails = async (id) => {
     setDetailLoading(true)
@@ -64,12 +104,25 @@ export default function PastQuizzes() {
     <div className="past-quizzes">
       <h2 className="page-title">Past Quizzes</h2>
 
+      <input
+        className="search-input"
+        type="search"
+        placeholder="Search titles, topics and questions…"
+        value={query}
+        onChange={(e) => setQuery(e.target.value)}
+        aria-label="Search past quizzes"
+      />
+
       {loading ? (
         <p className="loading">Loading quizzes…</p>
       ) : error ? (
         <p className="error">{error}</p>
       ) : quizzes.length === 0 ? (
-        <p className="empty">No quizzes yet. Generate one from the Generate Quiz tab!</p>
+        <p className="empty">
+          {query.trim()
+            ? 'No quizzes match your search.'
+            : 'No quizzes yet. Generate one from the Generate Quiz tab!'}
+        </p>
       ) : (
         <div className="table-wrapper">
           <table className="quizzes-table">
@@ -110,6 +163,13 @@ export default function PastQuizzes() {
               ))}
             </tbody>
           </table>
+          {nextCursor && (
+            <div className="load-more">
+              <button className="btn-details" onClick={loadMore} disabled={loadingMore}>
+                {loadingMore ? 'Loading…' : 'Load more'}
+              </button>
+            </div>
+          )}
         </div>
       )}
 
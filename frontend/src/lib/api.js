@@ -9,6 +9,16 @@ export async function apiGet(path) {
   return data
 }
 
+// Paginated GET: returns the page plus the cursor for the next one (null on the last page)
+export async function apiGetPage(path) {
+  const res = await fetch(`${API_BASE}${path}`)
+  const data = await res.json().catch(() => ({}))
+  if (!res.ok) {
+    throw new Error(data.detail || `Request failed: ${res.status}`)
+  }
+  return { data, nextCursor: res.headers.get('X-Next-Cursor') }
+}
+
 export async function apiPost(path, body) {
   const res = await fetch(`${API_BASE}${path}`, {
     method: 'POST',